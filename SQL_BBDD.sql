@@ -144,16 +144,93 @@ BEFORE UPDATE ON egg_production
 FOR EACH ROW
 EXECUTE FUNCTION trg_touch_updated_at();
 
--- Vista de resumen diario (desglose por tamaño y total)
-CREATE OR REPLACE VIEW v_egg_production_daily AS
-SELECT
-  production_date,
-  SUM(quantity) FILTER (WHERE size_code = 'small'  AND is_validated) AS small_qty,
-  SUM(quantity) FILTER (WHERE size_code = 'medium' AND is_validated) AS medium_qty,
-  SUM(quantity) FILTER (WHERE size_code = 'large'  AND is_validated) AS large_qty,
-  SUM(quantity) FILTER (WHERE is_validated)                           AS total_qty
-FROM egg_production
-GROUP BY production_date;
+-- Resumen diario (desglose por tamaño y total)
+-- Tabla mantenida por trigger: cada cambio en egg_production recalcula
+-- solo su día, y las consultas diarias leen un rango del índice.
+DROP VIEW IF EXISTS v_egg_production_daily;
+
+CREATE TABLE IF NOT EXISTS egg_production_daily (
+  production_date  DATE PRIMARY KEY,
+  total_eggs       INTEGER NOT NULL DEFAULT 0,
+  small_count      INTEGER NOT NULL DEFAULT 0,
+  medium_count     INTEGER NOT NULL DEFAULT 0,
+  large_count      INTEGER NOT NULL DEFAULT 0,
+  refreshed_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Recalcula un día (solo registros activos y validados).
+-- El advisory lock por día serializa las transacciones que escriben la
+-- misma fecha: la segunda espera el COMMIT de la primera y, como en READ
+-- COMMITTED cada sentencia toma un snapshot nuevo, suma también sus filas
+-- (sin el lock su upsert sobrescribiría el día con sumas parciales).
+CREATE OR REPLACE FUNCTION egg_production_daily_refresh(p_date DATE)
+RETURNS VOID AS $$
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('egg_production_daily'), p_date - DATE '2000-01-01');
+
+  IF NOT EXISTS (
+    SELECT 1 FROM egg_production WHERE production_date = p_date AND is_active
+  ) THEN
+    DELETE FROM egg_production_daily WHERE production_date = p_date;
+    RETURN;
+  END IF;
+
+  INSERT INTO egg_production_daily AS d
+         (production_date, total_eggs, small_count, medium_count, large_count, refreshed_at)
+  SELECT p_date,
+         COALESCE(SUM(quantity) FILTER (WHERE is_validated), 0),
+         COALESCE(SUM(quantity) FILTER (WHERE size_code = 'small'  AND is_validated), 0),
+         COALESCE(SUM(quantity) FILTER (WHERE size_code = 'medium' AND is_validated), 0),
+         COALESCE(SUM(quantity) FILTER (WHERE size_code = 'large'  AND is_validated), 0),
+         NOW()
+    FROM egg_production
+   WHERE production_date = p_date AND is_active
+  ON CONFLICT (production_date) DO UPDATE SET
+    total_eggs   = EXCLUDED.total_eggs,
+    small_count  = EXCLUDED.small_count,
+    medium_count = EXCLUDED.medium_count,
+    large_count  = EXCLUDED.large_count,
+    refreshed_at = EXCLUDED.refreshed_at;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trg_egg_production_daily()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM egg_production_daily_refresh(OLD.production_date);
+  END IF;
+  IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.production_date <> OLD.production_date) THEN
+    PERFORM egg_production_daily_refresh(NEW.production_date);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS egg_production_daily_sync ON egg_production;
+CREATE TRIGGER egg_production_daily_sync
+AFTER INSERT OR UPDATE OR DELETE ON egg_production
+FOR EACH ROW
+EXECUTE FUNCTION trg_egg_production_daily();
+
+-- Carga inicial / reconstrucción (idempotente)
+INSERT INTO egg_production_daily
+       (production_date, total_eggs, small_count, medium_count, large_count, refreshed_at)
+SELECT production_date,
+       COALESCE(SUM(quantity) FILTER (WHERE is_validated), 0),
+       COALESCE(SUM(quantity) FILTER (WHERE size_code = 'small'  AND is_validated), 0),
+       COALESCE(SUM(quantity) FILTER (WHERE size_code = 'medium' AND is_validated), 0),
+       COALESCE(SUM(quantity) FILTER (WHERE size_code = 'large'  AND is_validated), 0),
+       NOW()
+  FROM egg_production
+ WHERE is_active
+ GROUP BY production_date
+ON CONFLICT (production_date) DO UPDATE SET
+  total_eggs   = EXCLUDED.total_eggs,
+  small_count  = EXCLUDED.small_count,
+  medium_count = EXCLUDED.medium_count,
+  large_count  = EXCLUDED.large_count,
+  refreshed_at = EXCLUDED.refreshed_at;
 
 -- =========================
 --  SCHEMA: feed_item
@@ -243,6 +320,35 @@ BEFORE UPDATE ON feed_inventory_movement
 FOR EACH ROW
 EXECUTE FUNCTION trg_touch_updated_at();
 
+-- Stock de un item en una fecha: snapshot más cercano + movimientos posteriores
+CREATE INDEX IF NOT EXISTS feed_inventory_movement_item_date_idx
+  ON feed_inventory_movement (feed_item_id, movement_date);
+
+-- Paginación por cursor del historial (fecha, id)
+CREATE INDEX IF NOT EXISTS feed_inventory_movement_keyset_idx
+  ON feed_inventory_movement (movement_date DESC, id DESC) WHERE is_active;
+
+-- =========================
+--  SCHEMA: feed_inventory_snapshot
+--  Stock de cada item al cierre de un día, calculado desde los movimientos.
+--  Lo escribe el comando `manage.py snapshot_inventory` (diario o mensual).
+-- =========================
+CREATE TABLE IF NOT EXISTS feed_inventory_snapshot (
+  id               BIGSERIAL PRIMARY KEY,
+  feed_item_id     BIGINT NOT NULL REFERENCES feed_item(id),
+  snapshot_date    DATE NOT NULL,            -- stock al cierre de este día
+  period           VARCHAR(10) NOT NULL DEFAULT 'daily',
+  quantity         NUMERIC(12,2) NOT NULL,
+  movement_count   INTEGER NOT NULL DEFAULT 0, -- movimientos desde el snapshot anterior
+
+  -- Auditoría
+  created_at       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  created_by       BIGINT REFERENCES users(id) DEFERRABLE INITIALLY DEFERRED,
+
+  CONSTRAINT feed_inventory_snapshot_period_ck CHECK (period IN ('daily', 'monthly')),
+  CONSTRAINT feed_inventory_snapshot_item_date_uk UNIQUE (feed_item_id, snapshot_date)
+);
+
 -- =========================
 --  SCHEMA: feed_mix
 -- =========================
@@ -323,6 +429,25 @@ BEFORE UPDATE ON feed_consumption
 FOR EACH ROW
 EXECUTE FUNCTION trg_touch_updated_at();
 
+-- =========================
+--  SCHEMA: feed_cost_daily (analítica)
+--  Costo de alimento por huevo, un registro por día. Lo llena de forma
+--  incremental `manage.py refresh_feed_cost_daily` (solo los días cuyos
+--  datos de origen cambiaron según updated_at).
+-- =========================
+CREATE TABLE IF NOT EXISTS feed_cost_daily (
+  day                  DATE PRIMARY KEY,
+  eggs_produced        INTEGER NOT NULL DEFAULT 0,
+  hens_count           INTEGER,                 -- último farm_status <= day
+  feed_consumed_kg     NUMERIC(12,2) NOT NULL DEFAULT 0,
+  feed_mix_id          BIGINT REFERENCES feed_mix(id) ON DELETE SET NULL,
+  mix_cost_per_kg      NUMERIC(12,2),           -- costo de ingredientes de la mezcla
+  feed_cost_clp        NUMERIC(14,2),
+  feed_cost_per_dozen  NUMERIC(12,2),
+  laying_pct           NUMERIC(6,2),
+  computed_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 -- =========================
 --  SCHEMA: mortality_event
 -- =========================
@@ -353,6 +478,10 @@ CREATE INDEX IF NOT EXISTS mortality_event_date_idx
 CREATE INDEX IF NOT EXISTS mortality_event_type_idx
   ON mortality_event (bird_type);
 
+-- Paginación por cursor (fecha, id)
+CREATE INDEX IF NOT EXISTS mortality_event_keyset_idx
+  ON mortality_event (event_date DESC, id DESC) WHERE is_active;
+
 -- Trigger para mantener updated_at
 DROP TRIGGER IF EXISTS mortality_event_touch_updated_at ON mortality_event;
 CREATE TRIGGER mortality_event_touch_updated_at
@@ -424,6 +553,10 @@ CREATE INDEX IF NOT EXISTS finance_transaction_date_idx
 CREATE INDEX IF NOT EXISTS finance_transaction_cat_idx
   ON finance_transaction (category_id);
 
+-- Paginación por cursor (fecha, id)
+CREATE INDEX IF NOT EXISTS finance_transaction_keyset_idx
+  ON finance_transaction (transaction_date DESC, id DESC) WHERE is_active;
+
 DROP TRIGGER IF EXISTS finance_transaction_touch_updated_at ON finance_transaction;
 CREATE TRIGGER finance_transaction_touch_updated_at
 BEFORE UPDATE ON finance_transaction
@@ -492,3 +625,19 @@ BEFORE UPDATE ON report_export
 FOR EACH ROW
 EXECUTE FUNCTION trg_touch_updated_at();
 
+
+-- =========================
+--  Sincronización incremental (/changes de la API)
+-- =========================
+-- Recorrido de cambios en orden (updated_at, id)
+CREATE INDEX IF NOT EXISTS farm_status_changes_idx ON farm_status (updated_at, id);
+CREATE INDEX IF NOT EXISTS egg_production_changes_idx ON egg_production (updated_at, id);
+CREATE INDEX IF NOT EXISTS mortality_event_changes_idx ON mortality_event (updated_at, id);
+CREATE INDEX IF NOT EXISTS feed_item_changes_idx ON feed_item (updated_at, id);
+CREATE INDEX IF NOT EXISTS feed_mix_changes_idx ON feed_mix (updated_at, id);
+CREATE INDEX IF NOT EXISTS feed_mix_item_changes_idx ON feed_mix_item (updated_at, id);
+CREATE INDEX IF NOT EXISTS feed_consumption_changes_idx ON feed_consumption (updated_at, id);
+CREATE INDEX IF NOT EXISTS finance_category_changes_idx ON finance_category (updated_at, id);
+CREATE INDEX IF NOT EXISTS finance_transaction_changes_idx ON finance_transaction (updated_at, id);
+CREATE INDEX IF NOT EXISTS finance_summary_changes_idx ON finance_summary (updated_at, id);
+CREATE INDEX IF NOT EXISTS report_export_changes_idx ON report_export (updated_at, id);
@@ -0,0 +1,488 @@
+"""
+Reusable viewset mixins.
+"""
+
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_datetime
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from rest_framework import ISO_8601, serializers, status
+from rest_framework.decorators import action
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from api.throttling import BulkThrottle, concurrency_limited
+from core import change_feed
+from core.conditional import build_validator, not_modified, set_validator_headers
+from core.pagination import InvalidCursor, get_ordering
+
+
+class BulkUpsertMixin:
+    """
+    Adds `POST <list-url>/bulk/`: creates or updates many records at once.
+
+    The body is a list of records (or `{"records": [...]}`). Every record is
+    validated without database queries, the existing keys are read with a
+    single query, and the valid records are written with
+    `bulk_create(update_conflicts=True)` in a transaction (one statement per
+    set of columns sent). Invalid records are skipped and reported; the
+    response has one result per input row:
+
+        {"index": 0, "status": "created" | "updated" | "error", "id": 12, "errors": {...}}
+
+    Configuration:
+    - bulk_unique_fields: natural key used to detect conflicts. With no key
+      every record is inserted, so retrying a request creates duplicates.
+    - bulk_update_fields: columns that may be overwritten when the key
+      already exists. Only the ones present in each record are written:
+      omitted columns keep their stored value instead of the model default.
+      `is_active` is the exception: it is always written (True unless the
+      record sends it), so upserting a soft-deleted key restores the row.
+    """
+
+    bulk_unique_fields = None
+    bulk_update_fields = ()
+    bulk_max_records = 1000
+
+    def _bulk_key(self, data):
+        return tuple(data[field] for field in self.bulk_unique_fields)
+
+    def _update_fields(self, data):
+        """Columns of bulk_update_fields sent in this record (plus is_active and updated_by)."""
+        fields = [
+            field for field in self.bulk_update_fields
+            if field in data or field == 'is_active'
+        ]
+        if 'updated_by' not in fields:
+            fields.append('updated_by')
+        return tuple(fields)
+
+    def _existing_keys(self, keys):
+        """Keys already stored (active or not), in a single query."""
+        if not self.bulk_unique_fields or not keys:
+            return set()
+        model = self.get_serializer_class().Meta.model
+        lookups = {
+            f'{field}__in': {key[i] for key in keys}
+            for i, field in enumerate(self.bulk_unique_fields)
+        }
+        # Each column filtered by its values: a superset, narrowed below
+        rows = model.objects.filter(**lookups).values_list(*self.bulk_unique_fields)
+        return set(rows) & set(keys)
+
+    @extend_schema(
+        request=serializers.ListSerializer(child=serializers.DictField()),
+        responses={
+            200: OpenApiResponse(description='All records written'),
+            207: OpenApiResponse(description='Some records were rejected (see results)'),
+            400: OpenApiResponse(description='Invalid body or no valid records'),
+            429: OpenApiResponse(description='Rate or concurrency limit reached'),
+        },
+        description='Create or update many records in one request. Returns one result per input row.',
+    )
+    @action(detail=False, methods=['post'], url_path='bulk', throttle_classes=[BulkThrottle])
+    @concurrency_limited('bulk')
+    def bulk(self, request):
+        records = request.data.get('records') if isinstance(request.data, dict) else request.data
+        if not isinstance(records, list) or not records:
+            return Response(
+                {'detail': 'Body must be a non-empty list of records'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(records) > self.bulk_max_records:
+            return Response(
+                {'detail': f'At most {self.bulk_max_records} records per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 1. Validate every record (no queries: uniqueness is handled by the upsert)
+        results = [{'index': i} for i in range(len(records))]
+        valid = []  # (index, validated_data)
+        seen = {}
+        for i, record in enumerate(records):
+            serializer = self.get_serializer(
+                data=record, context={**self.get_serializer_context(), 'bulk': True}
+            )
+            if not serializer.is_valid():
+                results[i].update(status='error', errors=serializer.errors)
+                continue
+            data = serializer.validated_data
+            if self.bulk_unique_fields:
+                key = self._bulk_key(data)
+                if key in seen:
+                    results[i].update(
+                        status='error',
+                        errors={'non_field_errors': [f'Duplicate of record {seen[key]} in this request.']}
+                    )
+                    continue
+                seen[key] = i
+            valid.append((i, data))
+
+        # 2. Write the valid records
+        if valid:
+            model = self.get_serializer_class().Meta.model
+            existing = self._existing_keys(list(seen))
+            user_id = request.user.id
+            objs = [
+                model(**data, created_by=user_id, updated_by=user_id)
+                for _, data in valid
+            ]
+
+            with transaction.atomic():
+                if self.bulk_unique_fields:
+                    # One statement per set of sent columns
+                    groups = {}
+                    for (_, data), obj in zip(valid, objs):
+                        groups.setdefault(self._update_fields(data), []).append(obj)
+                    for update_fields, group in groups.items():
+                        model.objects.bulk_create(
+                            group,
+                            update_conflicts=True,
+                            unique_fields=list(self.bulk_unique_fields),
+                            update_fields=list(update_fields),
+                        )
+                else:
+                    model.objects.bulk_create(objs)
+
+            for (i, data), obj in zip(valid, objs):
+                created = not self.bulk_unique_fields or self._bulk_key(data) not in existing
+                results[i].update(status='created' if created else 'updated', id=obj.pk)
+
+        summary = {
+            key: sum(1 for result in results if result['status'] == key)
+            for key in ('created', 'updated', 'error')
+        }
+        if not summary['error']:
+            response_status = status.HTTP_200_OK
+        elif valid:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response({**summary, 'results': results}, status=response_status)
+
+
+def _relation_plan(serializer, model, querysets, prefix=''):
+    """
+    Relations read by `serializer` on `model`: (select_related lookups,
+    Prefetch objects). Follows dotted `source=` paths and nested serializers.
+    """
+    select = set()
+    prefetch = []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            nested = field.child
+        elif isinstance(field, serializers.BaseSerializer):
+            nested = field
+        else:
+            nested = None
+
+        attrs = field.source.split('.')
+        reads_related = (
+            nested is not None
+            or isinstance(field, ManyRelatedField)
+            or (isinstance(field, RelatedField) and not field.use_pk_only_optimization())
+        )
+        if not reads_related:
+            # The last attribute is a plain value (or a pk read from the FK column)
+            attrs = attrs[:-1]
+
+        current = model
+        path = []
+        for i, attr in enumerate(attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation:
+                break
+            path.append(attr)
+            lookup = '__'.join(path)
+
+            if model_field.one_to_many or model_field.many_to_many:
+                # Multi-valued: one extra query, with its own plan
+                child_qs = querysets.get(prefix + lookup, model_field.related_model._default_manager.all())
+                if nested is not None and i == len(attrs) - 1:
+                    child_qs = optimize_queryset(child_qs, nested, querysets, prefix + lookup + '__')
+                prefetch.append(Prefetch(lookup, queryset=child_qs))
+                path = []
+                break
+            current = model_field.related_model
+        else:
+            if path and nested is not None:
+                # Nested serializer on a single-valued relation: its relations join too
+                nested_select, nested_prefetch = _relation_plan(
+                    nested, current, querysets, prefix + '__'.join(path) + '__'
+                )
+                select.update(f"{'__'.join(path)}__{lookup}" for lookup in nested_select)
+                prefetch.extend(
+                    Prefetch(f"{'__'.join(path)}__{p.prefetch_through}", queryset=p.queryset)
+                    for p in nested_prefetch
+                )
+
+        if path:
+            select.add('__'.join(path))
+
+    return select, prefetch
+
+
+def optimize_queryset(queryset, serializer, querysets=None, prefix=''):
+    """
+    Adds the select_related / prefetch_related that `serializer` needs, so
+    serializing any number of rows runs a fixed number of queries.
+    `querysets` maps a relation lookup to the queryset used to prefetch it.
+    """
+    select, prefetch = _relation_plan(serializer, queryset.model, querysets or {}, prefix)
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class RelationPlanMixin:
+    """
+    Loads the relations the viewset's serializer reads (nested serializers
+    and `source='relation.field'` fields) with select_related and
+    prefetch_related, derived from the serializer declaration.
+
+    `prefetch_querysets` overrides the queryset used for a prefetched
+    relation, e.g. `{'items': FeedMixItem.objects.filter(is_active=True)}`.
+    """
+
+    prefetch_querysets = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return optimize_queryset(queryset, self.get_serializer(), self.prefetch_querysets)
+
+
+# Fields whose value from the database is already what the serializer outputs
+_PASSTHROUGH_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField,
+    serializers.IntegerField, serializers.ReadOnlyField,
+)
+
+
+def _decimal_converter(field):
+    coerce = getattr(field, 'coerce_to_string', None)
+    if coerce is None:
+        coerce = api_settings.COERCE_DECIMAL_TO_STRING
+    if not coerce or field.localize or field.decimal_places is None:
+        return field.to_representation
+    exponent = Decimal(1).scaleb(-field.decimal_places)
+    rounding = field.rounding
+    return lambda value: format(value.quantize(exponent, rounding=rounding), 'f')
+
+
+def _date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format in (ISO_8601, '%Y-%m-%d'):
+        return lambda value: value.isoformat()
+    return field.to_representation
+
+
+def _converter(field):
+    """Function that turns a database value into the serializer output (None: as is)."""
+    if isinstance(field, _PASSTHROUGH_FIELDS):
+        return None
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, serializers.DateField):
+        return _date_converter(field)
+    if isinstance(field, serializers.FloatField):
+        return float
+    # Datetimes (time zone and format) and anything else: the field itself
+    return field.to_representation
+
+
+def build_fast_plan(serializer):
+    """
+    [(output name, values() lookup, converter)] for a serializer whose
+    fields all map to columns of the model or of single-valued relations.
+    Returns None if some field needs the model instance (nested serializers,
+    method fields, properties).
+    """
+    model = serializer.Meta.model
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if (
+            isinstance(field, (serializers.BaseSerializer, ManyRelatedField, serializers.SerializerMethodField))
+            or field.source == '*'
+        ):
+            return None
+
+        attrs = field.source.split('.')
+        current = model
+        try:
+            if isinstance(field, RelatedField):
+                if not isinstance(field, PrimaryKeyRelatedField) or len(attrs) != 1:
+                    return None
+                # Primary key of the relation: the FK column itself
+                plan.append((name, model._meta.get_field(attrs[0]).attname, None))
+                continue
+            for attr in attrs[:-1]:
+                relation = current._meta.get_field(attr)
+                if not (relation.many_to_one or relation.one_to_one):
+                    return None
+                current = relation.related_model
+            if current._meta.get_field(attrs[-1]).is_relation:
+                return None
+        except FieldDoesNotExist:
+            return None
+        plan.append((name, '__'.join(attrs), _converter(field)))
+    return plan
+
+
+def _values_for_plan(queryset, plan):
+    lookups = [lookup for _, lookup, _ in plan]
+    # The sort columns are needed for the page cursors
+    lookups += [name for name, _ in get_ordering(queryset) if name not in lookups]
+    return queryset.values(*lookups)
+
+
+def _convert_row(plan, row):
+    data = {}
+    for name, lookup, convert in plan:
+        value = row[lookup]
+        data[name] = value if convert is None or value is None else convert(value)
+    return data
+
+
+class FastListMixin:
+    """
+    Read-only fast path for `list`: reads `.values()` of the serializer
+    fields and converts each column with a precompiled function instead of
+    running the serializer field by field. The output is the same as the
+    serializer's. Serializers with nested or computed fields use the normal
+    path.
+    """
+
+    _fast_plans = {}
+
+    def get_fast_plan(self):
+        serializer_class = self.get_serializer_class()
+        if serializer_class not in self._fast_plans:
+            self._fast_plans[serializer_class] = build_fast_plan(self.get_serializer())
+        return self._fast_plans[serializer_class]
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_fast_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = _values_for_plan(self.filter_queryset(self.get_queryset()), plan)
+        page = self.paginate_queryset(rows)
+        data = [_convert_row(plan, row) for row in (page if page is not None else rows)]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class ConditionalListMixin:
+    """
+    ETag for `list`: the validator is MAX(updated_at) and COUNT(*) of the
+    filtered queryset (plus every row of the models in
+    `conditional_dependencies`, whose fields the serializer shows). When the
+    client already has that version the response is a 304 and the list is
+    neither queried nor serialized.
+    """
+
+    conditional_dependencies = ()
+
+    def get_list_validator(self, request):
+        querysets = [self.filter_queryset(self.get_queryset())]
+        querysets += [model._default_manager.all() for model in self.conditional_dependencies]
+        return build_validator(querysets, request.get_full_path(), request.accepted_media_type)
+
+    def list(self, request, *args, **kwargs):
+        validator = self.get_list_validator(request)
+        response = not_modified(request, validator)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return set_validator_headers(response, validator)
+
+
+class ChangeFeedMixin:
+    """
+    Adds `GET <list-url>/changes/`: every row (including soft-deleted ones,
+    with is_active=false) modified after the client's high-water mark, in
+    (updated_at, id) order.
+
+    First sync: `?since=<ISO datetime>` (or nothing for everything). Then
+    keep calling with `?cursor=<next_cursor>` while `has_more` is true, and
+    store `next_cursor` for the next sync. Rows still being written by open
+    transactions are held back until they commit (see core.change_feed), so
+    no change is skipped.
+    """
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('cursor', str, description='next_cursor of the previous response'),
+            OpenApiParameter('since', OpenApiTypes.DATETIME, description='First sync: changes after this moment'),
+            OpenApiParameter('limit', int, description=f'Rows per response (max {change_feed.MAX_LIMIT})'),
+        ],
+        responses={
+            200: OpenApiResponse(description='{"results": [...], "next_cursor": "...", "has_more": false, "high_water": "..."}'),
+            400: OpenApiResponse(description='Invalid cursor, since or limit'),
+        },
+        description='Rows changed since the last sync, including deactivated ones.',
+    )
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        params = request.query_params
+        try:
+            limit = min(int(params.get('limit', change_feed.DEFAULT_LIMIT)), change_feed.MAX_LIMIT)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({'detail': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        since = None
+        if params.get('since'):
+            since = parse_datetime(params['since'])
+            if since is None:
+                return Response(
+                    {'detail': 'since must be an ISO 8601 datetime'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        model = self.get_serializer_class().Meta.model
+        queryset = model._default_manager.order_by('updated_at', 'pk')
+        plan = self.get_fast_plan() if isinstance(self, FastListMixin) else None
+        if plan is not None:
+            queryset = _values_for_plan(queryset, plan)
+        else:
+            queryset = optimize_queryset(
+                queryset, self.get_serializer(), getattr(self, 'prefetch_querysets', {})
+            )
+
+        try:
+            rows, next_cursor, has_more, high_water = change_feed.changes_page(
+                queryset, cursor=params.get('cursor'), since=since, limit=limit
+            )
+        except InvalidCursor:
+            return Response({'detail': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if plan is not None:
+            data = [_convert_row(plan, row) for row in rows]
+        else:
+            data = self.get_serializer(rows, many=True).data
+
+        return Response({
+            'results': data,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'high_water': high_water.isoformat(),
+        })
@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination for the API.
+
+Uses the same cursors as the HTML list views (core.pagination): each page
+is read with `WHERE (sort columns) > cursor LIMIT n`, so deep pages cost the
+same as the first one. The sort order comes from the queryset (including
+the OrderingFilter `?ordering=` param) plus the primary key as tie-breaker.
+
+The total count is only computed when requested with `?count=true`, and is
+cached for KEYSET_COUNT_TIMEOUT seconds.
+"""
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.pagination import (
+    AFTER_PARAM, BEFORE_PARAM, LAST_PARAM, InvalidCursor, paginate_queryset,
+)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the queryset ordering.
+    Query params: `after`, `before`, `last`, `page_size` and `count`.
+    """
+
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = paginate_queryset(
+                queryset, request.query_params, self.get_page_size(request)
+            )
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        return list(self.page)
+
+    def _link(self, param, cursor):
+        url = self.request.build_absolute_uri()
+        for key in (AFTER_PARAM, BEFORE_PARAM, LAST_PARAM):
+            url = remove_query_param(url, key)
+        return replace_query_param(url, param, cursor)
+
+    def get_next_link(self):
+        if not self.page.has_next:
+            return None
+        return self._link(AFTER_PARAM, self.page.next_cursor)
+
+    def get_previous_link(self):
+        if not self.page.has_previous:
+            return None
+        return self._link(BEFORE_PARAM, self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        body = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            body['count'] = self.page.count
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer', 'description': 'Only with ?count=true'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': AFTER_PARAM, 'required': False, 'in': 'query',
+             'description': 'Cursor of the next page', 'schema': {'type': 'string'}},
+            {'name': BEFORE_PARAM, 'required': False, 'in': 'query',
+             'description': 'Cursor of the previous page', 'schema': {'type': 'string'}},
+            {'name': LAST_PARAM, 'required': False, 'in': 'query',
+             'description': 'Return the last page', 'schema': {'type': 'boolean'}},
+            {'name': self.page_size_query_param, 'required': False, 'in': 'query',
+             'description': f'Results per page (max {self.max_page_size})', 'schema': {'type': 'integer'}},
+            {'name': self.count_query_param, 'required': False, 'in': 'query',
+             'description': 'Include the (cached) total count', 'schema': {'type': 'boolean'}},
+        ]
@@ -5,10 +5,15 @@ Roles:
 - admin: Full CRUD access to everything
 - worker: CRUD on production data, read-only on finance
 - accountant: CRUD on finance data, read-only on everything else
+
+The role is resolved once per request (core.roles) and shared by every
+permission class checked on it. The API ignores "view as role".
 """
 
 from rest_framework import permissions
 
+from core.roles import get_role_permissions
+
 
 class IsAdmin(permissions.BasePermission):
     """
@@ -16,12 +21,7 @@ class IsAdmin(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            hasattr(request.user, 'rol') and
-            request.user.rol == 'admin'
-        )
+        return get_role_permissions(request, view_as=False).real_role == 'admin'
 
 
 class IsWorker(permissions.BasePermission):
@@ -30,12 +30,7 @@ class IsWorker(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            hasattr(request.user, 'rol') and
-            request.user.rol == 'worker'
-        )
+        return get_role_permissions(request, view_as=False).real_role == 'worker'
 
 
 class IsAccountant(permissions.BasePermission):
@@ -44,12 +39,7 @@ class IsAccountant(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            hasattr(request.user, 'rol') and
-            request.user.rol == 'accountant'
-        )
+        return get_role_permissions(request, view_as=False).real_role == 'accountant'
 
 
 class ProductionPermission(permissions.BasePermission):
@@ -61,14 +51,10 @@ class ProductionPermission(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        if not hasattr(request.user, 'rol'):
+        user_role = get_role_permissions(request, view_as=False).real_role
+        if user_role is None:
             return False
         
-        user_role = request.user.rol
-        
         # Admin has full access
         if user_role == 'admin':
             return True
@@ -93,14 +79,10 @@ class FinancePermission(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
+        user_role = get_role_permissions(request, view_as=False).real_role
+        if user_role is None:
             return False
         
-        if not hasattr(request.user, 'rol'):
-            return False
-        
-        user_role = request.user.rol
-        
         # Admin has full access
         if user_role == 'admin':
             return True
@@ -125,14 +107,10 @@ class ReportPermission(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
+        user_role = get_role_permissions(request, view_as=False).real_role
+        if user_role is None:
             return False
         
-        if not hasattr(request.user, 'rol'):
-            return False
-        
-        user_role = request.user.rol
-        
         # Admin has full access
         if user_role == 'admin':
             return True
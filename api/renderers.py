@@ -0,0 +1,33 @@
+"""
+JSON renderer backed by orjson when it is installed.
+
+Produces the same compact UTF-8 output as DRF's JSONRenderer, several
+times faster on large lists. Without orjson (or when the client asks for
+indented output) it falls back to DRF's renderer.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer using orjson for compact output."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Types orjson does not handle natively (Decimal, lazy strings, datetimes
+        # outside serializers...) are encoded like DRF does
+        return orjson.dumps(
+            data,
+            default=JSONEncoder().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME,
+        )
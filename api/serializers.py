@@ -3,6 +3,7 @@ Serializers for all models in the Avícola Eugenio API.
 """
 
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from core.models import (
     User, FarmStatus, EggProduction, MortalityEvent,
     FeedItem, FeedMix, FeedMixItem, FeedConsumption,
@@ -12,6 +13,28 @@ from core.models import (
 from django.utils import timezone
 
 
+class BulkUpsertSerializerMixin:
+    """
+    Skips the per-row uniqueness queries when the serializer validates a
+    record for a bulk upsert (context `bulk=True`): conflicting keys become
+    updates, resolved by the database in a single statement.
+    """
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('bulk'):
+            for field in fields.values():
+                field.validators = [
+                    v for v in field.validators if not isinstance(v, UniqueValidator)
+                ]
+        return fields
+    
+    def get_validators(self):
+        if self.context.get('bulk'):
+            return []
+        return super().get_validators()
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for User model."""
     
@@ -24,7 +47,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'last_login']
 
 
-class FarmStatusSerializer(serializers.ModelSerializer):
+class FarmStatusSerializer(BulkUpsertSerializerMixin, serializers.ModelSerializer):
     """Serializer for FarmStatus model."""
     
     total_birds = serializers.IntegerField(read_only=True, required=False)
@@ -45,7 +68,7 @@ class FarmStatusSerializer(serializers.ModelSerializer):
     
     def validate_status_date(self, value):
         """Ensure status_date is unique."""
-        if self.instance is None:  # Creating new record
+        if self.instance is None and not self.context.get('bulk'):  # Creating new record
             if FarmStatus.objects.filter(status_date=value).exists():
                 raise serializers.ValidationError(
                     f"Farm status for {value} already exists."
@@ -53,7 +76,7 @@ class FarmStatusSerializer(serializers.ModelSerializer):
         return value
 
 
-class EggProductionSerializer(serializers.ModelSerializer):
+class EggProductionSerializer(BulkUpsertSerializerMixin, serializers.ModelSerializer):
     """Serializer for EggProduction model."""
     
     class Meta:
@@ -70,7 +93,7 @@ class EggProductionSerializer(serializers.ModelSerializer):
         production_date = data.get('production_date')
         size_code = data.get('size_code')
         
-        if self.instance is None:  # Creating new record
+        if self.instance is None and not self.context.get('bulk'):  # Creating new record
             if EggProduction.objects.filter(
                 production_date=production_date,
                 size_code=size_code
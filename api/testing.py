@@ -0,0 +1,56 @@
+"""
+Test helpers for the API: query budgets per endpoint.
+
+Usage in a test case:
+
+    with query_budget(4):
+        response = client.get('/api/feed-mixes/')
+
+    assert_constant_queries(client, '/api/feed-mixes/', sizes=(1, 50))
+"""
+
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+def _format_queries(context):
+    return '\n'.join(
+        f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, start=1)
+    )
+
+
+@contextmanager
+def query_budget(max_queries, using=DEFAULT_DB_ALIAS):
+    """Fails if the block runs more than `max_queries` SQL queries."""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > max_queries:
+        raise AssertionError(
+            f'{len(context)} queries executed, budget is {max_queries}:\n{_format_queries(context)}'
+        )
+
+
+def count_queries(client, url, using=DEFAULT_DB_ALIAS, **params):
+    """Number of queries run by a GET to `url`, and the response."""
+    with CaptureQueriesContext(connections[using]) as context:
+        response = client.get(url, params)
+    return len(context), response
+
+
+def assert_constant_queries(client, url, sizes=(1, 50), using=DEFAULT_DB_ALIAS, **params):
+    """
+    Fails if the number of queries of a list endpoint grows with the page
+    size (an N+1 in the serializer or a missing select/prefetch).
+    Returns the query count.
+    """
+    counts = {}
+    for size in sizes:
+        counts[size], response = count_queries(client, url, using=using, page_size=size, **params)
+        if response.status_code != 200:
+            raise AssertionError(f'GET {url} returned {response.status_code}')
+    if len(set(counts.values())) > 1:
+        detail = ', '.join(f'page_size={size}: {count}' for size, count in counts.items())
+        raise AssertionError(f'Query count of {url} depends on page size ({detail})')
+    return counts[sizes[0]]
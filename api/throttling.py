@@ -0,0 +1,83 @@
+"""
+DRF throttles backed by core.throttling.
+
+Rates come from THROTTLE_RATES and are charged per user (or per IP for
+anonymous requests) in the shared cache, so web views and the API use the
+same buckets and limits.
+
+    class MyViewSet(viewsets.ModelViewSet):
+        throttle_scope = 'analytics'      # BucketThrottle reads it (default 'api')
+
+    @api_view(['GET'])
+    @throttle_classes([AnalyticsThrottle])
+    @concurrency_limited('analytics')
+    def my_view(request):
+        ...
+"""
+
+from functools import wraps
+
+from django.conf import settings
+from rest_framework import exceptions
+from rest_framework.throttling import BaseThrottle
+
+from core import throttling
+
+
+class BucketThrottle(BaseThrottle):
+    """Token bucket of the view's `throttle_scope` (or the class `scope`)."""
+    scope = None
+
+    def __init__(self):
+        self._wait = None
+
+    def get_scope(self, view):
+        return self.scope or getattr(view, 'throttle_scope', None) or 'api'
+
+    def allow_request(self, request, view):
+        if not getattr(settings, 'THROTTLE_ENABLED', True):
+            return True
+        try:
+            throttling.check_rate(request, self.get_scope(view))
+        except throttling.Throttled as exc:
+            self._wait = exc.wait
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class LoginThrottle(BucketThrottle):
+    scope = 'login'
+
+
+class AnalyticsThrottle(BucketThrottle):
+    scope = 'analytics'
+
+
+class BulkThrottle(BucketThrottle):
+    scope = 'bulk'
+
+
+def concurrency_limited(scope):
+    """
+    Limits a DRF view or action to CONCURRENCY_LIMITS[scope] simultaneous
+    requests across workers; extra requests get 429 with Retry-After.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not getattr(settings, 'THROTTLE_ENABLED', True):
+                return func(*args, **kwargs)
+            try:
+                with throttling.concurrency_slot(scope):
+                    return func(*args, **kwargs)
+            except throttling.Throttled as exc:
+                if exc.scope != scope:
+                    raise
+                raise exceptions.Throttled(
+                    wait=exc.retry_after, detail='Too many concurrent requests for this endpoint.'
+                )
+        return wrapper
+    return decorator
@@ -32,6 +32,9 @@ urlpatterns = [
     # Authentication
     path('auth/login/', views.login_view, name='login'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    # Analytics
+    path('analytics/timeseries/', views.timeseries_view, name='analytics-timeseries'),
     
     # Router URLs
     path('', include(router.urls)),
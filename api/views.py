@@ -4,15 +4,17 @@ Todos los endpoints requieren autenticación JWT excepto login.
 """
 
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import transaction
 from django.db.models import Sum, Q
 from django.utils import timezone
 from datetime import datetime
 from decimal import Decimal
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 
 from core.models import (
     User, FarmStatus, EggProduction, MortalityEvent,
@@ -20,7 +22,9 @@ from core.models import (
     FinanceCategory, FinanceTransaction, FinanceSummary,
     ReportExport, VEggProductionDaily
 )
-from core.auth_utils import verify_password
+from core.auth_utils import PasswordVerifyBusy, check_and_upgrade
+from core.inventory_service import ensure_inventory_rows
+from core import analytics_service
 from api.serializers import (
     UserSerializer, FarmStatusSerializer, EggProductionSerializer,
     MortalityEventSerializer, FeedItemSerializer, FeedMixSerializer,
@@ -29,6 +33,11 @@ from api.serializers import (
     FinanceSummarySerializer, ReportExportSerializer,
     VEggProductionDailySerializer, LoginSerializer, TokenResponseSerializer
 )
+from api.mixins import (
+    BulkUpsertMixin, ChangeFeedMixin, ConditionalListMixin, FastListMixin,
+    RelationPlanMixin,
+)
+from api.throttling import AnalyticsThrottle, LoginThrottle, concurrency_limited
 from api.permissions import (
     ProductionPermission, FinancePermission, ReportPermission
 )
@@ -39,12 +48,15 @@ from api.permissions import (
     responses={
         200: TokenResponseSerializer,
         401: OpenApiResponse(description='Invalid credentials'),
+        429: OpenApiResponse(description='Too many login attempts'),
+        503: OpenApiResponse(description='Too many logins in progress, retry later'),
     },
     description='Login endpoint that returns JWT tokens. Provide email and password to receive access and refresh tokens.',
     tags=['Authentication']
 )
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginThrottle])
 def login_view(request):
     """
     Login endpoint that returns JWT tokens.
@@ -63,8 +75,16 @@ def login_view(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
     
-    # Verify password
-    if not verify_password(password, user.password_hash):
+    # Verify password (bounded pool; outdated hashes are upgraded)
+    try:
+        valid = check_and_upgrade(user, password)
+    except PasswordVerifyBusy:
+        return Response(
+            {'detail': 'Too many logins in progress, retry later'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': '1'}
+        )
+    if not valid:
         return Response(
             {'detail': 'Invalid credentials'},
             status=status.HTTP_401_UNAUTHORIZED
@@ -87,10 +107,12 @@ def login_view(request):
     })
 
 
-class FarmStatusViewSet(viewsets.ModelViewSet):
+class FarmStatusViewSet(
+    ChangeFeedMixin, BulkUpsertMixin, ConditionalListMixin, FastListMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for FarmStatus model.
-    Provides CRUD operations for farm status records.
+    Provides CRUD operations for farm status records, plus bulk upsert by status_date.
     """
     queryset = FarmStatus.objects.filter(is_active=True)
     serializer_class = FarmStatusSerializer
@@ -98,6 +120,8 @@ class FarmStatusViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['status_date', 'created_at']
     ordering = ['-status_date']
+    bulk_unique_fields = ('status_date',)
+    bulk_update_fields = ('juveniles_count', 'males_count', 'hens_count', 'is_active', 'updated_by')
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -120,10 +144,13 @@ class FarmStatusViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user.id)
 
 
-class EggProductionViewSet(viewsets.ModelViewSet):
+class EggProductionViewSet(
+    ChangeFeedMixin, BulkUpsertMixin, ConditionalListMixin, FastListMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for EggProduction model.
-    Provides CRUD operations for egg production records.
+    Provides CRUD operations for egg production records, plus bulk upsert
+    by (production_date, size_code).
     """
     queryset = EggProduction.objects.filter(is_active=True)
     serializer_class = EggProductionSerializer
@@ -131,6 +158,11 @@ class EggProductionViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['production_date', 'size_code', 'created_at']
     ordering = ['-production_date', 'size_code']
+    bulk_unique_fields = ('production_date', 'size_code')
+    bulk_update_fields = (
+        'quantity', 'source_method', 'is_validated', 'validated_at',
+        'validated_by', 'is_active', 'updated_by',
+    )
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -155,7 +187,7 @@ class EggProductionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def daily(self, request):
         """
-        Get daily egg production summary from view.
+        Get daily egg production summary from the egg_production_daily rollup.
         """
         queryset = VEggProductionDaily.objects.all()
         
@@ -183,10 +215,15 @@ class EggProductionViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user.id)
 
 
-class MortalityEventViewSet(viewsets.ModelViewSet):
+class MortalityEventViewSet(
+    ChangeFeedMixin, BulkUpsertMixin, ConditionalListMixin, FastListMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for MortalityEvent model.
-    Provides CRUD operations for mortality event records.
+    Provides CRUD operations for mortality event records, plus bulk create
+    (events have no natural key, so every record is inserted). Bulk is not
+    idempotent: a client retrying after a timeout must first check which
+    events were stored (e.g. through /changes/), or it will duplicate them.
     """
     queryset = MortalityEvent.objects.filter(is_active=True)
     serializer_class = MortalityEventSerializer
@@ -219,7 +256,7 @@ class MortalityEventViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user.id)
 
 
-class FeedItemViewSet(viewsets.ModelViewSet):
+class FeedItemViewSet(ChangeFeedMixin, ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet for FeedItem model.
     Provides CRUD operations for feed item records.
@@ -233,23 +270,30 @@ class FeedItemViewSet(viewsets.ModelViewSet):
     ordering = ['item_name']
     
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user.id)
+        with transaction.atomic():
+            item = serializer.save(created_by=self.request.user.id)
+            ensure_inventory_rows([item], self.request.user.id)
     
     def perform_update(self, serializer):
         serializer.save(updated_by=self.request.user.id)
 
 
-class FeedMixViewSet(viewsets.ModelViewSet):
+class FeedMixViewSet(
+    ChangeFeedMixin, RelationPlanMixin, ConditionalListMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for FeedMix model.
     Provides CRUD operations for feed mix records.
     """
     queryset = FeedMix.objects.filter(is_active=True)
     serializer_class = FeedMixSerializer
+    conditional_dependencies = (FeedMixItem, FeedItem)
     permission_classes = [ProductionPermission]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['mix_date', 'created_at']
     ordering = ['-mix_date']
+    # Nested items: only the active ones
+    prefetch_querysets = {'items': FeedMixItem.objects.filter(is_active=True)}
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -273,7 +317,9 @@ class FeedMixViewSet(viewsets.ModelViewSet):
         feed_mix = self.get_object()
         
         if request.method == 'GET':
-            items = FeedMixItem.objects.filter(feed_mix=feed_mix, is_active=True)
+            items = FeedMixItem.objects.filter(
+                feed_mix=feed_mix, is_active=True
+            ).select_related('feed_item')
             serializer = FeedMixItemSerializer(items, many=True)
             return Response(serializer.data)
         
@@ -308,13 +354,16 @@ class FeedMixViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user.id)
 
 
-class FeedMixItemViewSet(viewsets.ModelViewSet):
+class FeedMixItemViewSet(
+    ChangeFeedMixin, RelationPlanMixin, ConditionalListMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for FeedMixItem model.
     Provides CRUD operations for feed mix item records.
     """
     queryset = FeedMixItem.objects.filter(is_active=True)
     serializer_class = FeedMixItemSerializer
+    conditional_dependencies = (FeedItem,)
     permission_classes = [ProductionPermission]
     
     def perform_create(self, serializer):
@@ -324,13 +373,16 @@ class FeedMixItemViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user.id)
 
 
-class FeedConsumptionViewSet(viewsets.ModelViewSet):
+class FeedConsumptionViewSet(
+    ChangeFeedMixin, RelationPlanMixin, ConditionalListMixin, FastListMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for FeedConsumption model.
     Provides CRUD operations for feed consumption records.
     """
     queryset = FeedConsumption.objects.filter(is_active=True)
     serializer_class = FeedConsumptionSerializer
+    conditional_dependencies = (FeedMix,)
     permission_classes = [ProductionPermission]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['consumption_date', 'created_at']
@@ -357,7 +409,7 @@ class FeedConsumptionViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user.id)
 
 
-class FinanceCategoryViewSet(viewsets.ModelViewSet):
+class FinanceCategoryViewSet(ChangeFeedMixin, ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet for FinanceCategory model.
     Provides CRUD operations for finance category records.
@@ -387,13 +439,16 @@ class FinanceCategoryViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user.id)
 
 
-class FinanceTransactionViewSet(viewsets.ModelViewSet):
+class FinanceTransactionViewSet(
+    ChangeFeedMixin, RelationPlanMixin, ConditionalListMixin, FastListMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for FinanceTransaction model.
     Provides CRUD operations for finance transaction records.
     """
     queryset = FinanceTransaction.objects.filter(is_active=True)
     serializer_class = FinanceTransactionSerializer
+    conditional_dependencies = (FinanceCategory,)
     permission_classes = [FinancePermission]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['transaction_date', 'amount_clp', 'created_at']
@@ -426,7 +481,7 @@ class FinanceTransactionViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user.id)
 
 
-class FinanceSummaryViewSet(viewsets.ModelViewSet):
+class FinanceSummaryViewSet(ChangeFeedMixin, ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet for FinanceSummary model.
     Provides CRUD operations for finance summary records.
@@ -498,7 +553,7 @@ class FinanceSummaryViewSet(viewsets.ModelViewSet):
         )
 
 
-class ReportExportViewSet(viewsets.ModelViewSet):
+class ReportExportViewSet(ChangeFeedMixin, ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet for ReportExport model.
     Provides CRUD operations for report export records.
@@ -536,3 +591,73 @@ class ReportExportViewSet(viewsets.ModelViewSet):
         instance.deleted_by = self.request.user.id
         instance.is_active = False
         instance.save(update_fields=['deleted_at', 'deleted_by', 'is_active'])
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter('metric', str, required=True, enum=list(analytics_service.METRICS)),
+        OpenApiParameter('from', OpenApiTypes.DATE, required=True),
+        OpenApiParameter('to', OpenApiTypes.DATE, required=True),
+        OpenApiParameter('bucket', str, enum=list(analytics_service.BUCKETS), default='day'),
+    ],
+    responses={
+        200: OpenApiResponse(description='Columnar series: {"t": [...], "series": {name: [...]}}'),
+        400: OpenApiResponse(description='Invalid parameters'),
+        429: OpenApiResponse(description='Rate or concurrency limit reached'),
+    },
+    description=(
+        'Time series for one metric, aggregated per day, week or month in the database. '
+        'Buckets without data are included (0 for totals, null for ratios).'
+    ),
+    tags=['Analytics']
+)
+@api_view(['GET'])
+@permission_classes([ReportPermission])
+@throttle_classes([AnalyticsThrottle])
+@concurrency_limited('analytics')
+def timeseries_view(request):
+    """
+    Resampled time series for production, mortality, feed and finance.
+    """
+    params = request.query_params
+    metric = params.get('metric')
+    bucket = params.get('bucket', 'day')
+
+    if metric not in analytics_service.METRICS:
+        return Response(
+            {'detail': f'metric must be one of: {", ".join(analytics_service.METRICS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if bucket not in analytics_service.BUCKETS:
+        return Response(
+            {'detail': f'bucket must be one of: {", ".join(analytics_service.BUCKETS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        start = datetime.strptime(params.get('from', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(params.get('to', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return Response(
+            {'detail': 'from and to are required (format: YYYY-MM-DD)'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if start > end:
+        return Response(
+            {'detail': 'from must be before to'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if analytics_service.count_buckets(start, end, bucket) > analytics_service.MAX_BUCKETS:
+        return Response(
+            {'detail': f'Too many buckets (max {analytics_service.MAX_BUCKETS}). Use a larger bucket or a shorter range.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    data = analytics_service.timeseries(metric, start, end, bucket)
+    return Response({
+        'metric': metric,
+        'bucket': bucket,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        **data,
+    })
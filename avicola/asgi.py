@@ -3,6 +3,12 @@ ASGI config for avicola project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Producción con gunicorn y workers de uvicorn:
+    gunicorn avicola.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+Las subidas de visión, las descargas de reportes y los health checks son
+vistas async; el resto sigue siendo sync y Django las ejecuta en un hilo.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
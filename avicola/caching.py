@@ -0,0 +1,26 @@
+"""
+Helpers de caché - Lecturas de la caché por defecto con métricas de aciertos.
+"""
+
+from django.core.cache import cache
+
+from avicola.metrics import record_cache
+
+
+_MISSING = object()
+
+
+def get_or_compute(cache_name, key, compute, timeout):
+    """
+    Devuelve el valor guardado en `key` o lo calcula con `compute()` y lo
+    guarda `timeout` segundos. `cache_name` es la etiqueta de la métrica
+    avicola_cache_requests_total.
+    """
+    value = cache.get(key, _MISSING)
+    hit = value is not _MISSING
+    record_cache(cache_name, hit)
+
+    if not hit:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,202 @@
+"""
+Health checks - Readiness con sondas a las dependencias.
+
+`/health/` (en avicola/urls.py) sigue siendo un liveness estático.
+`/health/ready/` ejecuta las sondas en paralelo, cada una con tiempo
+máximo, y guarda el resultado unos segundos para que el polling del
+balanceador casi no cueste nada.
+
+Las vistas son async: la espera de las sondas corre en un hilo aparte
+(thread_sensitive=False) y no en el hilo compartido del código sync, así
+que el balanceador recibe respuesta aunque las vistas sync estén ocupadas.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+
+from avicola.metrics import record_health_refresh
+
+logger = logging.getLogger('api')
+
+
+# ============================================================================
+# SONDAS
+# ============================================================================
+
+def probe_database():
+    """Latencia de conexión y de un SELECT 1, más el estado del pool si existe."""
+    try:
+        start = time.perf_counter()
+        connection.ensure_connection()
+        connect_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        query_ms = (time.perf_counter() - start) * 1000
+
+        result = {
+            'status': 'ok',
+            'connect_ms': round(connect_ms, 2),
+            'query_ms': round(query_ms, 2),
+            'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+        }
+
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            result['pool'] = pool.get_stats()
+
+        return result
+    finally:
+        # La sonda corre en un hilo propio: no dejar conexiones colgando
+        connection.close()
+
+
+def probe_vision_model():
+    """Indica si el modelo de visión ya está cargado en este proceso (sin cargarlo)."""
+    from core.vision_service import get_loaded_service
+
+    service = get_loaded_service()
+    if service is None:
+        return {'status': 'ok', 'loaded': False, 'method': None}
+    return {
+        'status': 'ok',
+        'loaded': service.use_yolo,
+        'method': 'yolo' if service.use_yolo else 'hough',
+    }
+
+
+def probe_media_storage():
+    """Espacio libre en MEDIA_ROOT."""
+    path = str(settings.MEDIA_ROOT)
+    # MEDIA_ROOT puede no existir aún: medir el primer directorio existente
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+
+    usage = shutil.disk_usage(path)
+    free_mb = usage.free // (1024 * 1024)
+    min_free_mb = getattr(settings, 'HEALTH_MIN_FREE_MB', 500)
+
+    return {
+        'status': 'ok' if free_mb >= min_free_mb else 'fail',
+        'free_mb': free_mb,
+        'total_mb': usage.total // (1024 * 1024),
+    }
+
+
+def probe_report_queue():
+    """Profundidad de la cola de reportes."""
+    # Los reportes se generan dentro de la petición: no hay cola que medir
+    return {'status': 'skipped', 'depth': None, 'detail': 'sin worker de reportes'}
+
+
+def probe_cache():
+    """Escribe y lee una clave en la caché por defecto."""
+    key = f'health:probe:{os.getpid()}'
+    start = time.perf_counter()
+    cache.set(key, 'ok', 10)
+    value = cache.get(key)
+    return {
+        'status': 'ok' if value == 'ok' else 'fail',
+        'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+        'backend': settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1],
+    }
+
+
+# Sondas críticas: si fallan, la instancia no está lista (HTTP 503)
+PROBES = {
+    'database': (probe_database, True),
+    'vision_model': (probe_vision_model, False),
+    'media_storage': (probe_media_storage, True),
+    'report_queue': (probe_report_queue, False),
+    'cache': (probe_cache, False),
+}
+
+
+# ============================================================================
+# EJECUCIÓN CON TIEMPO MÁXIMO Y CACHÉ
+# ============================================================================
+
+_executor = ThreadPoolExecutor(max_workers=len(PROBES), thread_name_prefix='health')
+_refresh_lock = threading.Lock()
+_last_result = {'checked_at': 0.0, 'body': None, 'status_code': 200}
+
+
+def _run_probes():
+    timeout = getattr(settings, 'HEALTH_PROBE_TIMEOUT', 2.0)
+    futures = {name: _executor.submit(func) for name, (func, _) in PROBES.items()}
+    wait(futures.values(), timeout=timeout)
+
+    checks = {}
+    ready = True
+    degraded = False
+
+    for name, future in futures.items():
+        critical = PROBES[name][1]
+        if not future.done():
+            future.cancel()
+            checks[name] = {'status': 'timeout', 'timeout_s': timeout}
+        elif future.exception() is not None:
+            # El detalle (host, usuario de la BD...) solo va al log: el endpoint es público
+            exc = future.exception()
+            logger.error('Sonda %s falló', name, exc_info=(type(exc), exc, exc.__traceback__))
+            checks[name] = {'status': 'fail', 'error': type(exc).__name__}
+        else:
+            checks[name] = future.result()
+
+        if checks[name]['status'] in ('fail', 'timeout'):
+            if critical:
+                ready = False
+            else:
+                degraded = True
+
+    body = {
+        'status': 'ok' if ready and not degraded else ('degraded' if ready else 'fail'),
+        'checks': checks,
+    }
+    return body, 200 if ready else 503
+
+
+def _is_stale():
+    max_age = getattr(settings, 'HEALTH_CACHE_SECONDS', 5)
+    return (
+        _last_result['body'] is None
+        or time.monotonic() - _last_result['checked_at'] >= max_age
+    )
+
+
+def _readiness():
+    """Último resultado de las sondas (refrescándolo si venció) y su antigüedad."""
+    # Solo un hilo refresca; los demás devuelven el último resultado
+    # (salvo la primera vez, cuando aún no hay resultado y esperan)
+    if _is_stale() and _refresh_lock.acquire(blocking=_last_result['body'] is None):
+        try:
+            if _is_stale():
+                body, status_code = _run_probes()
+                _last_result.update(
+                    checked_at=time.monotonic(), body=body, status_code=status_code
+                )
+                record_health_refresh(body['status'])
+        finally:
+            _refresh_lock.release()
+
+    body = dict(_last_result['body'])
+    body['age_s'] = round(time.monotonic() - _last_result['checked_at'], 2)
+    return body, _last_result['status_code']
+
+
+async def readiness_check(request):
+    """Readiness endpoint - estado de BD, visión, disco, cola de reportes y caché."""
+    body, status_code = await sync_to_async(_readiness, thread_sensitive=False)()
+    return JsonResponse(body, status=status_code)
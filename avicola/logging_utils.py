@@ -0,0 +1,127 @@
+"""
+Utilidades de logging - Logs en formato JSON escritos en segundo plano.
+
+Las peticiones solo ponen el registro en una cola en memoria; un hilo
+(QueueListener) es el único que escribe en disco y rota los archivos.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+
+
+# Atributos estándar de LogRecord (todo lo demás viene de `extra=`)
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON, incluyendo los campos de `extra`."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+
+        # Campos estructurados (method, path, status, user_id, duraciones...)
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Traceback ya formateado por QueueLogHandler.prepare
+            payload['exc_info'] = record.exc_text
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+    """
+    Handler no bloqueante: encola el registro y un QueueListener lo escribe
+    en consola (texto) y en archivo (JSON) con rotación.
+
+    rotation:
+    - 'size': RotatingFileHandler (max_bytes / backup_count)
+    - 'time': TimedRotatingFileHandler (when / backup_count)
+    - 'none': WatchedFileHandler, para rotar con logrotate externo
+
+    Si la cola se llena los registros se descartan en vez de bloquear
+    la petición.
+    """
+
+    def __init__(self, filename, rotation='size', max_bytes=10 * 1024 * 1024,
+                 backup_count=10, when='midnight', console=True, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.dropped = 0
+
+        if rotation == 'time':
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                filename, when=when, backupCount=backup_count, encoding='utf-8', delay=True
+            )
+        elif rotation == 'none':
+            file_handler = logging.handlers.WatchedFileHandler(filename, encoding='utf-8', delay=True)
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True
+            )
+        file_handler.setFormatter(JsonFormatter())
+
+        self.targets = [file_handler]
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(
+                '{levelname} {asctime} {module} {message}', style='{'
+            ))
+            self.targets.append(console_handler)
+
+        self.listener = None
+        self._pid = None
+        self._start_listener()
+        atexit.register(self._stop_listener)
+
+    def _start_listener(self):
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *self.targets, respect_handler_level=True
+        )
+        self.listener.start()
+        self._pid = os.getpid()
+
+    def _stop_listener(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record):
+        """
+        Copia del registro lista para la cola. A diferencia de
+        QueueHandler.prepare, no mezcla el traceback en `msg`: queda en
+        `exc_text` (texto, sin frames) para que JsonFormatter lo guarde en su
+        propio campo y el formatter de consola lo siga mostrando.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # Tras un fork (gunicorn --preload) el hilo del listener no existe
+        if self._pid != os.getpid() or self.listener is None:
+            self._start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
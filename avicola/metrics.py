@@ -0,0 +1,200 @@
+"""
+Métricas estilo Prometheus - Expone /metrics en formato de texto.
+
+Con varios workers de gunicorn definir PROMETHEUS_MULTIPROC_DIR (un
+directorio compartido que se vacía al arrancar): cada proceso escribe sus
+contadores en archivos mapeados en memoria y /metrics los suma.
+"""
+
+import os
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess,
+)
+
+
+# ============================================================================
+# DEFINICIÓN DE MÉTRICAS
+# ============================================================================
+
+REQUEST_COUNT = Counter(
+    'avicola_http_requests_total',
+    'Peticiones HTTP por vista',
+    ['view', 'method', 'status'],
+)
+
+REQUEST_LATENCY = Histogram(
+    'avicola_http_request_duration_seconds',
+    'Latencia de las peticiones HTTP por vista',
+    ['view', 'method'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+DB_QUERIES = Histogram(
+    'avicola_db_queries_per_request',
+    'Consultas SQL por petición',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+VISION_INFERENCE = Histogram(
+    'avicola_vision_inference_seconds',
+    'Duración del conteo de huevos por método (yolo / hough)',
+    ['method'],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+VISION_ERRORS = Counter(
+    'avicola_vision_errors_total',
+    'Conteos de visión que terminaron con error',
+    ['method'],
+)
+
+REPORT_DURATION = Histogram(
+    'avicola_report_generation_seconds',
+    'Tiempo de generación de reportes',
+    ['report'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+CACHE_REQUESTS = Counter(
+    'avicola_cache_requests_total',
+    'Lecturas de caché por resultado (hit / miss)',
+    ['cache', 'result'],
+)
+
+PASSWORD_VERIFY = Histogram(
+    'avicola_password_verify_seconds',
+    'Duración de la verificación de contraseñas por esquema (argon2 / bcrypt)',
+    ['scheme'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+PASSWORD_VERIFY_REJECTED = Counter(
+    'avicola_password_verify_rejected_total',
+    'Logins rechazados por el pool de verificación (queue_full / timeout)',
+    ['reason'],
+)
+
+HEALTH_REFRESHES = Counter(
+    'avicola_health_refreshes_total',
+    'Ejecuciones de las sondas de readiness por resultado (ok / degraded / fail)',
+    ['status'],
+)
+
+THROTTLED = Counter(
+    'avicola_throttled_requests_total',
+    'Peticiones rechazadas por límite de tasa o de concurrencia',
+    ['scope', 'reason'],
+)
+
+
+# ============================================================================
+# HELPERS DE INSTRUMENTACIÓN
+# ============================================================================
+
+def observe_request(view, method, status, duration, query_count):
+    """Registra una petición HTTP completa (lo usa MetricsMiddleware)."""
+    REQUEST_COUNT.labels(view, method, status).inc()
+    REQUEST_LATENCY.labels(view, method).observe(duration)
+    DB_QUERIES.labels(view).observe(query_count)
+
+
+def observe_vision(method, duration, error=False):
+    """Registra un conteo de huevos con visión."""
+    VISION_INFERENCE.labels(method).observe(duration)
+    if error:
+        VISION_ERRORS.labels(method).inc()
+
+
+def record_cache(cache_name, hit):
+    """Registra una lectura de caché para calcular la tasa de aciertos."""
+    CACHE_REQUESTS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+
+def record_health_refresh(status):
+    """
+    Registra una ejecución de las sondas de /health/ready/. Las respuestas
+    servidas desde el último resultado no se cuentan: el sondeo del balanceador
+    no debe mezclarse con la tasa de aciertos de CACHE_REQUESTS.
+    """
+    HEALTH_REFRESHES.labels(status).inc()
+
+
+def observe_password_verify(scheme, duration):
+    """Registra una verificación de contraseña."""
+    PASSWORD_VERIFY.labels(scheme).observe(duration)
+
+
+def record_password_rejected(reason):
+    """Registra un login rechazado porque el pool de verificación está saturado."""
+    PASSWORD_VERIFY_REJECTED.labels(reason).inc()
+
+
+def record_throttled(scope, reason):
+    """Registra una petición rechazada por core.throttling (rate / concurrency)."""
+    THROTTLED.labels(scope, reason).inc()
+
+
+def timed_report(report_name):
+    """
+    Decorador que mide cuánto tarda una vista en generar un reporte.
+
+    Ejemplo de uso:
+        @timed_report('financial_pdf')
+        def export_financial_pdf(request):
+            ...
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await view_func(request, *args, **kwargs)
+                finally:
+                    REPORT_DURATION.labels(report_name).observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return view_func(request, *args, **kwargs)
+            finally:
+                REPORT_DURATION.labels(report_name).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# ============================================================================
+# ENDPOINT /metrics
+# ============================================================================
+
+def _metrics_allowed(request):
+    """Con METRICS_TOKEN exige 'Authorization: Bearer <token>'; si no, filtra por IP."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        return request.headers.get('Authorization') == f'Bearer {token}'
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', [])
+
+
+def metrics_view(request):
+    """Métricas en formato de texto de Prometheus."""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # Sumar los archivos de todos los workers
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -1,67 +1,411 @@
 """
 Middleware personalizado - Procesa todas las peticiones antes de llegar a las vistas.
+
+Todos sirven para WSGI y ASGI (sync_capable / async_capable): con ASGI la
+cadena queda async y las vistas async no se ejecutan en un hilo.
 """
 
+import contextvars
 import logging
+import random
 import time
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.functional import LazyObject, empty
+
+from core.roles import get_role_permissions
 
 logger = logging.getLogger('api')
 
 
 class RequestLoggingMiddleware:
     """
-    Registra todas las peticiones en el log.
-    Útil para debugging y monitoreo del sistema.
+    Registra todas las peticiones en el log como campos estructurados
+    (method, path, status, user_id, duration_ms y, si la petición fue
+    perfilada, los tiempos de BD y templates).
+    
+    Debe ir primero en MIDDLEWARE para medir la petición completa.
+    Las rutas de REQUEST_LOG_SAMPLE_RATES (ej. '/health/') solo se
+    registran en la fracción indicada.
     """
     
+    sync_capable = True
+    async_capable = True
+    
     def __init__(self, get_response):
         self.get_response = get_response
+        self.sample_rates = getattr(settings, 'REQUEST_LOG_SAMPLE_RATES', {})
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def _should_log(self, request):
+        for prefix, rate in self.sample_rates.items():
+            if request.path.startswith(prefix):
+                return random.random() < rate
+        return True
     
     def __call__(self, request):
-        # Guardar tiempo de inicio
-        start_time = time.time()
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         
-        # Obtener usuario (si está logueado)
-        user = 'Anónimo'
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            user = getattr(request.user, 'email', str(request.user))
+        # Guardar tiempo de inicio
+        start_time = time.perf_counter()
         
         # Procesar la petición
         response = self.get_response(request)
         
-        # Calcular cuánto tardó
-        duration = time.time() - start_time
+        self._log(request, response, start_time)
+        return response
+    
+    async def __acall__(self, request):
+        start_time = time.perf_counter()
+        response = await self.get_response(request)
+        self._log(request, response, start_time)
+        return response
+    
+    def _log(self, request, response, start_time):
+        if not self._should_log(request):
+            return
         
-        # Guardar en el log
-        logger.info(
-            f"{request.method} {request.path} - "
-            f"Status: {response.status_code} - "
-            f"Usuario: {user} - "
-            f"Duración: {duration:.2f}s"
-        )
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'user_id': _loaded_user_id(request),
+            'duration_ms': round((time.perf_counter() - start_time) * 1000, 2),
+        }
         
-        return response
+        # Datos de QueryProfilingMiddleware (solo peticiones muestreadas)
+        profile = getattr(request, 'profile', None)
+        if profile:
+            fields.update(profile)
+        
+        log = logger.warning if profile and profile['n_plus_one'] else logger.info
+        log('%s %s %s', request.method, request.path, response.status_code, extra=fields)
+
+
+def _loaded_user_id(request):
+    """
+    Id del usuario solo si la vista ya lo cargó.
+    Así el log nunca provoca una lectura de sesión ni de usuario.
+    """
+    user = getattr(request, 'user', None)
+    if user is None:
+        return None
+    if isinstance(user, LazyObject) and user._wrapped is empty:
+        return None
+    return user.id if user.is_authenticated else None
 
 
 class ViewAsRoleMiddleware:
     """
     Permite que el admin vea el sistema como si fuera otro rol.
-    Agrega el atributo 'effective_role' a cada petición.
+    Agrega 'role_permissions' (rol efectivo y permisos) a cada petición.
+
+    El objeto es perezoso: no carga la sesión ni el usuario hasta que una
+    vista, un decorador o un template consulta un permiso.
     """
     
+    sync_capable = True
+    async_capable = True
+    
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
     
     def __call__(self, request):
-        # Solo si el usuario está logueado
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            # Si es admin y está usando "ver como otro rol"
-            if request.user.rol == 'admin' and 'view_as_role' in request.session:
-                # Usar el rol temporal
-                request.effective_role = request.session['view_as_role']
-            else:
-                # Usar el rol real
-                request.effective_role = request.user.rol
+        # Crear el objeto no lee nada (es perezoso), sirve igual en async
+        get_role_permissions(request)
         
         response = self.get_response(request)
         return response
+
+
+# ============================================================================
+# PERFILADO DE PETICIONES (consultas SQL, tiempo de BD y de templates)
+# ============================================================================
+
+# Perfil de la petición en curso; lo usa el temporizador de templates
+_current_profile = contextvars.ContextVar('avicola_request_profile', default=None)
+
+# Quienes registran las consultas de la petición en curso (perfil, métricas)
+_query_observers = contextvars.ContextVar('avicola_query_observers', default=())
+
+
+def _dispatch_query(execute, sql, params, many, context):
+    """
+    execute_wrapper permanente de cada conexión: avisa a los observadores
+    de la petición en curso. Sin petición observada solo llama a execute.
+    """
+    observers = _query_observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+    
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for observer in observers:
+            observer.record(sql, duration)
+
+
+def _add_query_dispatch(sender, connection, **kwargs):
+    if _dispatch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch_query)
+
+
+def _install_query_dispatch():
+    """
+    Instala _dispatch_query en cada conexión al crearla.
+    
+    Las conexiones de Django son por hilo: con ASGI las consultas corren en
+    los hilos de sync_to_async, no en el del event loop, así que envolver
+    connections.all() en el middleware no las ve. El wrapper queda fijo en
+    cada conexión y lee los observadores de un ContextVar, que
+    sync_to_async sí copia al hilo donde se ejecuta la vista.
+    """
+    connection_created.connect(_add_query_dispatch, dispatch_uid='avicola_query_dispatch')
+    # Conexiones ya abiertas en este hilo (ej. las de los checks al arrancar)
+    for conn in connections.all(initialized_only=True):
+        _add_query_dispatch(None, conn)
+
+
+@contextmanager
+def _observe_queries(observer):
+    token = _query_observers.set(_query_observers.get() + (observer,))
+    try:
+        yield observer
+    finally:
+        _query_observers.reset(token)
+
+
+class RequestProfile:
+    """Acumula las consultas SQL y el tiempo de render de una petición."""
+    
+    def __init__(self):
+        self.queries = []  # [(sql, segundos)]
+        self.template_time = 0.0
+    
+    def record(self, sql, duration):
+        self.queries.append((sql, duration))
+    
+    def summary(self, total_time, duplicate_threshold, slow_limit):
+        """Resumen listo para log y para el header Server-Timing."""
+        db_time = sum(duration for _, duration in self.queries)
+        
+        # Misma SQL repetida (con distintos parámetros) = posible N+1
+        repeated = Counter(sql for sql, _ in self.queries)
+        duplicates = [
+            {'sql': sql[:200], 'count': count}
+            for sql, count in repeated.most_common()
+            if count >= duplicate_threshold
+        ]
+        
+        slowest = sorted(self.queries, key=lambda q: q[1], reverse=True)[:slow_limit]
+        
+        return {
+            'sql_count': len(self.queries),
+            'sql_duplicates': sum(count - 1 for count in repeated.values()),
+            'n_plus_one': duplicates,
+            'db_ms': round(db_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'total_ms': round(total_time * 1000, 2),
+            'slow_queries': [
+                {'sql': sql[:200], 'ms': round(duration * 1000, 2)}
+                for sql, duration in slowest
+            ],
+        }
+
+
+def _install_template_timer():
+    """
+    Envuelve el render de templates de Django para medir su duración.
+    Solo suma tiempo cuando hay una petición perfilada en curso.
+    """
+    from django.template.backends.django import Template
+    
+    if getattr(Template.render, '_avicola_timed', False):
+        return
+    
+    original_render = Template.render
+    
+    def render(self, context=None, request=None):
+        profile = _current_profile.get()
+        if profile is None:
+            return original_render(self, context, request)
+        
+        start = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            profile.template_time += time.perf_counter() - start
+    
+    render._avicola_timed = True
+    Template.render = render
+
+
+class QueryProfilingMiddleware:
+    """
+    Perfila una muestra de las peticiones:
+    - Cantidad de consultas SQL y consultas repetidas (patrones N+1)
+    - Tiempo total en base de datos
+    - Tiempo de render de templates
+    - Consultas más lentas
+    
+    Los datos quedan en request.profile (RequestLoggingMiddleware los
+    registra como campos estructurados) y se devuelven en el header
+    Server-Timing.
+    
+    Configuración (settings):
+    - PROFILING_ENABLED: activa el middleware
+    - PROFILING_SAMPLE_RATE: fracción de peticiones perfiladas (0.0 - 1.0)
+    - PROFILING_DUPLICATE_THRESHOLD: repeticiones para marcar N+1
+    - PROFILING_SLOW_QUERIES: cuántas consultas lentas reportar
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            # Desactivado: Django lo quita de la cadena, costo cero
+            raise MiddlewareNotUsed()
+        
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, 'PROFILING_SAMPLE_RATE', 1.0))
+        self.duplicate_threshold = int(getattr(settings, 'PROFILING_DUPLICATE_THRESHOLD', 3))
+        self.slow_limit = int(getattr(settings, 'PROFILING_SLOW_QUERIES', 5))
+        _install_template_timer()
+        _install_query_dispatch()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
+        # Muestreo: la mayoría de las peticiones pasan sin perfilar
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start_time = time.perf_counter()
+        
+        try:
+            with _observe_queries(profile):
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        
+        return self._finish(request, response, profile, start_time)
+    
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start_time = time.perf_counter()
+        
+        try:
+            with _observe_queries(profile):
+                response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        
+        return self._finish(request, response, profile, start_time)
+    
+    def _finish(self, request, response, profile, start_time):
+        summary = profile.summary(
+            time.perf_counter() - start_time,
+            self.duplicate_threshold,
+            self.slow_limit,
+        )
+        request.profile = summary
+        
+        response['Server-Timing'] = (
+            f'db;dur={summary["db_ms"]};desc="{summary["sql_count"]} queries", '
+            f'tpl;dur={summary["template_ms"]}, '
+            f'total;dur={summary["total_ms"]}'
+        )
+        
+        return response
+
+
+# ============================================================================
+# MÉTRICAS (endpoint /metrics)
+# ============================================================================
+
+class _QueryCounter:
+    """Observador de consultas que solo las cuenta (costo mínimo)."""
+    
+    def __init__(self):
+        self.count = 0
+    
+    def record(self, sql, duration):
+        self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Registra cantidad, latencia y consultas SQL de cada petición,
+    agrupadas por nombre de URL (ver avicola.metrics).
+    Se desactiva con METRICS_ENABLED=False.
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed()
+        
+        from avicola import metrics
+        self.metrics = metrics
+        self.get_response = get_response
+        _install_query_dispatch()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
+        counter = _QueryCounter()
+        start_time = time.perf_counter()
+        
+        with _observe_queries(counter):
+            response = self.get_response(request)
+        
+        self._observe(request, response, counter, start_time)
+        return response
+    
+    async def __acall__(self, request):
+        counter = _QueryCounter()
+        start_time = time.perf_counter()
+        
+        with _observe_queries(counter):
+            response = await self.get_response(request)
+        
+        self._observe(request, response, counter, start_time)
+        return response
+    
+    def _observe(self, request, response, counter, start_time):
+        # Nombre de la URL (no la ruta) para no crear una serie por cada id
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        
+        self.metrics.observe_request(
+            view,
+            request.method,
+            response.status_code,
+            time.perf_counter() - start_time,
+            counter.count,
+        )
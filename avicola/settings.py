@@ -32,6 +32,10 @@ CSRF_TRUSTED_ORIGINS = [
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
+# Verificaciones de contraseña en el pool acotado (core/auth_utils.py),
+# incluida la de relleno para emails inexistentes
+AUTHENTICATION_BACKENDS = ['core.auth_utils.BoundedModelBackend']
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -52,7 +56,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'avicola.middleware.RequestLoggingMiddleware',  # Primero: mide la petición completa
+    'avicola.middleware.MetricsMiddleware',  # Solo activo si METRICS_ENABLED
     'django.middleware.security.SecurityMiddleware',
+    'avicola.middleware.QueryProfilingMiddleware',  # Solo activo si PROFILING_ENABLED
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,7 +67,6 @@ MIDDLEWARE = [
     'avicola.middleware.ViewAsRoleMiddleware',  # Debe ir después de AuthenticationMiddleware
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'avicola.middleware.RequestLoggingMiddleware',
 ]
 
 ROOT_URLCONF = 'avicola.urls'
@@ -85,7 +91,12 @@ TEMPLATES = [
 WSGI_APPLICATION = 'avicola.wsgi.application'
 
 # Database
-# https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+# https://docs.djangoproject.com/en/5.1/ref/databases/#connection-pool
+# Con DB_POOL_ENABLED cada proceso mantiene un pool de psycopg 3 y las
+# peticiones toman una conexión ya abierta (CONN_MAX_AGE debe ser 0).
+# Sin pool, DB_CONN_MAX_AGE mantiene la conexión persistente por hilo.
+DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'True') == 'True'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -94,9 +105,60 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL_ENABLED else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        # Verifica la conexión antes de reutilizarla (con pool: check del pool)
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {},
     }
 }
 
+if DB_POOL_ENABLED:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '600')),
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+    }
+
+# Cache
+# Con REDIS_URL la caché se comparte entre workers; sin ella cada proceso
+# usa su propia caché en memoria.
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'avicola',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'avicola',
+        }
+    }
+
+# Sesiones - ver core.session_utils
+# - cached_db: lee de la caché y solo va a la BD si no está (por defecto)
+# - cache: solo caché (requiere REDIS_URL; con varios workers la caché en memoria no sirve)
+# - signed_cookies: la sesión viaja firmada en la cookie, sin BD ni caché
+#   (no se puede invalidar desde el servidor; máximo ~4 KB)
+# - db: una consulta a django_session por petición
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cached_db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_BACKEND]
+SESSION_COOKIE_AGE = int(os.getenv('SESSION_COOKIE_AGE', str(60 * 60 * 24 * 14)))
+# Tamaño máximo de un valor guardado con set_session_value
+SESSION_VALUE_MAX_BYTES = int(os.getenv('SESSION_VALUE_MAX_BYTES', '2048'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -114,6 +176,18 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hash de contraseñas (Argon2id) - ver core.auth_utils
+# Los hashes con parámetros distintos se re-encriptan en el siguiente login
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', '3'))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', '65536'))  # KiB
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', '4'))
+
+# Pool de verificación de contraseñas por proceso: hilos, logins en espera
+# y segundos máximos de espera antes de responder 503
+PASSWORD_VERIFY_WORKERS = int(os.getenv('PASSWORD_VERIFY_WORKERS', '2'))
+PASSWORD_VERIFY_MAX_QUEUE = int(os.getenv('PASSWORD_VERIFY_MAX_QUEUE', '8'))
+PASSWORD_VERIFY_TIMEOUT = float(os.getenv('PASSWORD_VERIFY_TIMEOUT', '5'))
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 LANGUAGE_CODE = 'es-cl'
@@ -149,7 +223,14 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 #     'DEFAULT_PERMISSION_CLASSES': (
 #         'rest_framework.permissions.IsAuthenticated',
 #     ),
-#     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+#     'DEFAULT_RENDERER_CLASSES': (
+#         'api.renderers.FastJSONRenderer',
+#         'rest_framework.renderers.BrowsableAPIRenderer',
+#     ),
+#     'DEFAULT_THROTTLE_CLASSES': (
+#         'api.throttling.BucketThrottle',
+#     ),
+#     'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
 #     'PAGE_SIZE': 50,
 #     'DEFAULT_FILTER_BACKENDS': (
 #         'rest_framework.filters.SearchFilter',
@@ -179,6 +260,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # }
 
 # Logging Configuration
+# Los loggers 'django' y 'api' escriben a través de una cola: un hilo en
+# segundo plano escribe líneas JSON en logs/django.log y las rota.
+# LOG_ROTATION: 'size' | 'time' | 'none' (usar 'none' + logrotate si hay
+# varios workers escribiendo el mismo archivo).
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -197,10 +282,14 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
-        'file': {
-            'class': 'logging.FileHandler',
+        'queue': {
+            'class': 'avicola.logging_utils.QueueLogHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'rotation': os.getenv('LOG_ROTATION', 'size'),
+            'max_bytes': int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+            'backup_count': int(os.getenv('LOG_BACKUP_COUNT', '10')),
+            'when': os.getenv('LOG_ROTATION_WHEN', 'midnight'),
+            'queue_size': int(os.getenv('LOG_QUEUE_SIZE', '10000')),
         },
     },
     'root': {
@@ -209,18 +298,82 @@ LOGGING = {
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'api': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
             'propagate': False,
         },
     },
 }
 
+# Fracción de peticiones registradas por prefijo de ruta (el resto: todas)
+REQUEST_LOG_SAMPLE_RATES = {
+    '/health/': float(os.getenv('LOG_HEALTH_SAMPLE_RATE', '0.01')),
+}
+
+# Perfilado de peticiones (consultas SQL, tiempo de BD y templates)
+# Ver avicola.middleware.QueryProfilingMiddleware
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0.05'))
+PROFILING_DUPLICATE_THRESHOLD = int(os.getenv('PROFILING_DUPLICATE_THRESHOLD', '3'))
+PROFILING_SLOW_QUERIES = int(os.getenv('PROFILING_SLOW_QUERIES', '5'))
+
+# Métricas Prometheus (/metrics) - ver avicola.metrics
+# Con varios workers definir PROMETHEUS_MULTIPROC_DIR en el entorno
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+
+# Readiness (/health/ready/) - ver avicola.health
+HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', '2.0'))
+HEALTH_CACHE_SECONDS = float(os.getenv('HEALTH_CACHE_SECONDS', '5'))
+HEALTH_MIN_FREE_MB = int(os.getenv('HEALTH_MIN_FREE_MB', '500'))
+
+# Pronóstico de stock de alimentos - ver core.forecast_service
+FEED_FORECAST_WINDOW_DAYS = int(os.getenv('FEED_FORECAST_WINDOW_DAYS', '14'))
+FEED_REORDER_LEAD_DAYS = int(os.getenv('FEED_REORDER_LEAD_DAYS', '7'))
+FEED_SAFETY_STOCK_DAYS = int(os.getenv('FEED_SAFETY_STOCK_DAYS', '3'))
+
+# Paginación por cursor - ver core.pagination
+# Segundos que se reutiliza el total de registros de un listado
+KEYSET_COUNT_TIMEOUT = int(os.getenv('KEYSET_COUNT_TIMEOUT', '60'))
+
+# Feed de cambios de la API - ver core.change_feed
+# Margen para diferencias de reloj entre la aplicación y PostgreSQL
+CHANGE_FEED_LAG_SECONDS = float(os.getenv('CHANGE_FEED_LAG_SECONDS', '2'))
+
+# Limitación de peticiones - ver core.throttling y api.throttling
+# Tasas 'cantidad/periodo' (s, min, hour, day) por usuario o IP, y máximo
+# de peticiones simultáneas por scope. Con REDIS_URL valen para todos los
+# workers; sin ella, por proceso.
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True') == 'True'
+THROTTLE_RATES = {
+    'login': os.getenv('THROTTLE_RATE_LOGIN', '10/min'),
+    'vision': os.getenv('THROTTLE_RATE_VISION', '30/hour'),
+    'report': os.getenv('THROTTLE_RATE_REPORT', '30/hour'),
+    'analytics': os.getenv('THROTTLE_RATE_ANALYTICS', '120/min'),
+    'bulk': os.getenv('THROTTLE_RATE_BULK', '60/hour'),
+    'api': os.getenv('THROTTLE_RATE_API', '2000/hour'),
+}
+CONCURRENCY_LIMITS = {
+    'vision': int(os.getenv('CONCURRENCY_LIMIT_VISION', '2')),
+    'report': int(os.getenv('CONCURRENCY_LIMIT_REPORT', '2')),
+    'analytics': int(os.getenv('CONCURRENCY_LIMIT_ANALYTICS', '4')),
+    'bulk': int(os.getenv('CONCURRENCY_LIMIT_BULK', '2')),
+}
+# Vencimiento de un cupo si el worker muere sin liberarlo
+CONCURRENCY_LEASE_SECONDS = int(os.getenv('CONCURRENCY_LEASE_SECONDS', '120'))
+# Proxies delante de Django (nginx = 1) para leer la IP de X-Forwarded-For
+THROTTLE_NUM_PROXIES = int(os.getenv('THROTTLE_NUM_PROXIES', '0'))
+
+# Vistas async (ASGI) - ver core.async_utils
+# Hilos por proceso para generar reportes y contar huevos sin bloquear el event loop
+CPU_EXECUTOR_WORKERS = int(os.getenv('CPU_EXECUTOR_WORKERS', '2'))
+
 # Create logs directory if it doesn't exist
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
@@ -14,10 +14,16 @@ from django.conf.urls.static import static
 #     SpectacularSwaggerView,
 # )
 from core import views as core_views
+from avicola.metrics import metrics_view
+from avicola.health import readiness_check
 
 
-def health_check(request):
-    """Health check endpoint - verifica que el servidor esté funcionando."""
+async def health_check(request):
+    """
+    Liveness - verifica que el servidor esté funcionando.
+    No toca dependencias; para eso está /health/ready/.
+    Es async: con ASGI responde aunque todos los hilos estén ocupados.
+    """
     return JsonResponse({
         'status': 'ok',
         'message': 'Avícola Eugenio está funcionando correctamente'
@@ -30,6 +36,10 @@ urlpatterns = [
     
     # Health check
     path('health/', health_check, name='health_check'),
+    path('health/ready/', readiness_check, name='readiness_check'),
+    
+    # Métricas Prometheus
+    path('metrics', metrics_view, name='metrics'),
     
     # Vistas principales
     path('', core_views.dashboard_view, name='dashboard'),
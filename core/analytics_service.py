@@ -0,0 +1,364 @@
+"""
+Servicio de Analítica - Costo de alimento por huevo (tabla feed_cost_daily)
+y series de tiempo agregadas por día, semana o mes.
+
+Cada día guarda huevos producidos, alimento consumido, costo por kg de la
+mezcla usada, costo de alimento, costo por docena y porcentaje de postura.
+Cada ingrediente se valoriza al precio de ese día: el unit_cost_clp de la
+última compra (feed_inventory_movement) hasta esa fecha, o el precio del
+catálogo (FeedItem.unit_cost_clp) si no hay compras anteriores.
+
+La tabla se actualiza de forma incremental: solo se recalculan los días
+cuyos datos de origen tienen updated_at posterior al último cálculo.
+"""
+import datetime
+
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from core.models import FeedCostDaily
+
+
+# Margen al leer la marca de agua: cubre transacciones que confirmaron
+# después de empezar el cálculo anterior
+WATERMARK_OVERLAP = datetime.timedelta(minutes=5)
+
+# Días recalculados por consulta
+REFRESH_BATCH_DAYS = 366
+
+
+def get_watermark():
+    """Momento del último cálculo (menos el margen), o None si la tabla está vacía."""
+    last = FeedCostDaily.objects.order_by('-computed_at').values_list('computed_at', flat=True).first()
+    return last - WATERMARK_OVERLAP if last else None
+
+
+def dirty_days(since):
+    """
+    Días cuyo cálculo quedó desactualizado porque cambió algún dato de
+    origen después de `since`:
+    - producción de huevos o consumo de ese día
+    - los items de la mezcla consumida ese día
+    - una mezcla nueva, para los días sin mezcla asignada posteriores a ella
+    - un estado de granja, para los días hasta el siguiente estado
+    - el precio de catálogo de un item, para los días calculados con una
+      mezcla que lo usa
+    - una compra de un item, para los días calculados desde su fecha con
+      una mezcla que lo usa
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT production_date FROM egg_production WHERE updated_at > %(since)s
+            UNION
+            SELECT consumption_date FROM feed_consumption WHERE updated_at > %(since)s
+            UNION
+            SELECT fc.consumption_date
+              FROM feed_consumption fc
+              JOIN feed_mix_item fmi ON fmi.feed_mix_id = fc.feed_mix_id
+             WHERE fmi.updated_at > %(since)s
+            UNION
+            SELECT fc.consumption_date
+              FROM feed_consumption fc
+              JOIN feed_mix fm ON fm.mix_date <= fc.consumption_date
+             WHERE fc.feed_mix_id IS NULL AND fm.updated_at > %(since)s
+            UNION
+            SELECT d::date
+              FROM farm_status fs
+             CROSS JOIN LATERAL generate_series(
+                    fs.status_date,
+                    COALESCE(
+                        (SELECT MIN(n.status_date) - 1 FROM farm_status n WHERE n.status_date > fs.status_date),
+                        CURRENT_DATE
+                    ),
+                    INTERVAL '1 day'
+                   ) AS d
+             WHERE fs.updated_at > %(since)s
+            UNION
+            SELECT fcd.day
+              FROM feed_cost_daily fcd
+              JOIN feed_mix_item fmi ON fmi.feed_mix_id = fcd.feed_mix_id
+              JOIN feed_item fi ON fi.id = fmi.feed_item_id
+             WHERE fi.updated_at > %(since)s
+            UNION
+            SELECT fcd.day
+              FROM feed_inventory_movement m
+              JOIN feed_mix_item fmi ON fmi.feed_item_id = m.feed_item_id
+              JOIN feed_cost_daily fcd ON fcd.feed_mix_id = fmi.feed_mix_id AND fcd.day >= m.movement_date
+             WHERE m.movement_type = 'purchase' AND m.updated_at > %(since)s
+            """,
+            {'since': since},
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def all_days():
+    """Todos los días con producción o consumo registrados."""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT production_date FROM egg_production
+            UNION
+            SELECT consumption_date FROM feed_consumption
+        """)
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+_REFRESH_SQL = """
+    WITH days AS (
+        SELECT unnest(%(days)s::date[]) AS day
+    ),
+    eggs AS (
+        SELECT production_date AS day, SUM(quantity) AS eggs
+          FROM egg_production
+         WHERE is_active AND production_date = ANY(%(days)s::date[])
+         GROUP BY production_date
+    ),
+    base AS (
+        SELECT d.day,
+               COALESCE(e.eggs, 0) AS eggs,
+               hens.hens_count,
+               COALESCE(c.total_consumed_kg, 0) AS kg,
+               mix.id AS mix_id
+          FROM days d
+          LEFT JOIN eggs e ON e.day = d.day
+          LEFT JOIN feed_consumption c ON c.consumption_date = d.day AND c.is_active
+          LEFT JOIN LATERAL (
+                SELECT hens_count FROM farm_status
+                 WHERE is_active AND status_date <= d.day
+                 ORDER BY status_date DESC LIMIT 1
+          ) hens ON TRUE
+          -- Sin mezcla asignada: la última mezcla preparada hasta ese día
+          LEFT JOIN LATERAL (
+                SELECT COALESCE(c.feed_mix_id, (
+                    SELECT fm.id FROM feed_mix fm
+                     WHERE fm.is_active AND fm.mix_date <= d.day
+                     ORDER BY fm.mix_date DESC, fm.id DESC LIMIT 1
+                )) AS id
+          ) mix ON TRUE
+    ),
+    -- Precio de cada ingrediente ese día: última compra hasta la fecha, o el catálogo
+    mix_cost AS (
+        SELECT b.day,
+               SUM(COALESCE(fmi.weight_kg, fmi.proportion_pct) * COALESCE(price.unit_cost_clp, fi.unit_cost_clp))
+                 / NULLIF(SUM(COALESCE(fmi.weight_kg, fmi.proportion_pct)), 0) AS cost_per_kg
+          FROM base b
+          JOIN feed_mix_item fmi ON fmi.feed_mix_id = b.mix_id AND fmi.is_active
+          JOIN feed_item fi ON fi.id = fmi.feed_item_id
+          LEFT JOIN LATERAL (
+                SELECT m.unit_cost_clp FROM feed_inventory_movement m
+                 WHERE m.feed_item_id = fmi.feed_item_id
+                   AND m.is_active
+                   AND m.movement_type = 'purchase'
+                   AND m.unit_cost_clp IS NOT NULL
+                   AND m.movement_date <= b.day
+                 ORDER BY m.movement_date DESC, m.id DESC LIMIT 1
+          ) price ON TRUE
+         GROUP BY b.day
+    )
+    INSERT INTO feed_cost_daily AS t (
+        day, eggs_produced, hens_count, feed_consumed_kg, feed_mix_id,
+        mix_cost_per_kg, feed_cost_clp, feed_cost_per_dozen, laying_pct, computed_at
+    )
+    SELECT b.day, b.eggs, b.hens_count, b.kg, b.mix_id,
+           ROUND(mc.cost_per_kg, 2),
+           ROUND(b.kg * mc.cost_per_kg, 2),
+           ROUND(b.kg * mc.cost_per_kg / NULLIF(b.eggs / 12.0, 0), 2),
+           ROUND(b.eggs * 100.0 / NULLIF(b.hens_count, 0), 2),
+           NOW()
+      FROM base b
+      LEFT JOIN mix_cost mc ON mc.day = b.day
+    ON CONFLICT (day) DO UPDATE SET
+        eggs_produced = EXCLUDED.eggs_produced,
+        hens_count = EXCLUDED.hens_count,
+        feed_consumed_kg = EXCLUDED.feed_consumed_kg,
+        feed_mix_id = EXCLUDED.feed_mix_id,
+        mix_cost_per_kg = EXCLUDED.mix_cost_per_kg,
+        feed_cost_clp = EXCLUDED.feed_cost_clp,
+        feed_cost_per_dozen = EXCLUDED.feed_cost_per_dozen,
+        laying_pct = EXCLUDED.laying_pct,
+        computed_at = EXCLUDED.computed_at
+"""
+
+
+def refresh_days(days):
+    """Recalcula los días indicados (en lotes de REFRESH_BATCH_DAYS). Devuelve cuántos."""
+    days = sorted(set(days))
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(0, len(days), REFRESH_BATCH_DAYS):
+            cursor.execute(_REFRESH_SQL, {'days': days[i:i + REFRESH_BATCH_DAYS]})
+    return len(days)
+
+
+def refresh_feed_cost_daily(full=False, since=None):
+    """
+    Actualiza feed_cost_daily. Por defecto solo los días que cambiaron
+    desde el último cálculo; con `full` todos; con `since` (fecha) todos
+    los días desde esa fecha. Devuelve la cantidad de días recalculados.
+    """
+    if full:
+        days = all_days()
+    elif since is not None:
+        days = [day for day in all_days() if day >= since]
+    else:
+        watermark = get_watermark()
+        days = all_days() if watermark is None else dirty_days(watermark)
+    return refresh_days(days)
+
+
+# ============================================================================
+# LECTURA
+# ============================================================================
+
+def feed_cost_range(start, end):
+    """Filas de feed_cost_daily entre `start` y `end` (incluidos), por fecha."""
+    return FeedCostDaily.objects.filter(day__range=(start, end)).order_by('day')
+
+
+def feed_cost_summary(start, end):
+    """
+    Totales del período: huevos, kg consumidos, costo de alimento, costo
+    por docena y kg por docena (conversión alimenticia). Una consulta.
+    """
+    totals = FeedCostDaily.objects.filter(day__range=(start, end)).aggregate(
+        eggs=Sum('eggs_produced'),
+        kg=Sum('feed_consumed_kg'),
+        cost=Sum('feed_cost_clp'),
+    )
+    eggs = totals['eggs'] or 0
+    dozens = eggs / 12
+    return {
+        'eggs': eggs,
+        'feed_kg': totals['kg'] or 0,
+        'feed_cost_clp': totals['cost'] or 0,
+        'feed_cost_per_dozen': float(totals['cost']) / dozens if dozens and totals['cost'] else 0,
+        'kg_per_dozen': float(totals['kg']) / dozens if dozens and totals['kg'] else 0,
+    }
+
+
+# ============================================================================
+# SERIES DE TIEMPO
+# ============================================================================
+
+BUCKETS = ('day', 'week', 'month')
+
+# Máximo de intervalos por respuesta (~3 años diarios)
+MAX_BUCKETS = 1200
+
+# Cada métrica: tabla (con joins), columna de fecha, filtro y series
+# {nombre: expresión agregada}. Son fragmentos SQL fijos, nunca entrada
+# del usuario.
+METRICS = {
+    'eggs': {
+        'source': 'egg_production',
+        'date': 'production_date',
+        'where': 'is_active',
+        'series': {
+            'total': 'SUM(quantity)',
+            'small': "SUM(quantity) FILTER (WHERE size_code = 'small')",
+            'medium': "SUM(quantity) FILTER (WHERE size_code = 'medium')",
+            'large': "SUM(quantity) FILTER (WHERE size_code = 'large')",
+        },
+    },
+    'mortality': {
+        'source': 'mortality_event',
+        'date': 'event_date',
+        'where': 'is_active',
+        'series': {
+            'total': 'SUM(quantity)',
+            'juvenile': "SUM(quantity) FILTER (WHERE bird_type = 'juvenile')",
+            'male': "SUM(quantity) FILTER (WHERE bird_type = 'male')",
+            'hen': "SUM(quantity) FILTER (WHERE bird_type = 'hen')",
+        },
+    },
+    'feed_consumption': {
+        'source': 'feed_consumption',
+        'date': 'consumption_date',
+        'where': 'is_active',
+        'series': {
+            'kg': 'SUM(total_consumed_kg)',
+        },
+    },
+    'finance': {
+        'source': 'finance_transaction ft JOIN finance_category fc ON fc.id = ft.category_id',
+        'date': 'ft.transaction_date',
+        'where': 'ft.is_active',
+        'series': {
+            'income': "SUM(ft.amount_clp) FILTER (WHERE fc.type = 'income')",
+            'expense': "SUM(ft.amount_clp) FILTER (WHERE fc.type = 'expense')",
+            'balance': "SUM(CASE WHEN fc.type = 'income' THEN ft.amount_clp ELSE -ft.amount_clp END)",
+        },
+    },
+    'feed_cost': {
+        'source': 'feed_cost_daily',
+        'date': 'day',
+        'where': 'TRUE',
+        'series': {
+            'feed_cost_clp': 'SUM(feed_cost_clp)',
+            'eggs': 'SUM(eggs_produced)',
+            'cost_per_dozen': 'ROUND(SUM(feed_cost_clp) / NULLIF(SUM(eggs_produced) / 12.0, 0), 2)',
+            'laying_pct': 'ROUND(AVG(laying_pct), 2)',
+        },
+    },
+}
+
+
+def count_buckets(start, end, bucket):
+    """Cantidad de intervalos entre `start` y `end` (para limitar la respuesta)."""
+    if bucket == 'day':
+        return (end - start).days + 1
+    if bucket == 'week':
+        return (end - start).days // 7 + 2
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def timeseries(metric, start, end, bucket='day'):
+    """
+    Serie de tiempo agregada en SQL (date_trunc) y con los intervalos sin
+    datos rellenados (generate_series), en formato columnar:
+        {'t': [fechas], 'series': {nombre: [valores]}}
+    Los intervalos sin datos valen 0 (o None para promedios y razones).
+    """
+    definition = METRICS[metric]
+    names = list(definition['series'])
+    aggregates = ',\n                   '.join(
+        f'{expression} AS "{name}"' for name, expression in definition['series'].items()
+    )
+    # Sumas sin datos -> 0; razones y promedios sin datos -> NULL
+    columns = ', '.join(
+        f'd."{name}"' if 'ROUND' in expression else f'COALESCE(d."{name}", 0)'
+        for name, expression in definition['series'].items()
+    )
+
+    sql = f"""
+        WITH buckets AS (
+            SELECT generate_series(
+                       date_trunc(%(bucket)s, %(start)s::date),
+                       date_trunc(%(bucket)s, %(end)s::date),
+                       ('1 ' || %(bucket)s)::interval
+                   )::date AS bucket
+        ),
+        data AS (
+            SELECT date_trunc(%(bucket)s, {definition['date']})::date AS bucket,
+                   {aggregates}
+              FROM {definition['source']}
+             WHERE {definition['where']}
+               AND {definition['date']} BETWEEN %(start)s AND %(end)s
+             GROUP BY 1
+        )
+        SELECT b.bucket, {columns}
+          FROM buckets b
+          LEFT JOIN data d ON d.bucket = b.bucket
+         ORDER BY b.bucket
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'bucket': bucket, 'start': start, 'end': end})
+        rows = cursor.fetchall()
+
+    return {
+        't': [row[0].isoformat() for row in rows],
+        'series': {
+            name: [None if row[i + 1] is None else float(row[i + 1]) for row in rows]
+            for i, name in enumerate(names)
+        },
+    }
@@ -0,0 +1,45 @@
+"""
+Utilidades para vistas async (servidas con ASGI, ver avicola/asgi.py).
+
+El trabajo de CPU (generar PDF / Excel, conteo con visión) corre en un pool
+de hilos propio (CPU_EXECUTOR_WORKERS) para no bloquear el event loop ni el
+hilo único que Django usa para el código sync (sync_to_async). reportlab,
+openpyxl y OpenCV/YOLO liberan poco o nada el GIL, así que el pool no
+acelera cada tarea: solo evita que una tarea larga frene al resto de las
+peticiones del worker.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Pool de hilos para trabajo de CPU, creado la primera vez (uno por proceso)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'CPU_EXECUTOR_WORKERS', 2),
+                    thread_name_prefix='cpu',
+                )
+    return _executor
+
+
+async def run_in_executor(func, *args, **kwargs):
+    """Ejecuta func(*args, **kwargs) en el pool de CPU y espera el resultado."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def is_async_view(view_func):
+    """True si la vista es `async def` (los decoradores eligen el wrapper según esto)."""
+    return iscoroutinefunction(view_func)
@@ -1,38 +1,82 @@
 """
 Utilidades de autenticación - Manejo seguro de contraseñas.
 Soporta Argon2 (recomendado) y bcrypt (compatibilidad).
+
+La verificación en el login corre en un pool acotado de hilos
+(PASSWORD_VERIFY_WORKERS) con una cola máxima (PASSWORD_VERIFY_MAX_QUEUE):
+una ráfaga de logins no satura la CPU del resto de las peticiones, y cuando
+la cola está llena se rechaza de inmediato con PasswordVerifyBusy (503).
+Argon2 y bcrypt liberan el GIL, así que los hilos verifican en paralelo.
+
+Los hashes bcrypt o con parámetros Argon2 antiguos se re-encriptan con los
+parámetros actuales (ARGON2_*) en el primer login correcto.
+
+BoundedModelBackend (AUTHENTICATION_BACKENDS) reemplaza a ModelBackend: con
+un email inexistente ModelBackend hashea la contraseña en el hilo de la
+petición para igualar tiempos, fuera del pool; aquí esa verificación de
+relleno también pasa por el pool.
 """
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
 import argon2
 import bcrypt
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError, InvalidHash
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from avicola.metrics import observe_password_verify, record_password_rejected
+
+
+# Inicializar hasher de Argon2 con los parámetros de settings
+ph = PasswordHasher(
+    time_cost=getattr(settings, 'ARGON2_TIME_COST', argon2.DEFAULT_TIME_COST),
+    memory_cost=getattr(settings, 'ARGON2_MEMORY_COST', argon2.DEFAULT_MEMORY_COST),
+    parallelism=getattr(settings, 'ARGON2_PARALLELISM', argon2.DEFAULT_PARALLELISM),
+)
 
 
-# Inicializar hasher de Argon2
-ph = PasswordHasher()
+class PasswordVerifyBusy(Exception):
+    """El pool de verificación está lleno o no respondió a tiempo."""
+
+
+def password_scheme(password_hash: str) -> str | None:
+    """'argon2', 'bcrypt' o None si el hash no es reconocido."""
+    if not password_hash:
+        return None
+    if password_hash.startswith('$argon2'):
+        return 'argon2'
+    if password_hash.startswith(('$2a$', '$2b$', '$2y$')):
+        return 'bcrypt'
+    return None
 
 
 def verify_password(password: str, password_hash: str) -> bool:
     """
     Verifica si una contraseña coincide con su hash.
     Soporta Argon2 y bcrypt.
-    
+
     Retorna True si la contraseña es correcta, False si no.
     """
     if not password or not password_hash:
         return False
-    
+
+    scheme = password_scheme(password_hash)
+
     # Intentar con Argon2 primero (más seguro)
-    if password_hash.startswith('$argon2'):
+    if scheme == 'argon2':
         try:
             ph.verify(password_hash, password)
             return True
         except (VerifyMismatchError, InvalidHash):
             return False
-    
+
     # Intentar con bcrypt (compatibilidad)
-    elif password_hash.startswith('$2a$') or password_hash.startswith('$2b$') or password_hash.startswith('$2y$'):
+    elif scheme == 'bcrypt':
         try:
             return bcrypt.checkpw(
                 password.encode('utf-8'),
@@ -40,14 +84,14 @@ def verify_password(password: str, password_hash: str) -> bool:
             )
         except Exception:
             return False
-    
+
     return False
 
 
 def hash_password(password: str, use_argon2: bool = True) -> str:
     """
     Encripta una contraseña usando Argon2 o bcrypt.
-    
+
     Por defecto usa Argon2 (más seguro).
     Retorna la contraseña encriptada.
     """
@@ -61,7 +105,7 @@ def hash_password(password: str, use_argon2: bool = True) -> str:
 def needs_rehash(password_hash: str) -> bool:
     """
     Verifica si una contraseña necesita ser re-encriptada.
-    
+
     Retorna True si necesita actualización, False si no.
     """
     if password_hash.startswith('$argon2'):
@@ -69,6 +113,123 @@ def needs_rehash(password_hash: str) -> bool:
             return ph.check_needs_rehash(password_hash)
         except Exception:
             return True
-    
+
     # Las contraseñas bcrypt deberían migrarse a Argon2
     return True
+
+
+# ============================================================================
+# POOL DE VERIFICACIÓN
+# ============================================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = None
+
+
+def _get_pool():
+    """Pool y semáforo de cupos, creados la primera vez (uno por proceso)."""
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = getattr(settings, 'PASSWORD_VERIFY_WORKERS', 2)
+                max_queue = getattr(settings, 'PASSWORD_VERIFY_MAX_QUEUE', workers * 4)
+                _slots = threading.BoundedSemaphore(workers + max_queue)
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-verify')
+    return _pool, _slots
+
+
+def _run_bounded(func, *args):
+    """
+    Ejecuta `func` en el pool. Si no quedan cupos (workers + cola) o no
+    termina en PASSWORD_VERIFY_TIMEOUT segundos lanza PasswordVerifyBusy.
+    """
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        record_password_rejected('queue_full')
+        raise PasswordVerifyBusy()
+
+    try:
+        future = pool.submit(func, *args)
+    except RuntimeError:
+        slots.release()
+        raise
+    # El cupo se libera cuando termina la tarea, aunque el cliente ya no espere
+    future.add_done_callback(lambda _: slots.release())
+
+    try:
+        return future.result(timeout=getattr(settings, 'PASSWORD_VERIFY_TIMEOUT', 5))
+    except FutureTimeoutError:
+        record_password_rejected('timeout')
+        raise PasswordVerifyBusy()
+
+
+def _timed_verify(password, password_hash):
+    start = time.perf_counter()
+    try:
+        return verify_password(password, password_hash)
+    finally:
+        observe_password_verify(password_scheme(password_hash) or 'unknown', time.perf_counter() - start)
+
+
+def verify_password_bounded(password: str, password_hash: str) -> bool:
+    """verify_password en el pool acotado. Puede lanzar PasswordVerifyBusy."""
+    if not password or not password_hash:
+        return False
+    return _run_bounded(_timed_verify, password, password_hash)
+
+
+def check_and_upgrade(user, password: str) -> bool:
+    """
+    Verifica la contraseña de `user` en el pool y, si es correcta y el
+    hash es bcrypt o usa parámetros Argon2 antiguos, lo re-encripta con
+    los parámetros actuales y lo guarda. Puede lanzar PasswordVerifyBusy.
+    """
+    if not verify_password_bounded(password, user.password_hash):
+        return False
+
+    if needs_rehash(user.password_hash):
+        try:
+            new_hash = _run_bounded(hash_password, password)
+        except PasswordVerifyBusy:
+            # El login ya es válido: se migra en el próximo
+            return True
+        user.password_hash = new_hash
+        if user.pk is not None:
+            type(user).objects.filter(pk=user.pk).update(password_hash=new_hash)
+    return True
+
+
+_dummy_hash = None
+
+
+def _dummy_verify(password):
+    """Verificación contra un hash fijo (creado la primera vez), para igualar tiempos."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = ph.hash('avicola-dummy-password')
+    return _timed_verify(password, _dummy_hash)
+
+
+class BoundedModelBackend(ModelBackend):
+    """
+    ModelBackend con todas las verificaciones en el pool acotado, incluida
+    la de relleno para emails inexistentes. Puede lanzar PasswordVerifyBusy.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Mismo costo que un email existente, pero dentro del pool
+            _run_bounded(_dummy_verify, password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
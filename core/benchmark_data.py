@@ -0,0 +1,340 @@
+"""
+Datos sintéticos para pruebas de carga - Años de operación de la granja
+cargados con COPY.
+
+Simula la granja día a día con un generador con semilla (mismo resultado
+en cada corrida):
+- plantel de gallinas, machos y juveniles con mortalidad y recambio de lote
+- postura diaria por tamaño con estacionalidad
+- una mezcla de alimento por semana, consumo diario y movimientos de
+  inventario (uso diario y compras cuando el stock baja)
+- ventas diarias, compras de alimento y gastos mensuales
+- resúmenes financieros y exportaciones de reportes por mes
+
+Los catálogos (items de alimento, categorías financieras) se reutilizan si
+ya existen, como las categorías que crea SQL_BBDD.sql. El resto de las filas
+se escribe con COPY (psycopg 3) con ids explícitos; después se ajustan las
+secuencias y se calculan las tablas derivadas (snapshots de inventario y
+feed_cost_daily). egg_production_daily la llena su trigger.
+"""
+import datetime
+import math
+import random
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import FeedItem, FinanceCategory, User
+
+
+BENCHMARK_PASSWORD = 'benchmark'
+BENCHMARK_USERS = {
+    'admin': 'bench-admin@avicola.local',
+    'worker': 'bench-worker@avicola.local',
+    'accountant': 'bench-accountant@avicola.local',
+}
+
+# Tablas que se cargan con COPY, en orden de carga
+TABLES = [
+    'farm_status', 'egg_production', 'mortality_event', 'feed_mix', 'feed_mix_item',
+    'feed_consumption', 'feed_inventory_movement', 'feed_inventory', 'finance_transaction',
+    'finance_summary', 'report_export',
+]
+CATALOG_TABLES = ['feed_item', 'finance_category']
+DERIVED_TABLES = ['egg_production_daily', 'feed_inventory_snapshot', 'feed_cost_daily']
+
+# (nombre, proveedor, costo CLP/kg, % en la mezcla)
+FEED_ITEMS = [
+    ('Maíz molido', 'Agrícola del Sur', 280, 55),
+    ('Harina de soya', 'Agrícola del Sur', 520, 22),
+    ('Afrechillo de trigo', 'Molino Central', 210, 8),
+    ('Conchuela', 'Calcáreos Norte', 120, 9),
+    ('Fosfato dicálcico', 'Nutrición Animal', 900, 2),
+    ('Aceite vegetal', 'Nutrición Animal', 1500, 2),
+    ('Premezcla vitamínica', 'Nutrición Animal', 2400, 1.5),
+    ('Sal', 'Molino Central', 150, 0.5),
+]
+
+# (nombre, tipo); las cuatro primeras vienen en SQL_BBDD.sql
+FINANCE_CATEGORIES = [
+    ('Venta de huevos', 'income'),
+    ('Compra de alimento', 'expense'),
+    ('Medicamentos veterinarios', 'expense'),
+    ('Transporte', 'expense'),
+    ('Venta de aves', 'income'),
+    ('Sueldos', 'expense'),
+    ('Electricidad', 'expense'),
+    ('Agua', 'expense'),
+    ('Mantención', 'expense'),
+    ('Envases', 'expense'),
+]
+
+PAYMENT_METHODS = ['Efectivo', 'Transferencia', 'Tarjeta Débito', 'Tarjeta Crédito']
+MORTALITY_CAUSES = ['Enfermedad respiratoria', 'Picaje', 'Estrés por calor', 'Depredador', 'Causa desconocida']
+EGG_PRICES = {'small': 120, 'medium': 150, 'large': 180}  # CLP por huevo
+
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(str(value)).quantize(CENT)
+
+
+class _Table:
+    """Columnas y filas de una tabla; asigna ids correlativos."""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = ['id'] + columns
+        self.rows = []
+
+    def add(self, *values):
+        row_id = len(self.rows) + 1
+        self.rows.append((row_id, *values))
+        return row_id
+
+
+def ensure_users():
+    """Crea (o reactiva) los usuarios de benchmark, uno por rol. Devuelve {rol: User}."""
+    users = {}
+    for role, email in BENCHMARK_USERS.items():
+        user = User.objects.filter(email=email).first()
+        if user is None:
+            user = User(email=email, full_name=f'Benchmark {role}', rol=role)
+        user.is_active = True
+        user.set_password(BENCHMARK_PASSWORD)
+        user.save()
+        users[role] = user
+    return users
+
+
+def ensure_catalogs(user_id):
+    """
+    Crea los items de alimento y categorías financieras que falten (se
+    buscan por nombre sin distinguir mayúsculas). Devuelve
+    ([(id, costo, %)], {nombre de categoría: id}).
+    """
+    items = []
+    for name, supplier, cost, pct in FEED_ITEMS:
+        item = FeedItem.objects.filter(item_name__iexact=name).first()
+        if item is None:
+            item = FeedItem.objects.create(
+                item_name=name, supplier_name=supplier, unit_cost_clp=cost, unit_type='kg', created_by=user_id,
+            )
+        items.append((item.id, cost, pct))
+
+    categories = {}
+    for name, kind in FINANCE_CATEGORIES:
+        category = FinanceCategory.objects.filter(category_name__iexact=name, type=kind).first()
+        if category is None:
+            category = FinanceCategory.objects.create(category_name=name, type=kind, created_by=user_id)
+        categories[name] = category.id
+    return items, categories
+
+
+def generate(start, end, user_id, items, categories, flock=1500, seed=42):
+    """
+    Genera las filas de TABLES entre `start` y `end` usando los catálogos de
+    ensure_catalogs. Devuelve {nombre: _Table}.
+    """
+    rng = random.Random(seed)
+    audit = ['created_by', 'created_at', 'updated_at']
+
+    def stamp(day, hour=8):
+        moment = timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour, rng.randint(0, 59))))
+        return user_id, moment, moment
+
+    t = {name: _Table(name, columns) for name, columns in {
+        'farm_status': ['status_date', 'juveniles_count', 'males_count', 'hens_count', *audit],
+        'egg_production': ['production_date', 'size_code', 'quantity', 'source_method', *audit],
+        'mortality_event': ['event_date', 'bird_type', 'quantity', 'cause', *audit],
+        'feed_mix': ['mix_date', 'description', 'total_weight_kg', *audit],
+        'feed_mix_item': ['feed_mix_id', 'feed_item_id', 'proportion_pct', 'weight_kg', *audit],
+        'feed_consumption': ['consumption_date', 'feed_mix_id', 'total_consumed_kg', *audit],
+        'feed_inventory_movement': [
+            'feed_item_id', 'movement_type', 'quantity', 'unit_type', 'movement_date',
+            'reference', 'unit_cost_clp', *audit,
+        ],
+        'feed_inventory': ['feed_item_id', 'quantity', 'unit_type', *audit],
+        'finance_transaction': [
+            'transaction_date', 'category_id', 'amount_clp', 'payment_method', 'description', *audit,
+        ],
+        'finance_summary': ['year_month', 'total_income_clp', 'total_expense_clp', 'generated_by', 'generated_at'],
+        'report_export': [
+            'report_type', 'period_start', 'period_end', 'file_format', 'file_path', 'file_size_bytes', *audit,
+        ],
+    }.items()}
+
+    def expense(day, category, amount, description):
+        t['finance_transaction'].add(
+            day, categories[category], _money(amount), rng.choice(PAYMENT_METHODS), description, *stamp(day, 17),
+        )
+
+    hens, males, juveniles = flock, flock // 20, flock // 5
+    stock = {item_id: 0.0 for item_id, _, _ in items}
+    mix_items = []
+    mix_id = None
+    month_totals = {'income': 0, 'expense': 0}
+
+    day = start
+    while day <= end:
+        # Mortalidad
+        for bird_type, probability in (('hen', 0.35), ('juvenile', 0.15), ('male', 0.05)):
+            if rng.random() < probability:
+                quantity = rng.randint(1, 3)
+                t['mortality_event'].add(day, bird_type, quantity, rng.choice(MORTALITY_CAUSES), *stamp(day, 7))
+                if bird_type == 'hen':
+                    hens -= quantity
+                elif bird_type == 'male':
+                    males -= quantity
+                else:
+                    juveniles -= quantity
+
+        # Recambio de lote cada 120 días: los juveniles pasan a gallinas
+        if (day - start).days % 120 == 119:
+            hens = min(flock, hens + int(juveniles * 0.95))
+            juveniles = flock // 5
+
+        t['farm_status'].add(day, max(juveniles, 0), max(males, 0), max(hens, 0), *stamp(day, 7))
+
+        # Postura con estacionalidad (menos en invierno austral)
+        season = 1 - 0.08 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 15) / 365)
+        laid = int(hens * rng.uniform(0.72, 0.88) * season)
+        small = int(laid * rng.uniform(0.2, 0.3))
+        medium = int(laid * rng.uniform(0.45, 0.55))
+        sizes = {'small': small, 'medium': medium, 'large': laid - small - medium}
+        for size_code, quantity in sizes.items():
+            t['egg_production'].add(day, size_code, quantity, 'manual', *stamp(day, 18))
+
+        # Mezcla semanal (los lunes y el primer día)
+        consumed = (hens + males) * 0.115 + juveniles * 0.07
+        if mix_id is None or day.weekday() == 0:
+            weights = [pct * rng.uniform(0.9, 1.1) for _, _, pct in items]
+            total = sum(weights)
+            proportions = [round(w * 100 / total, 2) for w in weights]
+            proportions[0] = round(100 - sum(proportions[1:]), 2)
+            week_kg = consumed * 7
+            mix_id = t['feed_mix'].add(
+                day, f'Mezcla semana {day.isocalendar()[1]} de {day.year}', _money(week_kg), *stamp(day, 9),
+            )
+            mix_items = []
+            for (item_id, _, _), pct in zip(items, proportions):
+                t['feed_mix_item'].add(mix_id, item_id, _money(pct), _money(week_kg * pct / 100), *stamp(day, 9))
+                mix_items.append((item_id, pct))
+
+        consumed = round(consumed, 2)
+        t['feed_consumption'].add(day, mix_id, _money(consumed), *stamp(day, 19))
+
+        # Inventario: compra de 30 días cuando quedan menos de 7, luego el uso del día
+        for (item_id, cost, _), (_, pct) in zip(items, mix_items):
+            usage = round(consumed * pct / 100, 2)
+            if stock[item_id] < usage * 7:
+                purchase = math.ceil(usage * 30 / 25) * 25  # sacos de 25 kg
+                unit_cost = round(cost * rng.uniform(0.95, 1.08), 2)
+                t['feed_inventory_movement'].add(
+                    item_id, 'purchase', _money(purchase), 'kg', day, f'Factura #{rng.randint(10000, 99999)}',
+                    _money(unit_cost), *stamp(day, 10),
+                )
+                stock[item_id] += purchase
+                expense(day, 'Compra de alimento', purchase * unit_cost, f'Compra de alimento ({purchase} kg)')
+                month_totals['expense'] += purchase * unit_cost
+            if usage > 0:
+                t['feed_inventory_movement'].add(
+                    item_id, 'usage', _money(usage), 'kg', day, f'Consumo del {day.isoformat()}', None,
+                    *stamp(day, 19),
+                )
+                stock[item_id] -= usage
+
+        # Ventas del día
+        sales = sum(quantity * EGG_PRICES[size] for size, quantity in sizes.items()) * rng.uniform(0.9, 1.0)
+        t['finance_transaction'].add(
+            day, categories['Venta de huevos'], _money(sales), rng.choice(PAYMENT_METHODS),
+            'Venta diaria de huevos', *stamp(day, 16),
+        )
+        month_totals['income'] += sales
+
+        # Gastos mensuales y ocasionales
+        if day.day == 1:
+            for category, amount in (('Sueldos', 1_800_000), ('Electricidad', 180_000), ('Agua', 60_000)):
+                amount *= rng.uniform(0.95, 1.1)
+                expense(day, category, amount, f'{category} {day.strftime("%m/%Y")}')
+                month_totals['expense'] += amount
+        for category, probability, amount in (
+            ('Medicamentos veterinarios', 0.03, 120_000), ('Mantención', 0.04, 80_000),
+            ('Transporte', 0.1, 35_000), ('Envases', 0.08, 50_000),
+        ):
+            if rng.random() < probability:
+                amount *= rng.uniform(0.6, 1.5)
+                expense(day, category, amount, category)
+                month_totals['expense'] += amount
+
+        # Cierre de mes: resumen financiero y reportes exportados
+        next_day = day + datetime.timedelta(days=1)
+        if next_day.month != day.month or day == end:
+            month_start = day.replace(day=1)
+            t['finance_summary'].add(
+                day.strftime('%Y-%m'), _money(month_totals['income']), _money(month_totals['expense']),
+                user_id, stamp(day, 20)[1],
+            )
+            for file_format in ('pdf', 'xlsx'):
+                t['report_export'].add(
+                    'financial_summary', month_start, day, file_format,
+                    f'reports/resumen_financiero_{day.year}_{day.month:02d}.{file_format}',
+                    rng.randint(20_000, 120_000), *stamp(day, 20),
+                )
+            month_totals = {'income': 0, 'expense': 0}
+
+        day = next_day
+
+    for item_id, _, _ in items:
+        t['feed_inventory'].add(item_id, _money(max(stock[item_id], 0)), 'kg', *stamp(end, 20))
+
+    return t
+
+
+def table_counts(tables):
+    """Filas actuales de cada tabla."""
+    with connection.cursor() as cursor:
+        counts = {}
+        for table in tables:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            counts[table] = cursor.fetchone()[0]
+    return counts
+
+
+def reset_tables():
+    """Vacía las tablas de la granja (no los usuarios) y reinicia sus secuencias."""
+    quote = connection.ops.quote_name
+    names = ', '.join(quote(name) for name in CATALOG_TABLES + TABLES + DERIVED_TABLES)
+    with connection.cursor() as cursor:
+        cursor.execute(f'TRUNCATE {names} RESTART IDENTITY CASCADE')
+
+
+def load(tables):
+    """Carga las tablas generadas con COPY en una transacción. Devuelve {tabla: filas}."""
+    quote = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        loaded = {}
+        for name in TABLES:
+            table = tables[name]
+            columns = ', '.join(quote(column) for column in table.columns)
+            with cursor.copy(f'COPY {quote(name)} ({columns}) FROM STDIN') as copy:
+                for row in table.rows:
+                    copy.write_row(row)
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), GREATEST(MAX(id), 1)) FROM {quote(name)}",
+                [name],
+            )
+            loaded[name] = len(table.rows)
+    return loaded
+
+
+def refresh_derived(start, end):
+    """Snapshots diarios de inventario, feed_cost_daily y estadísticas del planificador."""
+    call_command('snapshot_inventory', from_date=start.isoformat(), date=end.isoformat(), verbosity=0)
+    call_command('refresh_feed_cost_daily', full=True, verbosity=0)
+    with connection.cursor() as cursor:
+        for name in CATALOG_TABLES + TABLES + DERIVED_TABLES:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(name)}')
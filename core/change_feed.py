@@ -0,0 +1,67 @@
+"""
+Feed de cambios (sincronización incremental) - Filas modificadas después
+de una marca de agua, incluidas las desactivadas (is_active=False).
+
+Las filas se recorren en orden (updated_at, id) con los cursores de
+core.pagination, así que dos filas con el mismo updated_at nunca se saltan.
+
+Marca de agua segura: updated_at se fija al escribir (NOW() del trigger es
+el inicio de la transacción), pero la fila recién se ve al confirmar. Una
+transacción larga puede confirmar filas con updated_at anterior a otras ya
+entregadas. Por eso solo se entregan filas con updated_at menor que el
+inicio de la transacción abierta más antigua (pg_stat_activity), menos un
+margen CHANGE_FEED_LAG_SECONDS para la diferencia de reloj entre la
+aplicación y la base. Supone que la aplicación usa un único usuario de
+PostgreSQL (pg_stat_activity solo muestra xact_start de las sesiones
+propias).
+"""
+from django.conf import settings
+from django.db import connection
+
+from core.pagination import encode_cursor, get_ordering, paginate_queryset
+
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+def safe_high_water():
+    """Momento hasta el cual ya no pueden aparecer filas nuevas."""
+    lag = getattr(settings, 'CHANGE_FEED_LAG_SECONDS', 2)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT LEAST(
+                       clock_timestamp(),
+                       (SELECT MIN(xact_start) FROM pg_stat_activity
+                         WHERE datname = current_database()
+                           AND pid <> pg_backend_pid()
+                           AND xact_start IS NOT NULL)
+                   ) - make_interval(secs => %s)
+            """,
+            [lag],
+        )
+        return cursor.fetchone()[0]
+
+
+def changes_page(queryset, cursor=None, since=None, limit=DEFAULT_LIMIT):
+    """
+    Siguiente tramo de cambios de `queryset` (sin filtrar por is_active).
+
+    - cursor: el `next_cursor` de la respuesta anterior
+    - since: para la primera sincronización, solo filas con updated_at posterior
+
+    Devuelve (filas, next_cursor, has_more, high_water). Con `cursor` o
+    `since` inválidos lanza core.pagination.InvalidCursor / ValueError.
+    """
+    high_water = safe_high_water()
+    queryset = queryset.filter(updated_at__lt=high_water).order_by('updated_at', 'pk')
+    if since is not None and not cursor:
+        queryset = queryset.filter(updated_at__gt=since)
+
+    page = paginate_queryset(queryset, {'after': cursor} if cursor else {}, limit)
+    if page:
+        next_cursor = encode_cursor(page[-1], get_ordering(queryset))
+    else:
+        next_cursor = cursor
+    return page.object_list, next_cursor, page.has_next, high_water
@@ -0,0 +1,114 @@
+"""
+Peticiones condicionales (ETag) - Respuestas 304 sin recalcular.
+
+Todas las tablas tienen updated_at (trigger trg_touch_updated_at). El
+validador de una respuesta se arma con MAX(updated_at) y COUNT(*) de los
+querysets de los que depende, una consulta barata por queryset:
+- un registro nuevo o editado cambia MAX(updated_at)
+- un registro desactivado o borrado cambia COUNT(*)
+
+Si el cliente envía If-None-Match y el validador no cambió, se responde
+304 antes de ejecutar la vista. Las respuestas llevan Cache-Control:
+private, no-cache para que el navegador siempre revalide.
+
+No se envía Last-Modified: desactivar el registro más reciente baja (o
+mantiene) MAX(updated_at), y un cliente que solo envía If-Modified-Since
+recibiría un 304 incorrecto. El ETag incluye COUNT(*) y no tiene ese problema.
+"""
+import hashlib
+from dataclasses import dataclass
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from core.async_utils import is_async_view
+from core.roles import get_role_permissions
+
+
+@dataclass
+class Validator:
+    etag: str
+
+
+def queryset_state(queryset):
+    """(MAX(updated_at), COUNT(*)) del queryset, en una consulta."""
+    state = queryset.order_by().aggregate(last=Max('updated_at'), count=Count('pk'))
+    return state['last'], state['count']
+
+
+def build_validator(querysets, *extra):
+    """
+    Validador a partir del estado de cada queryset y de valores extra que
+    también cambian la respuesta (parámetros, usuario, rol...).
+    """
+    states = [queryset_state(queryset) for queryset in querysets]
+    digest = hashlib.md5(repr((states, extra)).encode()).hexdigest()
+    return Validator(quote_etag(digest))
+
+
+def request_fingerprint(request):
+    """Lo que cambia una página HTML además de los datos: usuario y rol efectivo."""
+    perms = get_role_permissions(request)
+    return (getattr(request.user, 'pk', None), perms.role)
+
+
+def not_modified(request, validator):
+    """Respuesta 304 (o 412) si el cliente ya tiene esta versión; si no, None."""
+    return get_conditional_response(request, etag=validator.etag)
+
+
+def set_validator_headers(response, validator):
+    """Agrega ETag y Cache-Control a una respuesta 200 o 304."""
+    if response.status_code not in (200, 304):
+        return response
+    if not response.has_header('ETag'):
+        response['ETag'] = validator.etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_view(validator_func):
+    """
+    Decorador para vistas GET: `validator_func(request, *args, **kwargs)`
+    devuelve un Validator (o None para no usar validación). Si el cliente
+    ya tiene esa versión responde 304 sin ejecutar la vista.
+
+    Las páginas con mensajes pendientes siempre se generan (los mensajes
+    se consumen al mostrarse). En vistas async el validador corre con
+    sync_to_async.
+    """
+    def get_validator(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+            return None
+        return validator_func(request, *args, **kwargs)
+
+    def decorator(view):
+        if is_async_view(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                validator = await sync_to_async(get_validator)(request, *args, **kwargs)
+                if validator is None:
+                    return await view(request, *args, **kwargs)
+
+                response = not_modified(request, validator)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return set_validator_headers(response, validator)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            validator = get_validator(request, *args, **kwargs)
+            if validator is None:
+                return view(request, *args, **kwargs)
+
+            response = not_modified(request, validator)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return set_validator_headers(response, validator)
+        return wrapper
+    return decorator
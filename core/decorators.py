@@ -13,20 +13,49 @@ MATRIZ DE PERMISOS:
 R = Puede ver
 W = Puede modificar
 - = Sin acceso
+
+Los decoradores sirven para vistas sync y async: en las async la
+verificación (que puede leer la sesión y el usuario) corre con
+sync_to_async.
 """
+from asgiref.sync import sync_to_async
 from django.shortcuts import redirect
 from django.contrib import messages
 from functools import wraps
 
+from core.async_utils import is_async_view
+from core.roles import get_role_permissions
+
 
 def get_effective_role(request):
     """
     Obtiene el rol del usuario actual.
     Si el admin está usando "ver como otro rol", devuelve ese rol temporal.
     """
-    if hasattr(request, 'effective_role'):
-        return request.effective_role
-    return request.user.rol if request.user.is_authenticated else None
+    return get_role_permissions(request).role
+
+
+def _guard(view_func, check):
+    """
+    Envuelve la vista con `check(request)`, que devuelve una respuesta
+    (redirección) si se niega el acceso o None si puede pasar.
+    """
+    if is_async_view(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            denied = await sync_to_async(check)(request)
+            if denied is not None:
+                return denied
+            return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        denied = check(request)
+        if denied is not None:
+            return denied
+        return view_func(request, *args, **kwargs)
+    return wrapper
 
 
 def role_required(*allowed_roles):
@@ -39,21 +68,20 @@ def role_required(*allowed_roles):
             # Solo admin y contador pueden entrar aquí
             ...
     """
+    def check(request):
+        perms = get_role_permissions(request)
+        if not perms.is_authenticated:
+            messages.error(request, 'Debes iniciar sesión')
+            return redirect('web_login')
+        
+        if perms.role not in allowed_roles:
+            messages.error(request, 'No tienes permisos para realizar esta acción')
+            return redirect('dashboard')
+        
+        return None
+    
     def decorator(view_func):
-        @wraps(view_func)
-        def wrapper(request, *args, **kwargs):
-            if not request.user.is_authenticated:
-                messages.error(request, 'Debes iniciar sesión')
-                return redirect('web_login')
-            
-            effective_role = get_effective_role(request)
-            
-            if effective_role not in allowed_roles:
-                messages.error(request, 'No tienes permisos para realizar esta acción')
-                return redirect('dashboard')
-            
-            return view_func(request, *args, **kwargs)
-        return wrapper
+        return _guard(view_func, check)
     return decorator
 
 
@@ -66,20 +94,19 @@ def finance_write_required(view_func):
     Solo admin y contador pueden modificar finanzas.
     El trabajador solo puede ver.
     """
-    @wraps(view_func)
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
+    def check(request):
+        perms = get_role_permissions(request)
+        if not perms.is_authenticated:
             messages.error(request, 'Debes iniciar sesión')
             return redirect('web_login')
         
-        effective_role = get_effective_role(request)
-        
-        if effective_role not in ['admin', 'accountant']:
+        if not perms.can_write_finance:
             messages.error(request, 'Solo administradores y contadores pueden modificar finanzas')
             return redirect('finance_transaction_list')
         
-        return view_func(request, *args, **kwargs)
-    return wrapper
+        return None
+    
+    return _guard(view_func, check)
 
 
 # ============================================================================
@@ -91,20 +118,19 @@ def production_write_required(view_func):
     Solo admin y trabajador pueden modificar producción/alimentación.
     El contador solo puede ver.
     """
-    @wraps(view_func)
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
+    def check(request):
+        perms = get_role_permissions(request)
+        if not perms.is_authenticated:
             messages.error(request, 'Debes iniciar sesión')
             return redirect('web_login')
         
-        effective_role = get_effective_role(request)
-        
-        if effective_role not in ['admin', 'worker']:
+        if not perms.can_write_production:
             messages.error(request, 'Solo administradores y trabajadores pueden modificar producción y alimentación')
             return redirect('dashboard')
         
-        return view_func(request, *args, **kwargs)
-    return wrapper
+        return None
+    
+    return _guard(view_func, check)
 
 
 # ============================================================================
@@ -116,16 +142,17 @@ def admin_required(view_func):
     Solo el administrador puede acceder.
     Nota: Usa el rol real, no el temporal (para seguridad).
     """
-    @wraps(view_func)
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
+    def check(request):
+        perms = get_role_permissions(request)
+        if not perms.is_authenticated:
             messages.error(request, 'Debes iniciar sesión')
             return redirect('web_login')
         
         # Usar el rol REAL, no el efectivo
-        if request.user.rol != 'admin':
+        if not perms.is_admin:
             messages.error(request, 'Solo administradores pueden acceder a esta sección')
             return redirect('dashboard')
         
-        return view_func(request, *args, **kwargs)
-    return wrapper
+        return None
+    
+    return _guard(view_func, check)
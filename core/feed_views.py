@@ -4,12 +4,26 @@ Vistas del módulo de Alimentación - Items, Mezclas y Consumo de Alimento.
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 
-from core.models import FeedItem, FeedInventory, FeedInventoryMovement, FeedMix, FeedConsumption
+from collections import Counter
+from decimal import Decimal
+
+from core.models import (
+    FeedItem, FeedInventoryMovement, FeedMix, FeedConsumption,
+    FinanceCategory, FinanceTransaction,
+)
 from core.forms import FeedItemForm, FeedInventoryMovementForm, FeedMixForm, FeedConsumptionForm
 from core.decorators import production_write_required
-from django.db.models import Sum
+from core.pagination import keyset_paginate
+from core.roles import get_role_permissions
+from core.forecast_service import get_feed_forecast
+from core.inventory_service import (
+    LOW_STOCK_THRESHOLD, MEDIUM_STOCK_THRESHOLD, InventoryError, apply_movement,
+    create_feed_mix, ensure_inventory_rows, parse_mix_lines,
+)
+from django.db import transaction
+from django.db.models import Case, CharField, DecimalField, ExpressionWrapper, F, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
@@ -21,9 +35,7 @@ from django.utils import timezone
 def feed_item_list(request):
     """Muestra la lista de items de alimento."""
     items = FeedItem.objects.filter(is_active=True).order_by('item_name')
-    paginator = Paginator(items, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = keyset_paginate(request, items)
     return render(request, 'feed_item/list.html', {'items': page_obj})
 
 
@@ -36,7 +48,10 @@ def feed_item_create(request):
         if form.is_valid():
             item = form.save(commit=False)
             item.created_by = request.user.id
-            item.save()
+            with transaction.atomic():
+                item.save()
+                # Todo item nace con su fila de inventario (en 0)
+                ensure_inventory_rows([item], request.user.id)
             messages.success(request, 'Item de alimento creado exitosamente')
             return redirect('feed_item_list')
     else:
@@ -97,9 +112,7 @@ def feed_item_delete(request, pk):
 def feed_mix_list(request):
     """Muestra la lista de mezclas de alimento."""
     mixes = FeedMix.objects.filter(is_active=True).order_by('-mix_date')
-    paginator = Paginator(mixes, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = keyset_paginate(request, mixes)
     return render(request, 'feed_mix/list.html', {'mixes': page_obj})
 
 
@@ -116,146 +129,16 @@ def feed_mix_create(request):
     if request.method == 'POST':
         form = FeedMixForm(request.POST)
         if form.is_valid():
-            mix = form.save(commit=False)
-            mix.created_by = request.user.id
-            mix.save()
-            
-            # Procesar items de la mezcla
-            total_weight = 0
-            items_added = 0
-            
-            for item in available_items:
-                # Obtener cantidad del POST
-                quantity_key = f'item_{item.pk}_quantity'
-                quantity_str = request.POST.get(quantity_key, '0').strip()
-                
-                # Validar que no esté vacío y sea un número válido
-                if not quantity_str or quantity_str == '':
-                    continue
-                
-                try:
-                    from decimal import Decimal, InvalidOperation
-                    quantity = Decimal(quantity_str)
-                    if quantity > 0:
-                        # Verificar stock disponible
-                        if item.inventory.quantity >= quantity:
-                            # Crear FeedMixItem
-                            from core.models import FeedMixItem
-                            FeedMixItem.objects.create(
-                                feed_mix=mix,
-                                feed_item=item,
-                                weight_kg=quantity,
-                                proportion_pct=0,  # Se calculará después
-                                created_by=request.user.id
-                            )
-                            
-                            # Descontar del inventario
-                            item.inventory.quantity -= quantity
-                            item.inventory.updated_by = request.user.id
-                            item.inventory.save()
-                            
-                            # Registrar movimiento
-                            FeedInventoryMovement.objects.create(
-                                feed_item=item,
-                                movement_type='usage',
-                                quantity=quantity,
-                                unit_type=item.unit_type,
-                                movement_date=mix.mix_date,
-                                reference=f'Mezcla del {mix.mix_date}',
-                                created_by=request.user.id
-                            )
-                            
-                            total_weight += float(quantity)
-                            items_added += 1
-                        else:
-                            messages.warning(request, f'Stock insuficiente de {item.item_name}. Disponible: {item.inventory.quantity} kg')
-                except (ValueError, AttributeError, TypeError, InvalidOperation):
-                    # Ignorar valores inválidos silenciosamente
-                    pass
-            
-            # Actualizar peso total y proporciones
-            if total_weight > 0:
-                from decimal import Decimal
-                mix.total_weight_kg = total_weight
-                mix.save()
-                
-                # Calcular proporciones
-                from core.models import FeedMixItem
-                mix_items = FeedMixItem.objects.filter(feed_mix=mix)
-                total_weight_decimal = Decimal(str(total_weight))
-                for mix_item in mix_items:
-                    mix_item.proportion_pct = (mix_item.weight_kg / total_weight_decimal) * 100
-                    mix_item.save()
-                
-                # Crear item de mezcla en el catálogo si no existe
-                from decimal import Decimal
-                import datetime
-                
-                # Crear nombre único para la mezcla
-                timestamp = datetime.datetime.now().strftime('%H:%M')
-                mix_name = f"Mezcla {mix.mix_date.strftime('%d/%m/%Y')} {timestamp}"
-                if mix.description:
-                    mix_name = f"{mix.description} ({mix.mix_date.strftime('%d/%m/%Y')} {timestamp})"
-                
-                # Calcular costo promedio de la mezcla
-                total_cost = Decimal('0')
-                for mix_item in mix_items:
-                    item_cost = mix_item.feed_item.unit_cost_clp * mix_item.weight_kg
-                    total_cost += item_cost
-                
-                unit_cost = total_cost / Decimal(str(total_weight)) if total_weight > 0 else Decimal('0')
-                
-                # Crear o actualizar el item de mezcla
-                mix_feed_item, created = FeedItem.objects.get_or_create(
-                    item_name=mix_name,
-                    defaults={
-                        'supplier_name': 'Producción Propia',
-                        'unit_cost_clp': unit_cost,
-                        'unit_type': 'kg',
-                        'created_by': request.user.id
-                    }
-                )
-                
-                if not created:
-                    # Si ya existe, actualizar el costo
-                    mix_feed_item.unit_cost_clp = unit_cost
-                    mix_feed_item.updated_by = request.user.id
-                    mix_feed_item.save()
-                
-                # Agregar la mezcla al inventario
-                mix_inventory, inv_created = FeedInventory.objects.get_or_create(
-                    feed_item=mix_feed_item,
-                    defaults={
-                        'quantity': Decimal(str(total_weight)),
-                        'unit_type': 'kg',
-                        'created_by': request.user.id
-                    }
-                )
-                
-                if not inv_created:
-                    # Si ya existe, sumar la cantidad
-                    mix_inventory.quantity += Decimal(str(total_weight))
-                    mix_inventory.updated_by = request.user.id
-                    mix_inventory.save()
-                
-                # Registrar movimiento de entrada de la mezcla
-                FeedInventoryMovement.objects.create(
-                    feed_item=mix_feed_item,
-                    movement_type='purchase',
-                    quantity=Decimal(str(total_weight)),
-                    unit_type='kg',
-                    movement_date=mix.mix_date,
-                    reference=f'Producción de mezcla',
-                    unit_cost_clp=unit_cost,
-                    created_by=request.user.id
-                )
-            
-            if items_added > 0:
-                messages.success(request, f'Mezcla creada con {items_added} items ({total_weight} kg total) y agregada al inventario')
+            try:
+                lines = parse_mix_lines(request.POST, available_items)
+                mix = form.save(commit=False)
+                create_feed_mix(mix, lines, request.user.id)
+            except InventoryError as e:
+                for error in e.errors:
+                    messages.error(request, error)
             else:
-                messages.warning(request, 'Mezcla creada pero sin items agregados')
-            
-            return redirect('feed_mix_list')
+                messages.success(request, f'Mezcla creada con {len(lines)} items ({mix.total_weight_kg} kg total) y agregada al inventario')
+                return redirect('feed_mix_list')
     else:
         form = FeedMixForm()
     
@@ -291,8 +174,8 @@ def feed_mix_edit(request, pk):
 @login_required
 def feed_mix_delete(request, pk):
     """Eliminar mezcla de alimento (soft delete - solo admin)."""
-    # Verificar que sea admin
-    if request.user.role != 'admin':
+    # Verificar que sea admin (rol real)
+    if not get_role_permissions(request).is_admin:
         messages.error(request, 'Solo administradores pueden eliminar registros de mezclas')
         return redirect('feed_mix_list')
     
@@ -312,9 +195,7 @@ def feed_mix_delete(request, pk):
 def feed_consumption_list(request):
     """Muestra la lista de registros de consumo."""
     consumptions = FeedConsumption.objects.filter(is_active=True).order_by('-consumption_date')
-    paginator = Paginator(consumptions, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = keyset_paginate(request, consumptions)
     return render(request, 'feed_consumption/list.html', {'consumptions': page_obj})
 
 
@@ -386,25 +267,43 @@ def feed_consumption_delete(request, pk):
 
 @login_required
 def feed_inventory_list(request):
-    """Muestra el inventario actual de todos los items."""
-    # Obtener todos los items con su inventario
-    items = FeedItem.objects.filter(is_active=True).select_related('inventory').order_by('item_name')
+    """Muestra el inventario actual de todos los items (solo lectura) con su pronóstico."""
+    stock = Coalesce('inventory__quantity', Value(Decimal('0')), output_field=DecimalField())
+    items = list(
+        FeedItem.objects.filter(is_active=True)
+        .select_related('inventory')
+        .annotate(
+            stock=stock,
+            stock_value=ExpressionWrapper(stock * F('unit_cost_clp'), output_field=DecimalField()),
+            stock_level=Case(
+                When(inventory__isnull=True, then=Value('none')),
+                When(inventory__quantity__lte=0, then=Value('out')),
+                When(inventory__quantity__lt=LOW_STOCK_THRESHOLD, then=Value('low')),
+                When(inventory__quantity__lt=MEDIUM_STOCK_THRESHOLD, then=Value('medium')),
+                default=Value('ok'),
+                output_field=CharField(),
+            ),
+        )
+        .order_by('item_name')
+    )
     
-    # Crear inventario para items que no lo tengan
+    # Pronóstico de consumo (en caché por día)
+    forecast = get_feed_forecast()
     for item in items:
-        if not hasattr(item, 'inventory'):
-            FeedInventory.objects.create(
-                feed_item=item,
-                quantity=0,
-                unit_type=item.unit_type,
-                created_by=request.user.id
-            )
+        item.forecast = forecast.get(item.pk)
     
-    # Recargar con inventario
-    items = FeedItem.objects.filter(is_active=True).select_related('inventory').order_by('item_name')
+    # Resumen a partir de la misma consulta
+    levels = Counter(item.stock_level for item in items)
     
     context = {
         'items': items,
+        'stock_summary': {
+            'out': levels['out'],
+            'low': levels['low'],
+            'ok': levels['ok'],
+            'reorder': sum(1 for f in forecast.values() if f.status == 'reorder'),
+            'total_value': sum((item.stock_value for item in items), Decimal('0')),
+        },
         'title': 'Inventario de Alimentos'
     }
     return render(request, 'feed_inventory/list.html', context)
@@ -415,11 +314,9 @@ def feed_inventory_movements(request):
     """Muestra el historial de movimientos de inventario."""
     movements = FeedInventoryMovement.objects.filter(
         is_active=True
-    ).select_related('feed_item').order_by('-movement_date', '-created_at')
+    ).select_related('feed_item').order_by('-movement_date', '-id')
     
-    paginator = Paginator(movements, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = keyset_paginate(request, movements)
     
     return render(request, 'feed_inventory/movements.html', {'movements': page_obj})
 
@@ -452,33 +349,6 @@ def feed_inventory_movement_create(request):
             if not movement.unit_cost_clp and movement.movement_type == 'purchase':
                 movement.unit_cost_clp = feed_item.unit_cost_clp
             
-            # Guardar el movimiento
-            movement.save()
-            
-            # Actualizar o crear inventario
-            inventory, created = FeedInventory.objects.get_or_create(
-                feed_item=feed_item,
-                defaults={
-                    'quantity': 0,
-                    'unit_type': feed_item.unit_type,
-                    'created_by': request.user.id
-                }
-            )
-            
-            # Actualizar cantidad según tipo de movimiento
-            if movement.movement_type == 'purchase':
-                # Compras suman
-                inventory.quantity += abs(movement.quantity)
-            elif movement.movement_type in ['usage', 'waste']:
-                # Uso y desperdicio restan
-                inventory.quantity -= abs(movement.quantity)
-                # Evitar negativos
-                if inventory.quantity < 0:
-                    inventory.quantity = 0
-            
-            inventory.updated_by = request.user.id
-            inventory.save()
-            
             # Calcular costo total
             total_cost = 0
             if movement.unit_cost_clp:
@@ -487,39 +357,46 @@ def feed_inventory_movement_create(request):
                 # Si no se especificó costo, usar el del item
                 total_cost = float(movement.quantity) * float(feed_item.unit_cost_clp)
             
-            # Si es desperdicio, registrar pérdida financiera
-            if movement.movement_type == 'waste' and total_cost > 0:
-                from core.models import FinanceCategory, FinanceTransaction
-                from decimal import Decimal
-                
-                # Buscar o crear categoría de desperdicios
-                waste_category, created = FinanceCategory.objects.get_or_create(
-                    category_name='Desperdicios de Alimento',
-                    defaults={
-                        'type': 'expense',
-                        'description': 'Pérdidas por desperdicio de alimento',
-                        'created_by': request.user.id
-                    }
-                )
-                
-                # Crear transacción financiera de pérdida
-                FinanceTransaction.objects.create(
-                    category=waste_category,
-                    transaction_date=movement.movement_date,
-                    amount_clp=Decimal(str(total_cost)),
-                    payment_method='N/A',
-                    reference_doc=f'Desperdicio-{movement.id}',
-                    description=f'Pérdida por desperdicio de {movement.quantity} {movement.unit_type} de {feed_item.item_name}',
-                    created_by=request.user.id
-                )
-                
-                messages.warning(request, f'Desperdicio registrado: {movement.get_movement_type_display()} - Pérdida: ${total_cost:,.0f}')
-            elif total_cost > 0:
-                messages.success(request, f'Movimiento registrado: {movement.get_movement_type_display()} - Total: ${total_cost:,.0f}')
+            try:
+                with transaction.atomic():
+                    # Guardar el movimiento y actualizar el inventario
+                    # (falla si el stock quedaría negativo)
+                    apply_movement(movement, request.user.id)
+                    
+                    # Si es desperdicio, registrar pérdida financiera
+                    if movement.movement_type == 'waste' and total_cost > 0:
+                        # Buscar o crear categoría de desperdicios
+                        waste_category, created = FinanceCategory.objects.get_or_create(
+                            category_name='Desperdicios de Alimento',
+                            defaults={
+                                'type': 'expense',
+                                'description': 'Pérdidas por desperdicio de alimento',
+                                'created_by': request.user.id
+                            }
+                        )
+                        
+                        # Crear transacción financiera de pérdida
+                        FinanceTransaction.objects.create(
+                            category=waste_category,
+                            transaction_date=movement.movement_date,
+                            amount_clp=Decimal(str(total_cost)),
+                            payment_method='N/A',
+                            reference_doc=f'Desperdicio-{movement.id}',
+                            description=f'Pérdida por desperdicio de {movement.quantity} {movement.unit_type} de {feed_item.item_name}',
+                            created_by=request.user.id
+                        )
+            except InventoryError as e:
+                for error in e.errors:
+                    messages.error(request, error)
             else:
-                messages.success(request, f'Movimiento registrado: {movement.get_movement_type_display()}')
-            
-            return redirect('feed_inventory_list')
+                if movement.movement_type == 'waste' and total_cost > 0:
+                    messages.warning(request, f'Desperdicio registrado: {movement.get_movement_type_display()} - Pérdida: ${total_cost:,.0f}')
+                elif total_cost > 0:
+                    messages.success(request, f'Movimiento registrado: {movement.get_movement_type_display()} - Total: ${total_cost:,.0f}')
+                else:
+                    messages.success(request, f'Movimiento registrado: {movement.get_movement_type_display()}')
+                
+                return redirect('feed_inventory_list')
         else:
             messages.error(request, 'Por favor corrige los errores en el formulario')
     else:
@@ -4,11 +4,11 @@ Vistas del módulo de Finanzas - Categorías y Transacciones Financieras.
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 
 from core.models import FinanceCategory, FinanceTransaction
 from core.forms import FinanceCategoryForm, FinanceTransactionForm
 from core.decorators import finance_write_required
+from core.pagination import keyset_paginate
 
 
 # ============================================================================
@@ -19,9 +19,7 @@ from core.decorators import finance_write_required
 def finance_category_list(request):
     """Muestra la lista de categorías financieras."""
     categories = FinanceCategory.objects.filter(is_active=True).order_by('type', 'category_name')
-    paginator = Paginator(categories, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = keyset_paginate(request, categories)
     return render(request, 'finance/category_list.html', {'categories': page_obj})
 
 
@@ -96,11 +94,9 @@ def finance_transaction_list(request):
     """Muestra la lista de transacciones financieras."""
     transactions = FinanceTransaction.objects.filter(
         is_active=True
-    ).select_related('category').order_by('-transaction_date', '-created_at')
+    ).select_related('category').order_by('-transaction_date', '-id')
     
-    paginator = Paginator(transactions, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = keyset_paginate(request, transactions)
     return render(request, 'finance/transaction_list.html', {'transactions': page_obj})
 
 
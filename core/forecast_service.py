@@ -0,0 +1,316 @@
+"""
+Pronóstico de Stock de Alimentos - Consumo diario por ingrediente y
+fecha sugerida de reposición.
+
+El consumo de cada ingrediente se obtiene del consumo diario registrado
+(FeedConsumption.total_consumed_kg) repartido según las proporciones de
+la mezcla usada ese día (FeedMixItem.proportion_pct). Los días sin mezcla
+asignada usan la última mezcla conocida.
+
+Con esa matriz días × ingredientes se calculan promedios móviles con
+NumPy sobre todo el historial y se proyectan los días de stock restantes
+a partir de FeedInventory.quantity.
+
+Caché:
+- El historial de consumo se guarda en caché y solo se vuelven a leer los
+  días cuyo registro cambió (por updated_at). La relectura parte de
+  change_feed.safe_high_water() de la lectura anterior, no del último
+  updated_at visto: updated_at es el inicio de la transacción, así que una
+  fila puede confirmarse después con una marca más antigua.
+- El pronóstico final se guarda por día y por marca de agua de consumo,
+  mezclas e inventario: cualquier movimiento nuevo lo invalida.
+"""
+import datetime
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from avicola.caching import get_or_compute
+from core import change_feed
+from core.models import FeedConsumption, FeedInventory, FeedMixItem
+
+
+SHORT_WINDOW_DAYS = 7
+LONG_WINDOW_DAYS = 28
+
+DEMAND_CACHE_KEY = 'feed_forecast:demand'
+FORECAST_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass
+class ItemForecast:
+    """Pronóstico de un ingrediente."""
+    feed_item_id: int
+    stock: float
+    daily_burn: float             # consumo promedio (FEED_FORECAST_WINDOW_DAYS)
+    trend: float                  # consumo 7 días / consumo 28 días (1.0 = estable)
+    days_remaining: float | None  # None si no hay consumo
+    reorder_date: datetime.date | None
+    status: str                   # 'reorder' | 'ok' | 'no_data'
+
+
+# ============================================================================
+# MARCAS DE AGUA
+# ============================================================================
+
+def _watermarks():
+    """
+    Última modificación y cantidad de filas de cada tabla de entrada, en
+    una sola consulta. Si cualquiera cambia, el pronóstico se recalcula.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT (SELECT MAX(updated_at) FROM feed_consumption),
+                   (SELECT COUNT(*) FROM feed_consumption),
+                   (SELECT MAX(updated_at) FROM feed_mix_item),
+                   (SELECT COUNT(*) FROM feed_mix_item),
+                   (SELECT MAX(updated_at) FROM feed_inventory)
+        """)
+        consumption_at, consumption_count, mix_at, mix_count, inventory_at = cursor.fetchone()
+
+    return {
+        'consumption': (consumption_at, consumption_count),
+        'mix': (mix_at, mix_count),
+        'inventory': inventory_at,
+    }
+
+
+# ============================================================================
+# HISTORIAL DE CONSUMO (incremental)
+# ============================================================================
+
+def _load_mix_proportions():
+    """Matriz mezclas × ingredientes con la fracción (0-1) de cada ingrediente."""
+    rows = list(
+        FeedMixItem.objects.filter(is_active=True)
+        .values_list('feed_mix_id', 'feed_item_id', 'proportion_pct')
+    )
+    mix_ids = sorted({mix_id for mix_id, _, _ in rows})
+    item_ids = sorted({item_id for _, item_id, _ in rows})
+    mix_index = {mix_id: i for i, mix_id in enumerate(mix_ids)}
+    item_index = {item_id: j for j, item_id in enumerate(item_ids)}
+
+    proportions = np.zeros((len(mix_ids), len(item_ids)))
+    for mix_id, item_id, pct in rows:
+        proportions[mix_index[mix_id], item_index[item_id]] += float(pct) / 100
+    return mix_index, item_ids, proportions
+
+
+def _read_consumption(state, since):
+    """Escribe en los arreglos del estado los registros de consumo desde `since`."""
+    rows = (
+        FeedConsumption.objects.filter(is_active=True, consumption_date__gte=since)
+        .values_list('consumption_date', 'feed_mix_id', 'total_consumed_kg')
+    )
+    start = state['start']
+    for consumption_date, mix_id, kg in rows:
+        day = (consumption_date - start).days
+        state['kg'][day] = float(kg)
+        state['recorded'][day] = True
+        state['mix'][day] = state['mix_index'].get(mix_id, -1)
+
+
+def _new_state(watermarks):
+    # Antes de leer: todo lo confirmado hasta aquí queda incluido
+    read_until = change_feed.safe_high_water()
+    bounds = FeedConsumption.objects.filter(is_active=True).aggregate(
+        first=Min('consumption_date'), last=Max('consumption_date')
+    )
+    mix_index, item_ids, proportions = _load_mix_proportions()
+    state = {
+        'start': bounds['first'] or timezone.localdate(),
+        'kg': np.zeros(0),
+        'recorded': np.zeros(0, dtype=bool),
+        'mix': np.zeros(0, dtype=np.int64),
+        'mix_index': mix_index,
+        'item_ids': item_ids,
+        'proportions': proportions,
+        'watermarks': watermarks,
+        'read_until': read_until,
+    }
+    if bounds['first'] is not None:
+        _resize(state, max(timezone.localdate(), bounds['last']))
+        _read_consumption(state, bounds['first'])
+    return state
+
+
+def _resize(state, until):
+    """Extiende los arreglos diarios hasta `until` (incluido)."""
+    n_days = (until - state['start']).days + 1
+    extra = n_days - len(state['kg'])
+    if extra > 0:
+        state['kg'] = np.concatenate([state['kg'], np.zeros(extra)])
+        state['recorded'] = np.concatenate([state['recorded'], np.zeros(extra, dtype=bool)])
+        state['mix'] = np.concatenate([state['mix'], np.full(extra, -1, dtype=np.int64)])
+
+
+def _may_have_missed(state, watermarks):
+    """
+    True si hay filas con updated_at posterior a la lectura segura anterior:
+    alguna pudo no estar confirmada entonces, aunque la marca de agua no
+    haya cambiado (una edición no cambia COUNT).
+    """
+    last_at = watermarks['consumption'][0]
+    return last_at is not None and last_at > state['read_until']
+
+
+def _load_demand_state(watermarks):
+    """
+    Historial de consumo diario desde la caché, actualizado solo con los
+    registros que cambiaron. Si cambiaron las mezclas o se borraron
+    registros se reconstruye completo.
+    """
+    state = cache.get(DEMAND_CACHE_KEY)
+    today = timezone.localdate()
+
+    if (
+        state is None
+        or 'read_until' not in state
+        or state['watermarks']['mix'] != watermarks['mix']
+        or watermarks['consumption'][1] < state['watermarks']['consumption'][1]
+    ):
+        state = _new_state(watermarks)
+    elif (
+        state['watermarks']['consumption'] != watermarks['consumption']
+        or _may_have_missed(state, watermarks)
+    ):
+        read_until = change_feed.safe_high_water()
+        changed_dates = list(
+            FeedConsumption.objects.filter(updated_at__gt=state['read_until'])
+            .values_list('consumption_date', flat=True)
+        )
+
+        if not changed_dates:
+            if state['watermarks']['consumption'] != watermarks['consumption']:
+                state = _new_state(watermarks)
+            else:
+                state['read_until'] = read_until
+                _resize(state, today)
+        elif min(changed_dates) < state['start']:
+            state = _new_state(watermarks)
+        else:
+            since = min(changed_dates)
+            _resize(state, max(today, max(changed_dates)))
+            # Limpiar los días a releer (un registro desactivado deja el día vacío)
+            offset = (since - state['start']).days
+            state['kg'][offset:] = 0
+            state['recorded'][offset:] = False
+            state['mix'][offset:] = -1
+            _read_consumption(state, since)
+            state['watermarks'] = watermarks
+            state['read_until'] = read_until
+    else:
+        _resize(state, today)
+
+    cache.set(DEMAND_CACHE_KEY, state, None)
+    return state
+
+
+def _daily_demand(state):
+    """Matriz días × ingredientes con los kg consumidos de cada ingrediente."""
+    mix = state['mix'].copy()
+    # Días con consumo pero sin mezcla: usar la última mezcla conocida
+    positions = np.where(mix >= 0, np.arange(len(mix)), 0)
+    np.maximum.accumulate(positions, out=positions)
+    mix = mix[positions]
+
+    proportions = np.vstack([state['proportions'], np.zeros((1, len(state['item_ids'])))])
+    # El índice -1 apunta a la fila de ceros agregada al final
+    return state['kg'][:, None] * proportions[mix]
+
+
+def _rolling_mean(demand, recorded, window):
+    """
+    Promedio móvil por ingrediente para todo el historial, contando solo
+    los días con registro. Devuelve un arreglo días × ingredientes.
+    """
+    n_days, n_items = demand.shape
+    sums = np.cumsum(np.vstack([np.zeros((1, n_items)), demand]), axis=0)
+    counts = np.cumsum(np.concatenate([[0], recorded.astype(np.int64)]))
+
+    lower = np.maximum(np.arange(1, n_days + 1) - window, 0)
+    upper = np.arange(1, n_days + 1)
+    window_sums = sums[upper] - sums[lower]
+    window_counts = counts[upper] - counts[lower]
+    return window_sums / np.maximum(window_counts, 1)[:, None]
+
+
+# ============================================================================
+# PRONÓSTICO
+# ============================================================================
+
+def _compute_forecast(today, watermarks):
+    state = _load_demand_state(watermarks)
+    item_ids = state['item_ids']
+    if not item_ids or not len(state['kg']):
+        return {}
+
+    # Ventanas terminadas hoy (state cubre hasta hoy)
+    end = (today - state['start']).days + 1
+    if end <= 0:
+        return {}
+    demand = _daily_demand(state)[:end]
+    recorded = state['recorded'][:end]
+
+    window = getattr(settings, 'FEED_FORECAST_WINDOW_DAYS', 14)
+    burn = _rolling_mean(demand, recorded, window)[-1]
+    short = _rolling_mean(demand, recorded, SHORT_WINDOW_DAYS)[-1]
+    long = _rolling_mean(demand, recorded, LONG_WINDOW_DAYS)[-1]
+
+    stock_by_item = dict(
+        FeedInventory.objects.filter(feed_item_id__in=item_ids)
+        .values_list('feed_item_id', 'quantity')
+    )
+    stock = np.array([float(stock_by_item.get(item_id, 0)) for item_id in item_ids])
+
+    lead_days = getattr(settings, 'FEED_REORDER_LEAD_DAYS', 7)
+    safety_days = getattr(settings, 'FEED_SAFETY_STOCK_DAYS', 3)
+
+    safe_burn = np.where(burn > 0, burn, 1)
+    days_remaining = stock / safe_burn
+    reorder_point = burn * (lead_days + safety_days)
+    days_to_reorder = np.maximum(np.floor((stock - reorder_point) / safe_burn), 0)
+    trend = np.where(long > 0, short / np.where(long > 0, long, 1), 1.0)
+
+    forecast = {}
+    for j, item_id in enumerate(item_ids):
+        if burn[j] <= 0:
+            forecast[item_id] = ItemForecast(
+                item_id, float(stock[j]), 0.0, 1.0, None, None, 'no_data'
+            )
+            continue
+        forecast[item_id] = ItemForecast(
+            feed_item_id=item_id,
+            stock=round(float(stock[j]), 2),
+            daily_burn=round(float(burn[j]), 2),
+            trend=round(float(trend[j]), 2),
+            days_remaining=round(float(days_remaining[j]), 1),
+            reorder_date=today + datetime.timedelta(days=int(days_to_reorder[j])),
+            status='reorder' if stock[j] <= reorder_point[j] else 'ok',
+        )
+    return forecast
+
+
+def get_feed_forecast():
+    """
+    Pronóstico de todos los ingredientes: {feed_item_id: ItemForecast}.
+
+    Se guarda en caché por día; un consumo, mezcla o movimiento nuevo
+    cambia la marca de agua y fuerza el recálculo.
+    """
+    today = timezone.localdate()
+    watermarks = _watermarks()
+    digest = hashlib.md5(repr(sorted(watermarks.items())).encode()).hexdigest()[:16]
+    key = f'feed_forecast:{today.isoformat()}:{digest}'
+
+    return get_or_compute(
+        'feed_forecast', key,
+        lambda: _compute_forecast(today, watermarks),
+        FORECAST_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,460 @@
+"""
+Servicio de Inventario de Alimentos - Libro de movimientos y mezclas.
+
+Todo cambio de stock pasa por apply_movements: en una sola transacción
+suma o resta las cantidades con `UPDATE ... SET quantity = quantity + x`
+(nunca leer-modificar-guardar en Python) y registra los
+FeedInventoryMovement. Si algún item quedaría con stock negativo no se
+aplica nada.
+
+Las mezclas usan el mismo libro, con un número fijo de consultas sin
+importar cuántos items tengan:
+1. Se validan todas las líneas antes de escribir nada
+2. Proporciones y costo se calculan en memoria
+3. Items, movimientos y descuentos de stock se escriben en bloque
+
+El stock en una fecha pasada se obtiene del snapshot más cercano
+(feed_inventory_snapshot) más los movimientos posteriores, sin recorrer
+todo el historial.
+"""
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+
+from core.models import (
+    FeedInventory, FeedInventoryMovement, FeedItem, FeedMixItem,
+)
+
+
+class InventoryError(Exception):
+    """Error de negocio del inventario; `errors` trae los mensajes para el usuario."""
+
+    def __init__(self, errors):
+        if isinstance(errors, str):
+            errors = [errors]
+        self.errors = list(errors)
+        super().__init__('; '.join(self.errors))
+
+
+# ============================================================================
+# LIBRO DE MOVIMIENTOS
+# ============================================================================
+
+# Signo con que cada tipo de movimiento afecta al stock
+MOVEMENT_SIGNS = {
+    'purchase': 1,
+    'usage': -1,
+    'waste': -1,
+}
+
+# Umbrales de stock para los indicadores del inventario
+LOW_STOCK_THRESHOLD = Decimal('10')
+MEDIUM_STOCK_THRESHOLD = Decimal('50')
+
+
+def ensure_inventory_rows(feed_items, user_id=None):
+    """
+    Crea en 0 la fila de inventario de los items que no la tengan, en una
+    sola consulta (INSERT ... ON CONFLICT DO NOTHING).
+    """
+    FeedInventory.objects.bulk_create(
+        [
+            FeedInventory(
+                feed_item_id=item.pk,
+                quantity=0,
+                unit_type=item.unit_type,
+                created_by=user_id,
+            )
+            for item in feed_items
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def apply_movement(movement, user_id):
+    """Aplica un solo movimiento (ver apply_movements). Devuelve el stock resultante."""
+    return apply_movements([movement], user_id)[movement.feed_item_id]
+
+
+def apply_movements(movements, user_id):
+    """
+    Guarda los FeedInventoryMovement (sin guardar aún) y aplica su efecto
+    al inventario, todo en una transacción.
+
+    Sirve tanto para un movimiento suelto como para una entrega de muchos
+    items: el número de consultas no depende de la cantidad de movimientos.
+    Lanza InventoryError si algún item quedaría con stock negativo.
+
+    Devuelve {feed_item_id: cantidad resultante}.
+    """
+    deltas = {}
+    items = {}
+    for movement in movements:
+        sign = MOVEMENT_SIGNS[movement.movement_type]
+        item = movement.feed_item
+        items[item.pk] = item
+        deltas[item.pk] = deltas.get(item.pk, Decimal('0')) + sign * abs(movement.quantity)
+
+        if not movement.unit_type:
+            movement.unit_type = item.unit_type
+        movement.created_by = user_id
+
+    item_ids = sorted(deltas)
+
+    with transaction.atomic():
+        ensure_inventory_rows([items[item_id] for item_id in item_ids], user_id)
+
+        # Bloquear en orden de item para que dos transacciones no se crucen
+        list(
+            FeedInventory.objects.select_for_update()
+            .filter(feed_item_id__in=item_ids)
+            .order_by('feed_item_id')
+            .values_list('pk', flat=True)
+        )
+
+        new_quantities = _update_stock(deltas, user_id)
+
+        rejected = [item_id for item_id in item_ids if item_id not in new_quantities]
+        if rejected:
+            stock = dict(
+                FeedInventory.objects.filter(feed_item_id__in=rejected)
+                .values_list('feed_item_id', 'quantity')
+            )
+            raise InventoryError([
+                f'Stock insuficiente de {items[item_id].item_name}. '
+                f'Disponible: {stock.get(item_id, 0)} {items[item_id].unit_type}'
+                for item_id in rejected
+            ])
+
+        FeedInventoryMovement.objects.bulk_create(movements)
+
+        # Movimientos con fecha pasada: corregir los snapshots posteriores
+        _shift_snapshots(movements)
+
+    return new_quantities
+
+
+def _shift_snapshots(movements):
+    """
+    Suma la cantidad con signo de cada movimiento a los snapshots de su
+    item desde la fecha del movimiento (diarios y mensuales), en un solo
+    UPDATE. Así los snapshots siguen cuadrando sin borrarlos ni
+    regenerarlos. Los movimientos de hoy no tocan ninguna fila.
+    """
+    deltas = defaultdict(Decimal)
+    for movement in movements:
+        sign = MOVEMENT_SIGNS[movement.movement_type]
+        deltas[(movement.feed_item_id, movement.movement_date)] += sign * abs(movement.quantity)
+
+    values_sql = ', '.join(['(%s::bigint, %s::date, %s::numeric)'] * len(deltas))
+    params = []
+    for (item_id, movement_date), delta in deltas.items():
+        params.extend([item_id, movement_date, delta])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE feed_inventory_snapshot AS s
+               SET quantity = s.quantity + d.delta
+              FROM (
+                    SELECT s2.id, SUM(v.delta) AS delta
+                      FROM feed_inventory_snapshot s2
+                      JOIN (VALUES {values_sql}) AS v(feed_item_id, movement_date, delta)
+                        ON v.feed_item_id = s2.feed_item_id
+                       AND s2.snapshot_date >= v.movement_date
+                     GROUP BY s2.id
+                   ) AS d
+             WHERE s.id = d.id
+            """,
+            params,
+        )
+
+
+def _update_stock(deltas, user_id):
+    """
+    Suma cada delta a su fila de inventario en un solo UPDATE.
+
+    Las filas que quedarían en negativo no se actualizan y no aparecen en
+    el resultado ({feed_item_id: cantidad nueva}).
+    """
+    values_sql = ', '.join(['(%s::bigint, %s::numeric)'] * len(deltas))
+    params = [user_id]
+    for item_id, delta in deltas.items():
+        params.extend([item_id, delta])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE feed_inventory AS inv
+               SET quantity = inv.quantity + v.delta,
+                   last_updated = NOW(),
+                   updated_by = %s
+              FROM (VALUES {values_sql}) AS v(feed_item_id, delta)
+             WHERE inv.feed_item_id = v.feed_item_id
+               AND inv.quantity + v.delta >= 0
+         RETURNING inv.feed_item_id, inv.quantity
+            """,
+            params,
+        )
+        return dict(cursor.fetchall())
+
+
+# ============================================================================
+# SNAPSHOTS Y STOCK HISTÓRICO
+# ============================================================================
+
+# Cantidad con signo de un movimiento (alias `m`), según MOVEMENT_SIGNS
+_SIGNED_QUANTITY_SQL = 'CASE m.movement_type {} END'.format(' '.join(
+    f"WHEN '{movement_type}' THEN {sign} * ABS(m.quantity)"
+    for movement_type, sign in MOVEMENT_SIGNS.items()
+))
+
+
+def stock_as_of(as_of, feed_item_ids=None, use_snapshots=True):
+    """
+    Stock de cada item al cierre del día `as_of`: {feed_item_id: cantidad}.
+
+    Parte del snapshot más cercano (<= as_of) y suma solo los movimientos
+    posteriores. Con use_snapshots=False recorre todos los movimientos
+    (lo usa reconcile_inventory para comparar contra el libro completo).
+    """
+    params = {'as_of': as_of}
+    item_filter = ''
+    if feed_item_ids is not None:
+        item_filter = 'WHERE fi.id = ANY(%(ids)s)'
+        params['ids'] = list(feed_item_ids)
+
+    if use_snapshots:
+        snapshot_join = """
+          LEFT JOIN LATERAL (
+                SELECT snapshot_date, quantity
+                  FROM feed_inventory_snapshot
+                 WHERE feed_item_id = fi.id AND snapshot_date <= %(as_of)s
+                 ORDER BY snapshot_date DESC
+                 LIMIT 1
+          ) s ON TRUE
+        """
+    else:
+        snapshot_join = 'LEFT JOIN (SELECT NULL::date AS snapshot_date, NULL::numeric AS quantity) s ON TRUE'
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT fi.id, COALESCE(s.quantity, 0) + COALESCE(SUM({_SIGNED_QUANTITY_SQL}), 0)
+              FROM feed_item fi
+              {snapshot_join}
+              LEFT JOIN feed_inventory_movement m
+                ON m.feed_item_id = fi.id
+               AND m.is_active
+               AND m.movement_date <= %(as_of)s
+               AND (s.snapshot_date IS NULL OR m.movement_date > s.snapshot_date)
+              {item_filter}
+             GROUP BY fi.id, s.quantity
+            """,
+            params,
+        )
+        return dict(cursor.fetchall())
+
+
+def stock_history(feed_item_id, start, end):
+    """
+    Stock diario de un item entre `start` y `end` (ambos incluidos), para
+    gráficos: lista de (fecha, cantidad). Usa dos consultas.
+    """
+    opening = stock_as_of(start - datetime.timedelta(days=1), [feed_item_id]).get(feed_item_id, Decimal('0'))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT m.movement_date, SUM({_SIGNED_QUANTITY_SQL})
+              FROM feed_inventory_movement m
+             WHERE m.feed_item_id = %s
+               AND m.is_active
+               AND m.movement_date BETWEEN %s AND %s
+             GROUP BY m.movement_date
+            """,
+            [feed_item_id, start, end],
+        )
+        daily_delta = defaultdict(Decimal, cursor.fetchall())
+
+    history = []
+    quantity = opening
+    day = start
+    while day <= end:
+        quantity += daily_delta[day]
+        history.append((day, quantity))
+        day += datetime.timedelta(days=1)
+    return history
+
+
+def write_snapshots(snapshot_date, period='daily', user_id=None):
+    """
+    Guarda el stock de todos los items activos al cierre de `snapshot_date`
+    en una sola consulta, partiendo del snapshot anterior de cada item.
+    Si ya existía un snapshot para esa fecha se reemplaza.
+
+    Devuelve la cantidad de filas escritas.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO feed_inventory_snapshot
+                   (feed_item_id, snapshot_date, period, quantity, movement_count, created_by)
+            SELECT fi.id, %(date)s, %(period)s,
+                   COALESCE(s.quantity, 0) + COALESCE(SUM({_SIGNED_QUANTITY_SQL}), 0),
+                   COUNT(m.id),
+                   %(user_id)s
+              FROM feed_item fi
+              LEFT JOIN LATERAL (
+                    SELECT snapshot_date, quantity
+                      FROM feed_inventory_snapshot
+                     WHERE feed_item_id = fi.id AND snapshot_date < %(date)s
+                     ORDER BY snapshot_date DESC
+                     LIMIT 1
+              ) s ON TRUE
+              LEFT JOIN feed_inventory_movement m
+                ON m.feed_item_id = fi.id
+               AND m.is_active
+               AND m.movement_date <= %(date)s
+               AND (s.snapshot_date IS NULL OR m.movement_date > s.snapshot_date)
+             WHERE fi.is_active
+             GROUP BY fi.id, s.quantity
+            ON CONFLICT (feed_item_id, snapshot_date) DO UPDATE
+               SET quantity = EXCLUDED.quantity,
+                   movement_count = EXCLUDED.movement_count,
+                   period = CASE WHEN feed_inventory_snapshot.period = 'monthly'
+                                 THEN 'monthly' ELSE EXCLUDED.period END,
+                   created_at = NOW(),
+                   created_by = EXCLUDED.created_by
+            """,
+            {'date': snapshot_date, 'period': period, 'user_id': user_id},
+        )
+        return cursor.rowcount
+
+
+# ============================================================================
+# MEZCLAS
+# ============================================================================
+
+@dataclass(frozen=True)
+class MixLine:
+    """Una línea de la mezcla: item del catálogo y cantidad a usar."""
+    feed_item: FeedItem
+    quantity: Decimal
+
+
+def parse_mix_lines(data, available_items):
+    """
+    Lee las cantidades `item_<pk>_quantity` del formulario.
+
+    Valida todas las líneas de una vez y lanza InventoryError con la lista
+    completa de problemas. El stock se vuelve a comprobar con las filas
+    bloqueadas en create_feed_mix.
+    """
+    lines = []
+    errors = []
+
+    for item in available_items:
+        quantity_str = data.get(f'item_{item.pk}_quantity', '').strip()
+        if not quantity_str:
+            continue
+
+        try:
+            quantity = Decimal(quantity_str)
+        except InvalidOperation:
+            errors.append(f'Cantidad inválida para {item.item_name}: "{quantity_str}"')
+            continue
+
+        if quantity < 0:
+            errors.append(f'La cantidad de {item.item_name} no puede ser negativa')
+        elif quantity > 0:
+            lines.append(MixLine(item, quantity))
+
+    if not lines and not errors:
+        errors.append('Debes indicar la cantidad de al menos un item')
+    if errors:
+        raise InventoryError(errors)
+    return lines
+
+
+def create_feed_mix(mix, lines, user_id):
+    """
+    Guarda la mezcla, descuenta el stock de sus items y agrega el
+    resultado al inventario como un nuevo item "Producción Propia".
+
+    Devuelve el FeedItem de la mezcla. Si algún item no tiene stock
+    suficiente lanza InventoryError y no se guarda nada.
+    """
+    total_weight = sum((line.quantity for line in lines), Decimal('0'))
+    total_cost = sum(
+        (line.feed_item.unit_cost_clp * line.quantity for line in lines), Decimal('0')
+    )
+    unit_cost = (total_cost / total_weight).quantize(Decimal('0.01'))
+
+    with transaction.atomic():
+        mix.total_weight_kg = total_weight
+        mix.created_by = user_id
+        mix.save()
+
+        FeedMixItem.objects.bulk_create([
+            FeedMixItem(
+                feed_mix=mix,
+                feed_item=line.feed_item,
+                weight_kg=line.quantity,
+                proportion_pct=(line.quantity / total_weight * 100).quantize(Decimal('0.01')),
+                created_by=user_id,
+            )
+            for line in lines
+        ])
+
+        mix_feed_item = _get_mix_feed_item(mix, unit_cost, user_id)
+
+        reference = f'Mezcla del {mix.mix_date}'
+        movements = [
+            FeedInventoryMovement(
+                feed_item=line.feed_item,
+                movement_type='usage',
+                quantity=line.quantity,
+                movement_date=mix.mix_date,
+                reference=reference,
+            )
+            for line in lines
+        ]
+        movements.append(FeedInventoryMovement(
+            feed_item=mix_feed_item,
+            movement_type='purchase',
+            quantity=total_weight,
+            unit_type='kg',
+            movement_date=mix.mix_date,
+            reference='Producción de mezcla',
+            unit_cost_clp=unit_cost,
+        ))
+        apply_movements(movements, user_id)
+
+    return mix_feed_item
+
+
+def _get_mix_feed_item(mix, unit_cost, user_id):
+    """Crea (o actualiza el costo de) el item de catálogo que representa la mezcla."""
+    timestamp = datetime.datetime.now().strftime('%H:%M')
+    mix_name = f"Mezcla {mix.mix_date.strftime('%d/%m/%Y')} {timestamp}"
+    if mix.description:
+        mix_name = f"{mix.description} ({mix.mix_date.strftime('%d/%m/%Y')} {timestamp})"
+
+    mix_feed_item, created = FeedItem.objects.get_or_create(
+        item_name=mix_name,
+        defaults={
+            'supplier_name': 'Producción Propia',
+            'unit_cost_clp': unit_cost,
+            'unit_type': 'kg',
+            'created_by': user_id,
+        }
+    )
+    if not created:
+        FeedItem.objects.filter(pk=mix_feed_item.pk).update(
+            unit_cost_clp=unit_cost, updated_by=user_id
+        )
+    return mix_feed_item
@@ -0,0 +1,341 @@
+"""
+Pruebas de carga - Reproduce mezclas de tráfico realistas de la granja
+sobre los datos de seed_benchmark_data (ver el comando loadtest).
+
+Cada perfil es un tipo de usuario con su rol y acciones con peso:
+- mixed: el administrador, un poco de todo
+- barn: el trabajador del galpón (producción, mortalidad, visión)
+- office: el contador (finanzas, resumen mensual, exportaciones)
+
+Cada hilo es un usuario que elige acciones al azar según los pesos y las
+ejecuta sin pausa (o con --think segundos entre acciones). Las listas se
+recorren siguiendo el link "Siguiente" (cursor `after`) de pagination.html.
+
+Dos transportes:
+- En proceso (por defecto): django.test.Client con force_login, sin
+  servidor. Mide vistas, middleware, templates y base de datos; cuenta las
+  consultas con connection.execute_wrapper en el hilo de cada usuario.
+- HTTP (--url): urllib contra un servidor ya levantado (runserver, gunicorn
+  o uvicorn), con login por el formulario. Las consultas se leen del header
+  Server-Timing, así que solo aparecen con PROFILING_ENABLED=True.
+"""
+import html
+import http.cookiejar
+import io
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import FinanceCategory, FinanceSummary
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:  # sin Pillow no hay subidas de visión
+    Image = None
+
+
+# Listas que recorre cada perfil
+PRODUCTION_LISTS = ['farm_status_list', 'egg_production_list', 'mortality_list']
+FEED_LISTS = ['feed_item_list', 'feed_mix_list', 'feed_consumption_list', 'feed_inventory_list', 'feed_inventory_movements']
+FINANCE_LISTS = ['finance_category_list', 'finance_transaction_list']
+
+# perfil: (rol, listas, {acción: peso})
+PROFILES = {
+    'mixed': ('admin', PRODUCTION_LISTS + FEED_LISTS + FINANCE_LISTS, {
+        'dashboard': 20, 'browse': 35, 'summary': 10, 'export_pdf': 3, 'export_excel': 3,
+        'post_mortality': 5, 'post_transaction': 5, 'vision_upload': 2,
+    }),
+    'barn': ('worker', PRODUCTION_LISTS + FEED_LISTS, {
+        'dashboard': 25, 'browse': 45, 'post_mortality': 15, 'vision_upload': 10,
+    }),
+    'office': ('accountant', FINANCE_LISTS + ['feed_inventory_movements'], {
+        'dashboard': 15, 'browse': 40, 'summary': 20, 'export_pdf': 8, 'export_excel': 7,
+        'post_transaction': 15,
+    }),
+}
+WRITE_ACTIONS = {'post_mortality', 'post_transaction', 'vision_upload'}
+
+NEXT_LINK = re.compile(r'href="(\?[^"]*after=[^"]*)"')
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano de una lista ordenada."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def egg_image(rng, size=(640, 480), eggs=12):
+    """JPEG sintético: huevos (elipses claras) sobre fondo oscuro. None sin Pillow."""
+    if Image is None:
+        return None
+    image = Image.new('RGB', size, (60, 45, 35))
+    draw = ImageDraw.Draw(image)
+    for _ in range(eggs):
+        x, y = rng.randint(40, size[0] - 80), rng.randint(40, size[1] - 100)
+        draw.ellipse((x, y, x + 45, y + 60), fill=(235, 215, 180), outline=(200, 180, 150))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class Stats:
+    """Resultados por endpoint, compartidos por todos los hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def record(self, endpoint, seconds, status, queries):
+        with self._lock:
+            entry = self._data.setdefault(endpoint, {'latencies': [], 'statuses': [], 'queries': []})
+            entry['latencies'].append(seconds)
+            entry['statuses'].append(status)
+            if queries is not None:
+                entry['queries'].append(queries)
+
+    def report(self, seconds):
+        """Una fila por endpoint: peticiones, errores, 429, pet/s, latencias (ms) y consultas."""
+        rows = []
+        for endpoint, entry in sorted(self._data.items()):
+            latencies = sorted(entry['latencies'])
+            queries = entry['queries']
+            rows.append({
+                'endpoint': endpoint,
+                'requests': len(latencies),
+                'errors': sum(1 for status in entry['statuses'] if status == 0 or (status >= 400 and status != 429)),
+                'throttled': entry['statuses'].count(429),
+                'rps': len(latencies) / seconds,
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'p95_ms': percentile(latencies, 95) * 1000,
+                'p99_ms': percentile(latencies, 99) * 1000,
+                'max_ms': latencies[-1] * 1000,
+                'avg_queries': sum(queries) / len(queries) if queries else None,
+                'max_queries': max(queries) if queries else None,
+            })
+        return rows
+
+
+class InProcessSession:
+    """Usuario que llama a las vistas con django.test.Client (sin servidor)."""
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            if method == 'POST':
+                response = self.client.post(path, data or {})
+            else:
+                response = self.client.get(path)
+        body = b'' if getattr(response, 'streaming', False) else response.content
+        return response.status_code, body, queries[0]
+
+    def close(self):
+        connection.close()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Medir cada petición por separado: el redirect tras un POST no se sigue
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """Usuario que habla HTTP con un servidor levantado, con sesión por cookie."""
+
+    def __init__(self, base_url, email, password):
+        self.base_url = base_url.rstrip('/')
+        self.jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar), _NoRedirect)
+        self.opener.open(f'{self.base_url}/login/').read()
+        status, _, _ = self.request('POST', '/login/', {'email': email, 'password': password})
+        if not any(cookie.name == 'sessionid' for cookie in self.jar):
+            raise RuntimeError(f'No se pudo iniciar sesión como {email} (estado {status})')
+
+    def _csrf(self):
+        return next((cookie.value for cookie in self.jar if cookie.name == 'csrftoken'), '')
+
+    def request(self, method, path, data=None):
+        url = self.base_url + path
+        if method == 'POST':
+            data = {**(data or {}), 'csrfmiddlewaretoken': self._csrf()}
+            if any(hasattr(value, 'read') for value in data.values()):
+                request = urllib.request.Request(
+                    url, encode_multipart(BOUNDARY, data), {'Content-Type': MULTIPART_CONTENT},
+                )
+            else:
+                request = urllib.request.Request(url, urllib.parse.urlencode(data).encode())
+            request.add_header('Referer', url)
+        else:
+            request = urllib.request.Request(url)
+
+        try:
+            with self.opener.open(request, timeout=120) as response:
+                status, body, headers = response.status, response.read(), response.headers
+        except urllib.error.HTTPError as exc:
+            status, body, headers = exc.code, exc.read(), exc.headers
+
+        match = SERVER_TIMING_QUERIES.search(headers.get('Server-Timing', ''))
+        return status, body, int(match.group(1)) if match else None
+
+    def close(self):
+        pass
+
+
+class Workload:
+    """Acciones de un perfil sobre una sesión; registra cada petición en `stats`."""
+
+    def __init__(self, profile, session, stats, rng, months, category_ids, read_only=False, max_pages=3):
+        self.role, self.lists, weights = PROFILES[profile]
+        if read_only:
+            weights = {action: weight for action, weight in weights.items() if action not in WRITE_ACTIONS}
+        if Image is None:
+            weights = {action: weight for action, weight in weights.items() if action != 'vision_upload'}
+        self.actions = list(weights)
+        self.weights = list(weights.values())
+        self.session = session
+        self.stats = stats
+        self.rng = rng
+        self.months = months
+        self.category_ids = category_ids
+        self.max_pages = max_pages
+
+    def call(self, endpoint, method, path, data=None):
+        start = time.perf_counter()
+        try:
+            status, body, queries = self.session.request(method, path, data)
+        except (OSError, urllib.error.URLError):
+            status, body, queries = 0, b'', None
+        self.stats.record(endpoint, time.perf_counter() - start, status, queries)
+        return status, body
+
+    def step(self):
+        action = self.rng.choices(self.actions, self.weights)[0]
+        getattr(self, action)()
+
+    def dashboard(self):
+        self.call('dashboard', 'GET', reverse('dashboard'))
+
+    def browse(self):
+        """Una lista y luego hasta max_pages páginas más siguiendo el cursor."""
+        name = self.rng.choice(self.lists)
+        path = reverse(name)
+        status, body = self.call(name, 'GET', path)
+        for _ in range(self.rng.randint(0, self.max_pages)):
+            match = NEXT_LINK.search(body.decode(errors='ignore')) if status == 200 else None
+            if not match:
+                break
+            status, body = self.call(f'{name}?after', 'GET', path + html.unescape(match.group(1)))
+
+    def _month_query(self):
+        year, month = self.rng.choice(self.months)
+        return f'?month={month}&year={year}'
+
+    def summary(self):
+        self.call('financial_summary', 'GET', reverse('financial_summary') + self._month_query())
+
+    def export_pdf(self):
+        self.call('export_financial_pdf', 'GET', reverse('export_financial_pdf') + self._month_query())
+
+    def export_excel(self):
+        self.call('export_financial_excel', 'GET', reverse('export_financial_excel') + self._month_query())
+
+    def post_mortality(self):
+        self.call('mortality_create', 'POST', reverse('mortality_create'), {
+            'event_date': timezone.localdate().isoformat(),
+            'bird_type': self.rng.choice(['hen', 'hen', 'juvenile', 'male']),
+            'quantity': self.rng.randint(1, 3),
+            'cause': 'Prueba de carga',
+            'notes': '',
+        })
+
+    def post_transaction(self):
+        self.call('finance_transaction_create', 'POST', reverse('finance_transaction_create'), {
+            'transaction_date': timezone.localdate().isoformat(),
+            'category': self.rng.choice(self.category_ids),
+            'description': 'Prueba de carga',
+            'amount_clp': f'{self.rng.uniform(5_000, 200_000):.2f}',
+            'payment_method': self.rng.choice(['Efectivo', 'Transferencia', 'Tarjeta Débito']),
+            'reference_doc': '',
+        })
+
+    def vision_upload(self):
+        image = SimpleUploadedFile('huevos.jpg', egg_image(self.rng, eggs=self.rng.randint(6, 30)), 'image/jpeg')
+        self.call('vision_count_eggs', 'POST', reverse('vision_count_eggs'), {
+            'production_date': timezone.localdate().isoformat(),
+            'size_code': self.rng.choice(['small', 'medium', 'large']),
+            'image': image,
+        })
+
+
+def workload_data():
+    """Meses con datos (para resumen y exportaciones) e ids de categorías financieras."""
+    months = [
+        (int(year_month[:4]), int(year_month[5:7]))
+        for year_month in FinanceSummary.objects.values_list('year_month', flat=True)
+    ]
+    if not months:
+        today = timezone.localdate()
+        months = [(today.year, today.month)]
+    category_ids = list(FinanceCategory.objects.filter(is_active=True).values_list('id', flat=True))
+    return months, category_ids
+
+
+def run(profile, make_session, threads=4, seconds=30, warmup=5, think=0, read_only=False, seed=42):
+    """
+    Corre `threads` usuarios del perfil durante `warmup` + `seconds`
+    segundos; solo se registra lo posterior al calentamiento.
+    make_session() crea la sesión de cada hilo. Devuelve (filas de
+    Stats.report, excepciones de los hilos que no pudieron iniciar sesión).
+    """
+    months, category_ids = workload_data()
+    stats, discarded = Stats(), Stats()
+    failures = []
+    measure_from = time.monotonic() + warmup
+    deadline = measure_from + seconds
+
+    def user(index):
+        try:
+            session = make_session()
+        except Exception as exc:  # un usuario que no inicia sesión no debe botar la corrida
+            failures.append(exc)
+            return
+        try:
+            workload = Workload(
+                profile, session, discarded, random.Random(seed + index), months, category_ids, read_only,
+            )
+            while time.monotonic() < deadline:
+                workload.stats = stats if time.monotonic() >= measure_from else discarded
+                workload.step()
+                if think:
+                    time.sleep(workload.rng.expovariate(1 / think))
+        finally:
+            session.close()
+
+    workers = [threading.Thread(target=user, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return stats.report(seconds), failures
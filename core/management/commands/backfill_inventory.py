@@ -0,0 +1,36 @@
+"""
+Crea la fila de inventario (en 0) de los items que no la tengan.
+
+Desde que feed_item_create crea el inventario junto con el item, solo
+hace falta una vez para los items antiguos:
+    python manage.py backfill_inventory
+"""
+from django.core.management.base import BaseCommand
+
+from core.inventory_service import ensure_inventory_rows
+from core.models import FeedItem
+
+
+class Command(BaseCommand):
+    help = 'Crea en bloque las filas de inventario faltantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        missing = FeedItem.objects.filter(inventory__isnull=True).only('id', 'unit_type').order_by('id')
+        batch_size = options['batch_size']
+
+        created = 0
+        batch = []
+        for item in missing.iterator(chunk_size=batch_size):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                ensure_inventory_rows(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            ensure_inventory_rows(batch)
+            created += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Filas de inventario creadas: {created}'))
@@ -0,0 +1,111 @@
+"""
+Prueba de carga con mezclas de tráfico de la granja (ver core/loadtest.py).
+
+Usa los usuarios y datos de seed_benchmark_data: cada perfil inicia sesión
+con el usuario bench-<rol>@avicola.local. Reporta por endpoint peticiones,
+errores, rechazos 429, peticiones/segundo, latencias p50 / p95 / p99 / máx
+y consultas SQL promedio / máx por petición. Las acciones de escritura
+(mortalidad, transacciones) agregan filas con la fecha de hoy: usar
+--read-only para no modificar los datos.
+
+Uso:
+    python manage.py seed_benchmark_data --years 3
+    python manage.py loadtest --profile mixed --threads 8 --seconds 60
+    python manage.py loadtest --profile office --read-only --json > office.json
+    python manage.py loadtest --profile barn --url http://127.0.0.1:8000
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from core import loadtest
+from core.benchmark_data import BENCHMARK_PASSWORD, BENCHMARK_USERS
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = 'Reproduce tráfico realista con usuarios concurrentes y reporta latencias y consultas por endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=list(loadtest.PROFILES), default='mixed', help='Mezcla de tráfico')
+        parser.add_argument('--threads', type=int, default=4, help='Usuarios simultáneos')
+        parser.add_argument('--seconds', type=float, default=30, help='Duración de la medición')
+        parser.add_argument('--warmup', type=float, default=5, help='Segundos iniciales que no se registran')
+        parser.add_argument('--think', type=float, default=0, help='Pausa promedio entre acciones (segundos)')
+        parser.add_argument('--read-only', action='store_true', help='Sin acciones de escritura')
+        parser.add_argument('--url', help='Probar un servidor levantado en esta URL en vez de en proceso')
+        parser.add_argument('--password', default=BENCHMARK_PASSWORD, help='Contraseña de los usuarios (con --url)')
+        parser.add_argument(
+            '--no-throttle', action='store_true',
+            help='Desactivar los límites de peticiones (solo en proceso)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Semilla de la elección de acciones')
+        parser.add_argument('--json', action='store_true', help='Resultado en JSON')
+
+    def handle(self, *args, **options):
+        role = loadtest.PROFILES[options['profile']][0]
+        email = BENCHMARK_USERS[role]
+
+        overrides = {}
+        if options['url']:
+            def make_session():
+                return loadtest.HttpSession(options['url'], email, options['password'])
+        else:
+            user = User.objects.filter(email=email, is_active=True).first()
+            if user is None:
+                raise CommandError(f'No existe {email}: correr antes seed_benchmark_data')
+
+            def make_session():
+                return loadtest.InProcessSession(user)
+
+            # django.test.Client usa el host 'testserver'
+            if '*' not in settings.ALLOWED_HOSTS:
+                overrides['ALLOWED_HOSTS'] = [*settings.ALLOWED_HOSTS, 'testserver']
+            if options['no_throttle']:
+                overrides['THROTTLE_ENABLED'] = False
+
+        with override_settings(**overrides):
+            rows, failures = loadtest.run(
+                options['profile'], make_session,
+                threads=options['threads'], seconds=options['seconds'], warmup=options['warmup'],
+                think=options['think'], read_only=options['read_only'], seed=options['seed'],
+            )
+
+        if failures and len(failures) == options['threads']:
+            raise CommandError(f'Ningún usuario pudo iniciar sesión: {failures[0]}')
+        for exc in failures:
+            self.stderr.write(f'Usuario descartado: {exc}')
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'profile': options['profile'],
+                'threads': options['threads'] - len(failures),
+                'seconds': options['seconds'],
+                'transport': 'http' if options['url'] else 'in-process',
+                'endpoints': rows,
+            }, indent=2))
+            return
+        self._print_table(rows, options)
+
+    def _print_table(self, rows, options):
+        self.stdout.write(
+            f"Perfil {options['profile']}, {options['threads']} usuarios, {options['seconds']:.0f}s "
+            f"({'HTTP ' + options['url'] if options['url'] else 'en proceso'})"
+        )
+        self.stdout.write(
+            f"{'endpoint':<34} {'pet':>6} {'err':>4} {'429':>4} {'pet/s':>7} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8} {'máx':>8} {'sql':>6} {'sql máx':>7}"
+        )
+        for row in rows:
+            queries = f"{row['avg_queries']:>6.1f} {row['max_queries']:>7}" if row['avg_queries'] is not None else f"{'-':>6} {'-':>7}"
+            self.stdout.write(
+                f"{row['endpoint']:<34} {row['requests']:>6} {row['errors']:>4} {row['throttled']:>4} {row['rps']:>7.1f} "
+                f"{row['p50_ms']:>6.0f}ms {row['p95_ms']:>6.0f}ms {row['p99_ms']:>6.0f}ms {row['max_ms']:>6.0f}ms {queries}"
+            )
+        total = sum(row['requests'] for row in rows)
+        errors = sum(row['errors'] for row in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Total: {total} peticiones, {total / options['seconds']:.1f} pet/s, {errors} errores"
+        ))
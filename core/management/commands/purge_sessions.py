@@ -0,0 +1,65 @@
+"""
+Borra las sesiones vencidas de django_session por lotes.
+
+A diferencia de clearsessions (un solo DELETE sobre toda la tabla), borra
+de a --batch-size filas usando el índice de expire_date, así no bloquea la
+tabla ni genera una transacción enorme. Con SESSION_BACKEND=cache o
+signed_cookies la tabla no se usa y no hay nada que borrar.
+
+Uso (cron diario):
+    python manage.py purge_sessions
+    python manage.py purge_sessions --batch-size 5000 --sleep 0.1
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+
+DB_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+class Command(BaseCommand):
+    help = 'Borra por lotes las sesiones vencidas de la base de datos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas por DELETE')
+        parser.add_argument('--sleep', type=float, default=0, help='Segundos de pausa entre lotes')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE not in DB_ENGINES:
+            self.stdout.write(f'{settings.SESSION_ENGINE} no guarda sesiones en la base de datos')
+            return
+
+        table = connection.ops.quote_name(Session._meta.db_table)
+        now = timezone.now()
+        total = 0
+        start = time.perf_counter()
+
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    DELETE FROM {table}
+                     WHERE session_key IN (
+                           SELECT session_key FROM {table}
+                            WHERE expire_date < %s
+                            LIMIT %s)
+                    """,
+                    [now, options['batch_size']],
+                )
+                deleted = cursor.rowcount
+            total += deleted
+            if deleted < options['batch_size']:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'{total} sesiones vencidas borradas en {elapsed:.2f}s'))
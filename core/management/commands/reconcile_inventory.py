@@ -0,0 +1,68 @@
+"""
+Compara el stock actual (feed_inventory.quantity) con el libro de
+movimientos y con los snapshots.
+
+Uso:
+    python manage.py reconcile_inventory
+    python manage.py reconcile_inventory --tolerance 0.01
+
+Termina con error si encuentra diferencias, para poder alertar desde cron.
+"""
+import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.inventory_service import stock_as_of
+from core.models import FeedInventory
+
+
+class Command(BaseCommand):
+    help = 'Detecta diferencias entre el inventario actual y el libro de movimientos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tolerance', type=Decimal, default=Decimal('0'),
+            help='Diferencia máxima aceptada por item',
+        )
+
+    def handle(self, *args, **options):
+        tolerance = options['tolerance']
+
+        current = dict(
+            FeedInventory.objects.values_list('feed_item_id', 'quantity')
+        )
+        # Todo el libro (incluye movimientos con fecha futura)
+        ledger = stock_as_of(datetime.date.max, use_snapshots=False)
+        # Con snapshots: si difiere del libro, hay snapshots desactualizados
+        snapshots = stock_as_of(datetime.date.max)
+
+        names = dict(FeedInventory.objects.values_list('feed_item_id', 'feed_item__item_name'))
+        drift = []
+        stale_snapshots = []
+
+        for item_id, ledger_qty in ledger.items():
+            current_qty = current.get(item_id, Decimal('0'))
+            if abs(current_qty - ledger_qty) > tolerance:
+                drift.append((item_id, current_qty, ledger_qty))
+            if snapshots.get(item_id) != ledger_qty:
+                stale_snapshots.append(item_id)
+
+        for item_id, current_qty, ledger_qty in drift:
+            self.stdout.write(self.style.WARNING(
+                f'[{item_id}] {names.get(item_id, "(sin inventario)")}: '
+                f'inventario={current_qty} libro={ledger_qty} diferencia={current_qty - ledger_qty}'
+            ))
+
+        if stale_snapshots:
+            self.stdout.write(self.style.WARNING(
+                f'{len(stale_snapshots)} items con snapshots desactualizados; '
+                f'regenerar con: manage.py snapshot_inventory --from <fecha> --rebuild'
+            ))
+
+        if drift:
+            raise CommandError(f'{len(drift)} items con diferencias entre inventario y movimientos')
+        if stale_snapshots:
+            raise CommandError('Snapshots desactualizados')
+
+        self.stdout.write(self.style.SUCCESS(f'Inventario cuadrado ({len(ledger)} items)'))
@@ -0,0 +1,40 @@
+"""
+Actualiza la tabla de analítica feed_cost_daily.
+
+Uso (cron, por ejemplo cada 15 minutos):
+    python manage.py refresh_feed_cost_daily              # solo días con cambios
+    python manage.py refresh_feed_cost_daily --from 2024-01-01
+    python manage.py refresh_feed_cost_daily --full
+"""
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.analytics_service import refresh_feed_cost_daily
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el costo de alimento por huevo de los días cuyos datos cambiaron'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recalcular todos los días')
+        parser.add_argument(
+            '--from', dest='from_date',
+            help='Recalcular todos los días desde esta fecha (YYYY-MM-DD), '
+                 'por ejemplo tras cambiar el costo de un item',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['from_date']:
+            try:
+                since = datetime.date.fromisoformat(options['from_date'])
+            except ValueError:
+                raise CommandError(f"Fecha inválida: {options['from_date']} (usar YYYY-MM-DD)")
+
+        start = time.perf_counter()
+        count = refresh_feed_cost_daily(full=options['full'], since=since)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(f'{count} días recalculados en {elapsed:.2f}s'))
@@ -0,0 +1,79 @@
+"""
+Llena la base con años de datos sintéticos para pruebas de carga
+(ver core/benchmark_data.py y el comando loadtest).
+
+Crea los usuarios bench-admin / bench-worker / bench-accountant
+@avicola.local (contraseña 'benchmark') y carga todas las tablas de la
+granja con COPY. Las tablas deben estar vacías: usar --reset para
+vaciarlas antes (borra TODOS los datos de la granja, no los usuarios).
+Pensado para una base PostgreSQL local, nunca para producción.
+
+Uso:
+    python manage.py seed_benchmark_data
+    python manage.py seed_benchmark_data --years 5 --flock 3000 --reset
+"""
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import benchmark_data
+
+
+class Command(BaseCommand):
+    help = 'Carga años de datos sintéticos de la granja para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=3, help='Años de operación a generar')
+        parser.add_argument('--end-date', help='Último día generado (YYYY-MM-DD). Por defecto ayer')
+        parser.add_argument('--flock', type=int, default=1500, help='Gallinas al inicio')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador')
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Vaciar antes las tablas de la granja (TRUNCATE ... RESTART IDENTITY)',
+        )
+
+    def handle(self, *args, **options):
+        if options['end_date']:
+            try:
+                end = datetime.date.fromisoformat(options['end_date'])
+            except ValueError:
+                raise CommandError(f"Fecha inválida: {options['end_date']} (usar YYYY-MM-DD)")
+        else:
+            end = timezone.localdate() - datetime.timedelta(days=1)
+        start = end - datetime.timedelta(days=365 * options['years'] - 1)
+
+        if options['reset']:
+            benchmark_data.reset_tables()
+        else:
+            used = {table: n for table, n in benchmark_data.table_counts(benchmark_data.TABLES).items() if n}
+            if used:
+                detail = ', '.join(f'{table} ({n})' for table, n in used.items())
+                raise CommandError(f'Las tablas deben estar vacías (usar --reset): {detail}')
+
+        users = benchmark_data.ensure_users()
+        admin_id = users['admin'].id
+        items, categories = benchmark_data.ensure_catalogs(admin_id)
+
+        started = time.perf_counter()
+        tables = benchmark_data.generate(
+            start, end, admin_id, items, categories, flock=options['flock'], seed=options['seed'],
+        )
+        generated = time.perf_counter()
+        loaded = benchmark_data.load(tables)
+        copied = time.perf_counter()
+        benchmark_data.refresh_derived(start, end)
+        finished = time.perf_counter()
+
+        for table, rows in loaded.items():
+            self.stdout.write(f'  {table:<26} {rows:>9}')
+        self.stdout.write(
+            f'Generado en {generated - started:.1f}s, COPY en {copied - generated:.1f}s, '
+            f'derivadas en {finished - copied:.1f}s'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(loaded.values())} filas del {start} al {end}. '
+            f"Usuarios: {', '.join(benchmark_data.BENCHMARK_USERS.values())} "
+            f"(contraseña '{benchmark_data.BENCHMARK_PASSWORD}')"
+        ))
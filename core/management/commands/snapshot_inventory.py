@@ -0,0 +1,90 @@
+"""
+Guarda snapshots del stock de alimentos (feed_inventory_snapshot).
+
+Uso (cron diario, después de medianoche):
+    python manage.py snapshot_inventory
+    python manage.py snapshot_inventory --period monthly
+    python manage.py snapshot_inventory --from 2024-01-01 --date 2024-06-30
+    python manage.py snapshot_inventory --from 2024-01-01 --rebuild
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.inventory_service import write_snapshots
+from core.models import FeedInventorySnapshot
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Fecha inválida: {value} (usar YYYY-MM-DD)')
+
+
+def _month_end(day):
+    next_month = day.replace(day=28) + datetime.timedelta(days=4)
+    return next_month - datetime.timedelta(days=next_month.day)
+
+
+class Command(BaseCommand):
+    help = 'Guarda el stock de cada item de alimento al cierre de un día (o de un mes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Fecha del snapshot (YYYY-MM-DD). Por defecto ayer, o el fin del mes anterior con --period monthly',
+        )
+        parser.add_argument('--period', choices=['daily', 'monthly'], default='daily')
+        parser.add_argument(
+            '--from', dest='from_date',
+            help='Generar también todos los snapshots desde esta fecha hasta --date',
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Borrar antes los snapshots del rango (o todos, sin --from)',
+        )
+
+    def handle(self, *args, **options):
+        period = options['period']
+        today = timezone.localdate()
+
+        if options['date']:
+            end = _parse_date(options['date'])
+        elif period == 'monthly':
+            end = today.replace(day=1) - datetime.timedelta(days=1)
+        else:
+            end = today - datetime.timedelta(days=1)
+
+        start = _parse_date(options['from_date']) if options['from_date'] else end
+        if start > end:
+            raise CommandError('--from no puede ser posterior a --date')
+
+        # Cada snapshot parte del anterior: generarlos en orden
+        dates = []
+        day = start
+        while day <= end:
+            if period == 'monthly':
+                day = _month_end(day)
+                if day > end:
+                    break
+            dates.append(day)
+            day += datetime.timedelta(days=1)
+
+        with transaction.atomic():
+            if options['rebuild']:
+                stale = FeedInventorySnapshot.objects.all()
+                if options['from_date']:
+                    stale = stale.filter(snapshot_date__gte=start)
+                deleted, _ = stale.delete()
+                self.stdout.write(f'Snapshots eliminados: {deleted}')
+
+            total = 0
+            for snapshot_date in dates:
+                total += write_snapshots(snapshot_date, period=period)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} snapshots {period} guardados ({len(dates)} fechas, {start} → {end})'
+        ))
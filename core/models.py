@@ -91,9 +91,13 @@ class User(AbstractBaseUser, PermissionsMixin):
         self.password_hash = hash_password(raw_password)
     
     def check_password(self, raw_password):
-        """Check password using custom verify function."""
-        from core.auth_utils import verify_password
-        return verify_password(raw_password, self.password_hash)
+        """
+        Check password in the bounded verification pool and upgrade
+        outdated hashes (bcrypt, old Argon2 parameters) on success.
+        Raises PasswordVerifyBusy when the pool is saturated.
+        """
+        from core.auth_utils import check_and_upgrade
+        return check_and_upgrade(self, raw_password)
 
 
 class FarmStatus(models.Model):
@@ -288,6 +292,33 @@ class FeedInventoryMovement(models.Model):
         return f"{self.feed_item.item_name}: {sign}{self.quantity} {self.unit_type} ({self.get_movement_type_display()})"
 
 
+class FeedInventorySnapshot(models.Model):
+    """Snapshot de Inventario - Stock de un item al cierre de un día."""
+    
+    PERIOD_CHOICES = [
+        ('daily', 'Diario'),
+        ('monthly', 'Mensual'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    feed_item = models.ForeignKey(FeedItem, on_delete=models.PROTECT, related_name='snapshots')
+    snapshot_date = models.DateField()
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES, default='daily')
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    movement_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.BigIntegerField(null=True, blank=True)
+    
+    class Meta:
+        managed = False
+        db_table = 'feed_inventory_snapshot'
+        ordering = ['-snapshot_date']
+        unique_together = [['feed_item', 'snapshot_date']]
+    
+    def __str__(self):
+        return f"{self.feed_item.item_name} al {self.snapshot_date}: {self.quantity}"
+
+
 class FeedMix(models.Model):
     """Mezclas de Alimento - Preparaciones de alimento."""
     
@@ -315,7 +346,7 @@ class FeedMixItem(models.Model):
     """Items de Mezcla de Alimento - Detalle de las mezclas."""
     
     id = models.BigAutoField(primary_key=True)
-    feed_mix = models.ForeignKey(FeedMix, on_delete=models.CASCADE, db_column='feed_mix_id')
+    feed_mix = models.ForeignKey(FeedMix, on_delete=models.CASCADE, db_column='feed_mix_id', related_name='items')
     feed_item = models.ForeignKey(FeedItem, on_delete=models.PROTECT, db_column='feed_item_id')
     proportion_pct = models.DecimalField(max_digits=5, decimal_places=2)
     weight_kg = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -358,6 +389,29 @@ class FeedConsumption(models.Model):
         return f"{self.consumption_date}: {self.total_consumed_kg} kg"
 
 
+class FeedCostDaily(models.Model):
+    """Analítica de Costo de Alimento - Un registro por día (ver refresh_feed_cost_daily)."""
+    
+    day = models.DateField(primary_key=True)
+    eggs_produced = models.IntegerField(default=0)
+    hens_count = models.IntegerField(null=True, blank=True)
+    feed_consumed_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    feed_mix = models.ForeignKey(FeedMix, on_delete=models.SET_NULL, null=True, blank=True, db_column='feed_mix_id')
+    mix_cost_per_kg = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    feed_cost_clp = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    feed_cost_per_dozen = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    laying_pct = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        managed = False
+        db_table = 'feed_cost_daily'
+        ordering = ['-day']
+    
+    def __str__(self):
+        return f"Costo de alimento {self.day}: {self.feed_cost_per_dozen} por docena"
+
+
 class FinanceCategory(models.Model):
     """Categorías Financieras - Tipos de ingresos/gastos."""
     
@@ -471,7 +525,7 @@ class ReportExport(models.Model):
 
 
 class VEggProductionDaily(models.Model):
-    """View for daily egg production aggregation."""
+    """Daily egg production rollup table, kept in sync by a trigger on egg_production."""
     
     production_date = models.DateField(primary_key=True)
     total_eggs = models.IntegerField()
@@ -481,7 +535,7 @@ class VEggProductionDaily(models.Model):
     
     class Meta:
         managed = False
-        db_table = 'v_egg_production_daily'
+        db_table = 'egg_production_daily'
         ordering = ['-production_date']
     
     def __str__(self):
@@ -0,0 +1,281 @@
+"""
+Paginación por cursor (keyset) - Compartida por las vistas HTML y la API.
+
+En vez de OFFSET y COUNT(*), cada página se pide a partir de los valores
+de orden de la última fila vista:
+
+    WHERE (fecha, id) < (fecha_cursor, id_cursor) ORDER BY fecha DESC, id DESC LIMIT n
+
+Con un índice sobre las columnas de orden, cualquier página cuesta lo mismo
+que la primera. El orden se toma del queryset (order_by) y siempre se
+agrega la clave primaria para desempatar; las columnas de orden deben ser
+campos propios del modelo y NOT NULL.
+
+El total de registros es opcional: solo se calcula si el template (o el
+cliente de la API) lo pide, y se guarda en caché KEYSET_COUNT_TIMEOUT segundos.
+"""
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+
+from avicola.caching import get_or_compute
+
+
+DEFAULT_PER_PAGE = 20
+
+# Parámetros de la URL
+AFTER_PARAM = 'after'
+BEFORE_PARAM = 'before'
+LAST_PARAM = 'last'
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no se puede decodificar."""
+
+
+# ============================================================================
+# ORDEN Y CURSORES
+# ============================================================================
+
+def get_ordering(queryset):
+    """
+    Columnas de orden del queryset como [(campo, descendente)], con la
+    clave primaria al final si no está.
+    """
+    pk_name = queryset.model._meta.pk.name
+    order_by = queryset.query.order_by or queryset.model._meta.ordering or ()
+
+    ordering = []
+    for field in order_by:
+        if not isinstance(field, str):
+            raise ValueError('La paginación por cursor solo admite campos como orden')
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        if name == 'pk':
+            name = pk_name
+        elif '__' in name:
+            raise ValueError(f'La paginación por cursor no admite ordenar por relaciones: {field}')
+        else:
+            # Una FK se ordena por su columna (feed_mix_id), no por el orden del modelo relacionado
+            name = queryset.model._meta.get_field(name).attname
+        ordering.append((name, descending))
+
+    if pk_name not in (name for name, _ in ordering):
+        # Desempate en el mismo sentido que la primera columna
+        ordering.append((pk_name, ordering[0][1] if ordering else True))
+    return ordering
+
+
+def encode_cursor(obj, ordering):
+    """Cursor opaco con los valores de orden de `obj` (instancia o fila de values())."""
+    values = []
+    for name, _ in ordering:
+        value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+        values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _get_field(model, attname):
+    for field in model._meta.concrete_fields:
+        if field.attname == attname:
+            return field
+    raise InvalidCursor(attname)
+
+
+def decode_cursor(cursor, model, ordering):
+    """Valores de orden (ya convertidos al tipo de cada campo) de un cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError
+        return [
+            _get_field(model, name).to_python(value)
+            for (name, _), value in zip(ordering, values)
+        ]
+    except Exception:
+        raise InvalidCursor(cursor)
+
+
+def _seek_filter(model, ordering, values, forward):
+    """
+    Filas posteriores (forward) o anteriores al cursor en el orden dado.
+
+    Si todas las columnas van en el mismo sentido se compara la fila
+    completa, (a, b) < (x, y): PostgreSQL la usa como límite de un recorrido
+    del índice (fecha DESC, id DESC) y la página empieza justo en el cursor.
+    Con sentidos mezclados se arma (a > x) OR (a = x AND b > y) OR ... y se
+    agrega la cota redundante a >= x, que sí acota el índice por la primera
+    columna.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    directions = {descending for _, descending in ordering}
+    if len(directions) == 1:
+        # Hacia adelante en orden descendente (o hacia atrás en ascendente): "<"
+        operator = '<' if directions.pop() == forward else '>'
+        columns = ', '.join(f'{table}.{connection.ops.quote_name(name)}' for name, _ in ordering)
+        placeholders = ', '.join(['%s'] * len(values))
+        params = [
+            _get_field(model, name).get_db_prep_value(value, connection)
+            for (name, _), value in zip(ordering, values)
+        ]
+        return RawSQL(f'({columns}) {operator} ({placeholders})', params, output_field=BooleanField())
+
+    condition = Q()
+    equal = Q()
+    for (name, descending), value in zip(ordering, values):
+        lookup = f'{name}__lt' if descending == forward else f'{name}__gt'
+        condition |= equal & Q(**{lookup: value})
+        equal &= Q(**{name: value})
+    first_name, first_descending = ordering[0]
+    bound = f'{first_name}__lte' if first_descending == forward else f'{first_name}__gte'
+    return Q(**{bound: values[0]}) & condition
+
+
+def _order_by(ordering, reverse=False):
+    return [
+        f"{'-' if descending != reverse else ''}{name}"
+        for name, descending in ordering
+    ]
+
+
+# ============================================================================
+# PÁGINA
+# ============================================================================
+
+class KeysetPage:
+    """
+    Página de resultados. Se usa en los templates igual que una lista, y
+    con has_next / has_previous / *_query para armar los enlaces.
+    """
+
+    def __init__(self, object_list, queryset, ordering, has_next, has_previous, params):
+        self.object_list = object_list
+        self._queryset = queryset
+        self._ordering = ordering
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self._params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        return encode_cursor(self.object_list[-1], self._ordering)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous:
+            return None
+        return encode_cursor(self.object_list[0], self._ordering)
+
+    def _query(self, **cursor):
+        """Query string con los filtros actuales y el cursor indicado."""
+        params = self._params.copy()
+        for key in (AFTER_PARAM, BEFORE_PARAM, LAST_PARAM, 'page'):
+            params.pop(key, None)
+        for key, value in cursor.items():
+            params[key] = value
+        query = params.urlencode()
+        return f'?{query}' if query else '?'
+
+    @property
+    def first_query(self):
+        return self._query()
+
+    @property
+    def last_query(self):
+        return self._query(**{LAST_PARAM: '1'})
+
+    @property
+    def next_query(self):
+        return self._query(**{AFTER_PARAM: self.next_cursor})
+
+    @property
+    def previous_query(self):
+        return self._query(**{BEFORE_PARAM: self.previous_cursor})
+
+    @cached_property
+    def count(self):
+        """Total de registros del queryset (en caché, solo si se usa)."""
+        return cached_count(self._queryset)
+
+
+def cached_count(queryset):
+    """COUNT(*) del queryset, guardado en caché KEYSET_COUNT_TIMEOUT segundos."""
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()
+    return get_or_compute(
+        'keyset_count', f'keyset_count:{digest}',
+        queryset.count,
+        getattr(settings, 'KEYSET_COUNT_TIMEOUT', 60),
+    )
+
+
+def paginate_queryset(queryset, params, per_page=DEFAULT_PER_PAGE):
+    """
+    Página de `queryset` según los parámetros de la URL (`after`, `before`
+    o `last`). Una consulta con LIMIT per_page + 1; sin COUNT ni OFFSET.
+    Lanza InvalidCursor si el cursor no es válido.
+    """
+    ordering = get_ordering(queryset)
+    model = queryset.model
+    after = params.get(AFTER_PARAM)
+    before = params.get(BEFORE_PARAM)
+
+    if before or params.get(LAST_PARAM):
+        # Hacia atrás: orden invertido y luego se da vuelta la página
+        qs = queryset.order_by(*_order_by(ordering, reverse=True))
+        if before:
+            qs = qs.filter(_seek_filter(model, ordering, decode_cursor(before, model, ordering), forward=False))
+        rows = list(qs[:per_page + 1])
+        has_previous = len(rows) > per_page
+        object_list = rows[:per_page][::-1]
+        has_next = bool(before)
+    else:
+        qs = queryset.order_by(*_order_by(ordering))
+        if after:
+            qs = qs.filter(_seek_filter(model, ordering, decode_cursor(after, model, ordering), forward=True))
+        rows = list(qs[:per_page + 1])
+        has_next = len(rows) > per_page
+        object_list = rows[:per_page]
+        has_previous = bool(after)
+
+    return KeysetPage(object_list, queryset, ordering, has_next, has_previous, params)
+
+
+def keyset_paginate(request, queryset, per_page=DEFAULT_PER_PAGE):
+    """
+    Página para las vistas HTML. Un cursor inválido (enlace viejo o
+    editado a mano) muestra la primera página.
+    """
+    params = request.GET.copy()
+    try:
+        return paginate_queryset(queryset, params, per_page)
+    except InvalidCursor:
+        for key in (AFTER_PARAM, BEFORE_PARAM):
+            params.pop(key, None)
+        return paginate_queryset(queryset, params, per_page)
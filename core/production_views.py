@@ -4,11 +4,11 @@ Vistas del módulo de Producción - Estado de Granja, Producción de Huevos y Mo
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 
 from core.models import FarmStatus, EggProduction, MortalityEvent
 from core.forms import FarmStatusForm, EggProductionForm, MortalityEventForm
 from core.decorators import production_write_required
+from core.pagination import keyset_paginate
 
 
 # ============================================================================
@@ -19,9 +19,7 @@ from core.decorators import production_write_required
 def farm_status_list(request):
     """Muestra la lista de estados de granja."""
     farm_statuses = FarmStatus.objects.filter(is_active=True).order_by('-status_date')
-    paginator = Paginator(farm_statuses, 20)
-    page = request.GET.get('page')
-    farm_statuses = paginator.get_page(page)
+    farm_statuses = keyset_paginate(request, farm_statuses)
     return render(request, 'farm_status/list.html', {'farm_statuses': farm_statuses})
 
 
@@ -102,9 +100,7 @@ def farm_status_delete(request, pk):
 def egg_production_list(request):
     """Muestra la lista de producción de huevos."""
     productions = EggProduction.objects.filter(is_active=True).order_by('-production_date', 'size_code')
-    paginator = Paginator(productions, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = keyset_paginate(request, productions)
     
     context = {
         'productions': page_obj,
@@ -182,10 +178,8 @@ def egg_production_delete(request, pk):
 @login_required
 def mortality_list(request):
     """Muestra la lista de eventos de mortalidad."""
-    events = MortalityEvent.objects.filter(is_active=True).order_by('-event_date')
-    paginator = Paginator(events, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    events = MortalityEvent.objects.filter(is_active=True).order_by('-event_date', '-id')
+    page_obj = keyset_paginate(request, events)
     return render(request, 'mortality/list.html', {'events': page_obj})
 
 
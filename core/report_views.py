@@ -1,5 +1,9 @@
 """
 Vistas para generación de reportes financieros en PDF y Excel.
+
+Las descargas son vistas async: leen las transacciones con el ORM async y
+generan el archivo en el pool de CPU (core.async_utils), así con ASGI una
+descarga no ocupa un worker completo.
 """
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
@@ -23,9 +27,76 @@ from openpyxl.utils import get_column_letter
 
 from core.models import FinanceTransaction, FinanceCategory, EggProduction, FeedConsumption
 from core.decorators import finance_write_required
+from core.conditional import build_validator, conditional_view, request_fingerprint
+from core.throttling import throttle
+from core.async_utils import run_in_executor
+from avicola.metrics import timed_report
+
+
+def _report_validator(request, *extra):
+    """
+    Validador de los reportes de un mes: transacciones, producción y consumo
+    del período más las categorías (y `extra`). Si los parámetros no son
+    válidos la vista se ejecuta igual (y responde como siempre).
+    """
+    today = timezone.now().date()
+    try:
+        month = int(request.GET.get('month', today.month))
+        year = int(request.GET.get('year', today.year))
+        start_date = datetime(year, month, 1).date()
+    except ValueError:
+        return None
+    end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+    return build_validator(
+        [
+            FinanceTransaction.objects.filter(transaction_date__range=(start_date, end_date)),
+            FinanceCategory.objects.all(),
+            EggProduction.objects.filter(production_date__range=(start_date, end_date)),
+            FeedConsumption.objects.filter(consumption_date__range=(start_date, end_date)),
+        ],
+        request.path, month, year, today, request_fingerprint(request), *extra,
+    )
+
+
+def _summary_validator(request):
+    """
+    El resumen HTML también muestra el selector de años con datos, que
+    depende de todas las transacciones y no solo las del mes.
+    """
+    years = tuple(FinanceTransaction.objects.filter(is_active=True).dates('transaction_date', 'year'))
+    return _report_validator(request, years)
+
+
+def _report_period(request):
+    """Mes y año pedidos (por defecto el actual) y el rango de fechas del mes."""
+    today = timezone.now().date()
+    
+    # Obtener mes y año
+    month = int(request.GET.get('month', today.month))
+    year = int(request.GET.get('year', today.year))
+    
+    # Calcular rango de fechas
+    start_date = datetime(year, month, 1).date()
+    if month == 12:
+        end_date = datetime(year + 1, 1, 1).date() - timedelta(days=1)
+    else:
+        end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
+    
+    return month, year, start_date, end_date
+
+
+def _month_transactions(start_date, end_date):
+    return FinanceTransaction.objects.filter(
+        transaction_date__gte=start_date,
+        transaction_date__lte=end_date,
+        is_active=True
+    ).select_related('category').order_by('transaction_date')
 
 
 @login_required
+@conditional_view(_summary_validator)
+@timed_report('financial_summary')
 def financial_summary_view(request):
     """Vista de resumen financiero mensual con opciones de exportación."""
     today = timezone.now().date()
@@ -121,36 +192,29 @@ def financial_summary_view(request):
 
 @login_required
 @finance_write_required
-def export_financial_pdf(request):
+@conditional_view(_report_validator)
+@throttle('report')
+@timed_report('financial_pdf')
+async def export_financial_pdf(request):
     """Exportar resumen financiero a PDF."""
-    today = timezone.now().date()
-    
-    # Obtener mes y año
-    month = int(request.GET.get('month', today.month))
-    year = int(request.GET.get('year', today.year))
+    month, year, start_date, end_date = _report_period(request)
     
-    # Calcular rango de fechas
-    start_date = datetime(year, month, 1).date()
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-    else:
-        end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
-    
-    # Obtener datos
-    transactions = FinanceTransaction.objects.filter(
-        transaction_date__gte=start_date,
-        transaction_date__lte=end_date,
-        is_active=True
-    ).select_related('category').order_by('transaction_date')
+    # Obtener datos (ORM async) y generar el PDF en el pool de CPU
+    transactions = [t async for t in _month_transactions(start_date, end_date)]
+    pdf = await run_in_executor(_build_financial_pdf, transactions, month, year, start_date, end_date)
     
+    # Crear respuesta HTTP
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="resumen_financiero_{year}_{month:02d}.pdf"'
+    return response
+
+
+def _build_financial_pdf(transactions, month, year, start_date, end_date):
+    """Genera el PDF del resumen financiero y devuelve sus bytes."""
     income_total = sum(t.amount_clp for t in transactions if t.category.type == 'income')
     expense_total = sum(t.amount_clp for t in transactions if t.category.type == 'expense')
     net_profit = income_total - expense_total
     
-    # Crear respuesta HTTP
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="resumen_financiero_{year}_{month:02d}.pdf"'
-    
     # Crear documento PDF
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
@@ -230,7 +294,7 @@ def export_financial_pdf(request):
     elements.append(Spacer(1, 0.4*inch))
     
     # Detalle de transacciones
-    if transactions.exists():
+    if transactions:
         section_title = Paragraph("<b>Detalle de Transacciones</b>", styles['Heading2'])
         elements.append(section_title)
         elements.append(Spacer(1, 0.15*inch))
@@ -270,35 +334,34 @@ def export_financial_pdf(request):
     doc.build(elements)
     pdf = buffer.getvalue()
     buffer.close()
-    response.write(pdf)
     
-    return response
+    return pdf
 
 
 @login_required
 @finance_write_required
-def export_financial_excel(request):
+@conditional_view(_report_validator)
+@throttle('report')
+@timed_report('financial_excel')
+async def export_financial_excel(request):
     """Exportar resumen financiero a Excel."""
-    today = timezone.now().date()
-    
-    # Obtener mes y año
-    month = int(request.GET.get('month', today.month))
-    year = int(request.GET.get('year', today.year))
-    
-    # Calcular rango de fechas
-    start_date = datetime(year, month, 1).date()
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-    else:
-        end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
+    month, year, start_date, end_date = _report_period(request)
     
-    # Obtener datos
-    transactions = FinanceTransaction.objects.filter(
-        transaction_date__gte=start_date,
-        transaction_date__lte=end_date,
-        is_active=True
-    ).select_related('category').order_by('transaction_date')
+    # Obtener datos (ORM async) y generar el archivo en el pool de CPU
+    transactions = [t async for t in _month_transactions(start_date, end_date)]
+    content = await run_in_executor(_build_financial_excel, transactions, month, year, start_date, end_date)
     
+    # Crear respuesta HTTP
+    response = HttpResponse(
+        content,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = f'attachment; filename="resumen_financiero_{year}_{month:02d}.xlsx"'
+    return response
+
+
+def _build_financial_excel(transactions, month, year, start_date, end_date):
+    """Genera el Excel del resumen financiero y devuelve sus bytes."""
     income_total = sum(t.amount_clp for t in transactions if t.category.type == 'income')
     expense_total = sum(t.amount_clp for t in transactions if t.category.type == 'expense')
     net_profit = income_total - expense_total
@@ -472,13 +535,8 @@ def export_financial_excel(request):
     ws_detail.column_dimensions['F'].width = 15
     ws_detail.column_dimensions['G'].width = 40
     
-    # Crear respuesta HTTP
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="resumen_financiero_{year}_{month:02d}.xlsx"'
-    
     # Guardar workbook
-    wb.save(response)
+    buffer = BytesIO()
+    wb.save(buffer)
     
-    return response
+    return buffer.getvalue()
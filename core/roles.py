@@ -0,0 +1,83 @@
+"""
+Resolución de rol y permisos - Se calcula una sola vez por petición.
+
+El middleware, los decoradores, los templates y los permisos de la API
+comparten el mismo objeto `RolePermissions`. Todo es perezoso: la sesión
+y el usuario solo se cargan si alguien consulta un permiso.
+"""
+from django.utils.functional import cached_property
+
+
+ROLES_WRITE_FINANCE = ('admin', 'accountant')
+ROLES_WRITE_PRODUCTION = ('admin', 'worker')
+
+
+class RolePermissions:
+    """
+    Rol y permisos del usuario de una petición.
+
+    - role: rol efectivo (el temporal de "ver como" si el admin lo activó)
+    - real_role: rol real del usuario, para lo que no debe cambiar con "ver como"
+    - view_as_role: rol temporal activo, o None
+    """
+
+    def __init__(self, request, view_as=True):
+        self._request = request
+        self._view_as = view_as
+
+    @cached_property
+    def user(self):
+        return getattr(self._request, 'user', None)
+
+    @cached_property
+    def is_authenticated(self):
+        return bool(self.user and self.user.is_authenticated)
+
+    @cached_property
+    def real_role(self):
+        if not self.is_authenticated:
+            return None
+        return getattr(self.user, 'rol', None)
+
+    @cached_property
+    def view_as_role(self):
+        # Solo el admin puede "ver como" otro rol
+        if not self._view_as or self.real_role != 'admin':
+            return None
+        session = getattr(self._request, 'session', None)
+        if session is None:
+            return None
+        return session.get('view_as_role')
+
+    @cached_property
+    def role(self):
+        return self.view_as_role or self.real_role
+
+    @cached_property
+    def can_write_finance(self):
+        return self.role in ROLES_WRITE_FINANCE
+
+    @cached_property
+    def can_write_production(self):
+        return self.role in ROLES_WRITE_PRODUCTION
+
+    @cached_property
+    def is_admin(self):
+        # Rol real, no temporal (para seguridad)
+        return self.real_role == 'admin'
+
+
+def get_role_permissions(request, view_as=True):
+    """
+    Devuelve el RolePermissions de la petición, creándolo la primera vez.
+
+    Se guarda en `request.__dict__` y no con getattr: el Request de DRF
+    delega los atributos que no tiene al HttpRequest original, cuyo usuario
+    viene de la sesión y no de la autenticación JWT.
+    """
+    key = 'role_permissions' if view_as else 'real_role_permissions'
+    perms = request.__dict__.get(key)
+    if perms is None:
+        perms = RolePermissions(request, view_as=view_as)
+        request.__dict__[key] = perms
+    return perms
@@ -0,0 +1,28 @@
+"""
+Utilidades de sesión - Valores pequeños y acotados en la sesión.
+
+Con SESSION_BACKEND=signed_cookies toda la sesión viaja en una cookie
+(máximo ~4 KB) y con cached_db se copia a la caché en cada cambio, así que
+en la sesión solo se guardan datos chicos: rutas, ids y contadores, nunca
+listas de detecciones ni imágenes.
+"""
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class SessionValueTooLarge(ValueError):
+    """El valor supera SESSION_VALUE_MAX_BYTES serializado."""
+
+
+def set_session_value(session, key, value):
+    """
+    Guarda `value` en la sesión si serializado ocupa como máximo
+    SESSION_VALUE_MAX_BYTES. Si no, lanza SessionValueTooLarge.
+    """
+    max_bytes = getattr(settings, 'SESSION_VALUE_MAX_BYTES', 2048)
+    size = len(json.dumps(value, cls=DjangoJSONEncoder).encode('utf-8'))
+    if size > max_bytes:
+        raise SessionValueTooLarge(f"'{key}' ocupa {size} bytes (máximo {max_bytes})")
+    session[key] = value
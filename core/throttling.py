@@ -0,0 +1,215 @@
+"""
+Limitación de peticiones - Token buckets por usuario / IP y límites de
+concurrencia por endpoint, guardados en la caché.
+
+Cada scope (login, vision, report...) tiene:
+- una tasa en THROTTLE_RATES ('10/min'): un bucket con esa capacidad que se
+  rellena de forma continua. Se cobra por usuario autenticado o, si no hay
+  sesión, por IP (THROTTLE_NUM_PROXIES para leerla de X-Forwarded-For).
+- opcionalmente un máximo de peticiones simultáneas en CONCURRENCY_LIMITS.
+  Cada cupo es una clave de caché creada con cache.add (atómico) que vence
+  a los CONCURRENCY_LEASE_SECONDS, así un worker caído no deja cupos tomados.
+
+Con REDIS_URL los límites son comunes a todos los workers de gunicorn; con
+la caché en memoria son por proceso. El bucket se lee y escribe sin bloqueo:
+peticiones simultáneas del mismo usuario pueden pasar alguna de más, el
+límite estricto lo da la concurrencia.
+"""
+import math
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.shortcuts import render
+
+from avicola.metrics import record_throttled
+from core.async_utils import is_async_view
+
+
+PERIODS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400,
+}
+
+
+class Throttled(Exception):
+    """Petición rechazada por tasa ('rate') o por concurrencia ('concurrency')."""
+
+    def __init__(self, scope, wait, reason='rate'):
+        super().__init__(f'{scope}: {reason}')
+        self.scope = scope
+        self.wait = wait
+        self.reason = reason
+
+    @property
+    def retry_after(self):
+        """Segundos enteros para el header Retry-After."""
+        return max(1, math.ceil(self.wait))
+
+
+def parse_rate(rate):
+    """'10/min' -> (capacidad, tokens por segundo). None si no hay tasa."""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    return int(count), int(count) / PERIODS[period.strip().lower()]
+
+
+def get_rate(scope):
+    return parse_rate(getattr(settings, 'THROTTLE_RATES', {}).get(scope))
+
+
+def client_ip(request):
+    """IP del cliente; detrás de THROTTLE_NUM_PROXIES proxies la toma de X-Forwarded-For."""
+    num_proxies = getattr(settings, 'THROTTLE_NUM_PROXIES', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if num_proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_ident(request):
+    """'user:<id>' con sesión iniciada, si no 'ip:<dirección>'."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def consume(key, rate, cost=1):
+    """
+    Cobra `cost` tokens del bucket `key`. Devuelve 0 si alcanzaron o los
+    segundos hasta que haya suficientes.
+    """
+    capacity, refill = rate
+    now = time.time()
+    tokens, last = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - last) * refill)
+    if tokens < cost:
+        return (cost - tokens) / refill
+
+    # La clave vence cuando el bucket estaría lleno de nuevo
+    cache.set(key, (tokens - cost, now), math.ceil(capacity / refill) + 1)
+    return 0
+
+
+def check_rate(request, scope):
+    """Cobra la petición al bucket del scope. Lanza Throttled si está vacío."""
+    rate = get_rate(scope)
+    if rate is None:
+        return
+    wait = consume(f'throttle:{scope}:{client_ident(request)}', rate)
+    if wait:
+        record_throttled(scope, 'rate')
+        raise Throttled(scope, wait)
+
+
+def acquire_slot(scope):
+    """
+    Toma uno de los CONCURRENCY_LIMITS[scope] cupos. Devuelve (clave, token)
+    para release_slot, o None si el scope no tiene límite. Lanza Throttled
+    si están todos tomados.
+    """
+    limit = getattr(settings, 'CONCURRENCY_LIMITS', {}).get(scope)
+    if not limit:
+        return None
+
+    token = uuid.uuid4().hex
+    lease = getattr(settings, 'CONCURRENCY_LEASE_SECONDS', 120)
+    first = random.randrange(limit)
+    for offset in range(limit):
+        key = f'throttle:slot:{scope}:{(first + offset) % limit}'
+        if cache.add(key, token, lease):
+            return key, token
+
+    record_throttled(scope, 'concurrency')
+    raise Throttled(scope, 1, reason='concurrency')
+
+
+def release_slot(slot):
+    if slot is None:
+        return
+    key, token = slot
+    # Si el cupo venció y otro lo tomó, no borrarlo
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+@contextmanager
+def concurrency_slot(scope):
+    """Ocupa un cupo de `scope` mientras dura el bloque (ver acquire_slot)."""
+    slot = acquire_slot(scope)
+    try:
+        yield
+    finally:
+        release_slot(slot)
+
+
+def _throttled_response(request, exc, template):
+    if exc.reason == 'rate':
+        messages.error(request, f'Demasiadas solicitudes, intenta de nuevo en {exc.retry_after} segundos')
+    else:
+        messages.error(request, 'Hay otras solicitudes iguales en proceso, intenta de nuevo en unos segundos')
+    response = render(request, template, status=429)
+    response['Retry-After'] = str(exc.retry_after)
+    return response
+
+
+def throttle(scope, methods=None, template='throttled.html'):
+    """
+    Decorador para vistas web (sync o async): aplica la tasa y la
+    concurrencia de `scope` (solo a `methods` si se indican). Al rechazar
+    muestra un mensaje en `template` con estado 429 y Retry-After.
+
+    Ejemplo de uso:
+        @login_required
+        @throttle('vision', methods=('POST',))
+        def vision_count_eggs(request):
+            ...
+    """
+    def applies(request):
+        return getattr(settings, 'THROTTLE_ENABLED', True) and (not methods or request.method in methods)
+
+    def decorator(view_func):
+        if is_async_view(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if not applies(request):
+                    return await view_func(request, *args, **kwargs)
+
+                try:
+                    await sync_to_async(check_rate)(request, scope)
+                    slot = await sync_to_async(acquire_slot)(scope)
+                except Throttled as exc:
+                    return await sync_to_async(_throttled_response)(request, exc, template)
+                try:
+                    return await view_func(request, *args, **kwargs)
+                finally:
+                    await sync_to_async(release_slot)(slot)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not applies(request):
+                return view_func(request, *args, **kwargs)
+
+            try:
+                check_rate(request, scope)
+                slot = acquire_slot(scope)
+            except Throttled as exc:
+                return _throttled_response(request, exc, template)
+            try:
+                return view_func(request, *args, **kwargs)
+            finally:
+                release_slot(slot)
+        return wrapper
+    return decorator
@@ -3,11 +3,11 @@ Gestión de Usuarios - Solo accesible para administradores.
 """
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.core.paginator import Paginator
 
 from core.models import User
 from core.forms import UserForm, UserEditForm
 from core.decorators import admin_required
+from core.pagination import keyset_paginate
 
 
 @admin_required
@@ -17,9 +17,7 @@ def user_list(request):
     users = User.objects.all().order_by('-created_at')
     
     # Paginar resultados
-    paginator = Paginator(users, 20)
-    page = request.GET.get('page')
-    users = paginator.get_page(page)
+    users = keyset_paginate(request, users)
     
     return render(request, 'users/list.html', {'users': users})
 
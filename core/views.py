@@ -10,12 +10,16 @@ from django.utils import timezone
 from datetime import timedelta, datetime
 import json
 
+from core.analytics_service import feed_cost_summary
+from core.auth_utils import PasswordVerifyBusy
+from core.throttling import throttle
 from core.models import (
     User, FarmStatus, EggProduction, MortalityEvent,
     FeedItem, FeedMix, FeedConsumption, FinanceCategory, FinanceTransaction
 )
 
 
+@throttle('login', methods=('POST',), template='login.html')
 def login_view(request):
     """Página de inicio de sesión."""
     # Si ya está logueado, ir al dashboard
@@ -27,8 +31,14 @@ def login_view(request):
         email = request.POST.get('email')
         password = request.POST.get('password')
         
-        # Intentar autenticar
-        user = authenticate(request, username=email, password=password)
+        # Intentar autenticar (el pool de verificación puede estar saturado)
+        try:
+            user = authenticate(request, username=email, password=password)
+        except PasswordVerifyBusy:
+            messages.error(request, 'Hay demasiados inicios de sesión en curso, intenta de nuevo en unos segundos')
+            response = render(request, 'login.html', status=503)
+            response['Retry-After'] = '1'
+            return response
         
         if user is not None:
             # Login exitoso
@@ -139,6 +149,9 @@ def dashboard_view(request):
     else:
         conversion_alimenticia = 0
     
+    # 5. Costo de alimento por docena (costo real de la mezcla, tabla de analítica)
+    costo_alimento = feed_cost_summary(week_ago, today)
+    
     # Mortalidad del mes
     mortality_month = MortalityEvent.objects.filter(
         event_date__gte=current_month_start,
@@ -257,6 +270,7 @@ def dashboard_view(request):
             'gallinas_totales': hens_count,
             'docenas_semanales': round(docenas_semanales, 2),
             'produccion_semanal': produccion_semanal,
+            'costo_alimento_docena': round(costo_alimento['feed_cost_per_dozen'], 0),
         },
         
         # Indicadores financieros
@@ -312,15 +326,13 @@ def switch_view_role(request, role):
         messages.error(request, 'Rol inválido')
         return redirect('dashboard')
     
-    # Guardar el rol temporal en la sesión
-    request.session['view_as_role'] = role
-    
     if role == 'admin':
         messages.success(request, 'Vista restaurada a Admin')
         # Limpiar la sesión si vuelve a admin
-        if 'view_as_role' in request.session:
-            del request.session['view_as_role']
+        request.session.pop('view_as_role', None)
     else:
+        # Guardar el rol temporal en la sesión
+        request.session['view_as_role'] = role
         role_names = {
             'worker': 'Trabajador',
             'accountant': 'Contador'
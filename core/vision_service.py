@@ -8,6 +8,7 @@ import cv2
 import numpy as np
 from PIL import Image
 import os
+import threading
 from django.conf import settings
 
 
@@ -18,6 +19,7 @@ class EggCounterService:
         # Intentar cargar modelo YOLO si existe
         self.yolo_model = None
         self.use_yolo = False
+        self._yolo_lock = threading.Lock()
         
         try:
             from ultralytics import YOLO
@@ -55,7 +57,9 @@ class EggCounterService:
         sino usa Hough Transform como fallback.
         """
         if self.use_yolo:
-            return self.count_eggs_yolo(image_path)
+            # El modelo YOLO compartido no es seguro entre hilos
+            with self._yolo_lock:
+                return self.count_eggs_yolo(image_path)
         else:
             return self.count_eggs_hough(image_path)
     
@@ -471,3 +475,23 @@ class EggCounterService:
             self.max_radius = max_radius
         if min_distance is not None:
             self.min_distance = min_distance
+
+
+# Instancia compartida por proceso: el modelo YOLO se carga una sola vez
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_egg_counter_service():
+    """Devuelve el servicio de conteo, creándolo (y cargando el modelo) la primera vez."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = EggCounterService()
+    return _service
+
+
+def get_loaded_service():
+    """Servicio ya creado o None; nunca fuerza la carga del modelo."""
+    return _service
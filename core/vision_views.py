@@ -2,23 +2,51 @@
 Vistas para el módulo de visión por computadora
 Maneja la carga de imágenes, procesamiento y confirmación de conteo automático
 """
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.conf import settings
 import os
+import time
 from datetime import datetime
 
+from core.async_utils import run_in_executor
 from core.decorators import production_write_required
 from core.forms import VisionCountForm
 from core.models import EggProduction
-from core.vision_service import EggCounterService
+from core.session_utils import set_session_value
+from core.throttling import throttle
+from core.vision_service import get_egg_counter_service
+from avicola.metrics import observe_vision
+
+
+def _save_upload(image, path):
+    """Guarda el archivo subido en disco."""
+    with open(path, 'wb+') as destination:
+        for chunk in image.chunks():
+            destination.write(chunk)
+
+
+def _count_eggs(path):
+    """Conteo con visión (carga el modelo la primera vez). Devuelve (resultado, método, segundos)."""
+    service = get_egg_counter_service()
+    start_time = time.perf_counter()
+    result = service.count_eggs(path)  # Método con mejor preprocesamiento
+    return result, 'yolo' if service.use_yolo else 'hough', time.perf_counter() - start_time
 
 
 @login_required
 @production_write_required
-def vision_count_eggs(request):
-    """Vista para subir imagen y procesar con visión."""
+@throttle('vision', methods=('POST',))
+async def vision_count_eggs(request):
+    """
+    Vista para subir imagen y procesar con visión.
+
+    Es async: con ASGI el servidor recibe la subida completa antes de llamar
+    a la vista (una subida lenta desde el celular no ocupa un hilo), y el
+    guardado y el conteo corren en el pool de CPU.
+    """
     if request.method == 'POST':
         form = VisionCountForm(request.POST, request.FILES)
         if form.is_valid():
@@ -36,29 +64,28 @@ def vision_count_eggs(request):
             temp_path = os.path.join(temp_dir, filename)
             
             # Guardar archivo
-            with open(temp_path, 'wb+') as destination:
-                for chunk in image.chunks():
-                    destination.write(chunk)
+            await run_in_executor(_save_upload, image, temp_path)
             
             # Procesar con visión (método mejorado con preprocesamiento)
             try:
-                service = EggCounterService()
-                result = service.count_eggs(temp_path)  # Método con mejor preprocesamiento
+                result, method, duration = await run_in_executor(_count_eggs, temp_path)
+                observe_vision(method, duration, error='error' in result)
                 
                 if 'error' in result:
                     messages.error(request, f'Error al procesar imagen: {result["error"]}')
                     return redirect('vision_count_eggs')
                 
                 # Guardar resultado en sesión para confirmación
-                request.session['vision_result'] = {
+                # (solo la cantidad de detecciones, no la lista completa)
+                await sync_to_async(set_session_value)(request.session, 'vision_result', {
                     'count': result['count'],
                     'confidence': float(result['confidence']),
                     'production_date': str(production_date),
                     'size_code': size_code,
                     'temp_image_path': temp_path,
                     'processed_image_path': result['processed_image_path'],
-                    'detections': result['detections']
-                }
+                    'detection_count': len(result['detections'])
+                })
                 
                 return redirect('vision_confirm')
                 
@@ -74,7 +101,8 @@ def vision_count_eggs(request):
         'title': 'Conteo Automático con Visión',
         'icon': 'bi-camera'
     }
-    return render(request, 'vision/count.html', context)
+    # Los context processors leen el usuario y la sesión
+    return await sync_to_async(render)(request, 'vision/count.html', context)
 
 
 @login_required
@@ -0,0 +1,98 @@
+"""
+Benchmark de serialización de la API: filas/segundo del serializer de DRF
+contra la ruta rápida de los listados (api.mixins.FastListMixin).
+
+Para cada modelo lee las mismas filas de la base configurada en .env (solo
+lectura) y mide, por separado:
+- serializer: queryset -> ModelSerializer(many=True).data -> JSONRenderer
+- rápida:     values() -> conversores por campo -> FastJSONRenderer (orjson si está instalado)
+
+También verifica que ambas rutas produzcan exactamente el mismo JSON.
+
+Uso:
+    python scripts/benchmark_api_serialization.py --rows 5000 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure(func, repeat):
+    """Mejor y mediana de `repeat` ejecuciones, en segundos."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000, help='Filas por modelo')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por medición')
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'avicola.settings')
+
+    import django
+    django.setup()
+
+    from rest_framework.renderers import JSONRenderer
+
+    from api.mixins import _convert_row, build_fast_plan
+    from api.renderers import FastJSONRenderer, orjson
+    from api.serializers import (
+        EggProductionSerializer, FinanceTransactionSerializer, MortalityEventSerializer,
+    )
+    from core.models import EggProduction, FinanceTransaction, MortalityEvent
+
+    cases = [
+        ('EggProduction', EggProduction.objects.filter(is_active=True), EggProductionSerializer),
+        ('FinanceTransaction', FinanceTransaction.objects.filter(is_active=True).select_related('category'),
+         FinanceTransactionSerializer),
+        ('MortalityEvent', MortalityEvent.objects.filter(is_active=True), MortalityEventSerializer),
+    ]
+
+    print(f"JSON: {'orjson' if orjson else 'json (orjson no instalado)'}")
+    print(f"{'modelo':<20} {'filas':>6} {'serializer':>14} {'rápida':>14} {'x':>6}  igual")
+
+    for name, queryset, serializer_class in cases:
+        plan = build_fast_plan(serializer_class())
+        if plan is None:
+            print(f'{name:<20} sin ruta rápida (campos anidados o calculados)')
+            continue
+        lookups = [lookup for _, lookup, _ in plan]
+
+        def slow():
+            rows = list(queryset[:args.rows])
+            return JSONRenderer().render(serializer_class(rows, many=True).data)
+
+        def fast():
+            rows = queryset.values(*lookups)[:args.rows]
+            return FastJSONRenderer().render([_convert_row(plan, row) for row in rows])
+
+        slow_output, fast_output = slow(), fast()
+        same = json.loads(slow_output) == json.loads(fast_output)
+        count = len(json.loads(fast_output))
+        if not count:
+            print(f'{name:<20} sin datos')
+            continue
+
+        slow_best, _ = measure(slow, args.repeat)
+        fast_best, _ = measure(fast, args.repeat)
+        print(
+            f'{name:<20} {count:>6} {count / slow_best:>10,.0f} f/s {count / fast_best:>10,.0f} f/s '
+            f'{slow_best / fast_best:>5.1f}x  {"sí" if same else "NO"}'
+        )
+
+
+if __name__ == '__main__':
+    main()
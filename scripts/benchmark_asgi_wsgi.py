@@ -0,0 +1,200 @@
+"""
+Benchmark WSGI contra ASGI: latencia de las peticiones rápidas mientras hay
+subidas lentas en curso (celulares con mala señal subiendo fotos).
+
+Para cada modo levanta gunicorn con la misma cantidad de workers:
+- wsgi: gunicorn avicola.wsgi:application (workers sync)
+- asgi: gunicorn avicola.asgi:application -k uvicorn.workers.UvicornWorker
+
+y mide durante `--seconds`:
+- `--slow-uploads` clientes que envían un POST a /vision/count/ repartiendo
+  el cuerpo en `--upload-seconds` segundos (con WSGI cada uno ocupa un worker)
+- `--clients` clientes que piden /health/ready/ y el dashboard sin pausa
+
+Reporta peticiones/segundo y latencias p50 / p95 / máx de los clientes
+rápidos. Usa la base configurada en .env; el POST envía una imagen inválida,
+así que no guarda registros.
+
+Uso:
+    python scripts/benchmark_asgi_wsgi.py --email admin@avicola.cl --password ... \\
+        --workers 2 --slow-uploads 8 --upload-seconds 10 --clients 4 --seconds 20
+"""
+import argparse
+import http.cookiejar
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    'wsgi': ['avicola.wsgi:application'],
+    'asgi': ['avicola.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+FAST_PATHS = ['/health/ready/', '/']
+
+
+def start_server(mode, workers, port):
+    """Levanta gunicorn en el modo indicado y espera a que /health/ responda."""
+    command = [
+        sys.executable, '-m', 'gunicorn', *MODES[mode],
+        '--workers', str(workers), '--bind', f'127.0.0.1:{port}', '--timeout', '120',
+    ]
+    process = subprocess.Popen(command, cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health/', timeout=1)
+            return process
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'gunicorn ({mode}) no respondió en 30 segundos')
+
+
+def login(base_url, email, password):
+    """Inicia sesión en el formulario web y devuelve el cookie jar."""
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    opener.open(f'{base_url}/login/').read()
+    csrf = next(cookie.value for cookie in jar if cookie.name == 'csrftoken')
+    data = urllib.parse.urlencode({'email': email, 'password': password, 'csrfmiddlewaretoken': csrf})
+    opener.open(f'{base_url}/login/', data.encode()).read()
+    if not any(cookie.name == 'sessionid' for cookie in jar):
+        raise RuntimeError('No se pudo iniciar sesión (revisar --email / --password)')
+    return jar
+
+
+def slow_upload(port, cookies, csrf, upload_seconds, size):
+    """Un POST multipart a /vision/count/ cuyo cuerpo tarda `upload_seconds` en llegar."""
+    boundary = 'avicola-benchmark'
+    head = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="csrfmiddlewaretoken"\r\n\r\n{csrf}\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="production_date"\r\n\r\n2024-01-01\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="size_code"\r\n\r\nmedium\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="huevos.jpg"\r\n'
+        f'Content-Type: image/jpeg\r\n\r\n'
+    ).encode()
+    body = head + os.urandom(size) + f'\r\n--{boundary}--\r\n'.encode()
+
+    request = (
+        f'POST /vision/count/ HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n'
+        f'Content-Type: multipart/form-data; boundary={boundary}\r\n'
+        f'Content-Length: {len(body)}\r\nCookie: {cookies}\r\nConnection: close\r\n\r\n'
+    ).encode()
+
+    chunks = 20
+    chunk_size = len(body) // chunks + 1
+    with socket.create_connection(('127.0.0.1', port), timeout=upload_seconds + 60) as sock:
+        sock.sendall(request)
+        for start in range(0, len(body), chunk_size):
+            sock.sendall(body[start:start + chunk_size])
+            time.sleep(upload_seconds / chunks)
+        while sock.recv(65536):
+            pass
+
+
+def run_mode(mode, args):
+    port = args.port
+    base_url = f'http://127.0.0.1:{port}'
+    process = start_server(mode, args.workers, port)
+    try:
+        jar = login(base_url, args.email, args.password)
+        cookies = '; '.join(f'{cookie.name}={cookie.value}' for cookie in jar)
+        csrf = next(cookie.value for cookie in jar if cookie.name == 'csrftoken')
+
+        deadline = time.monotonic() + args.seconds
+        latencies = []
+        uploads = {'done': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def uploader():
+            while time.monotonic() < deadline:
+                try:
+                    slow_upload(port, cookies, csrf, args.upload_seconds, args.upload_kb * 1024)
+                    key = 'done'
+                except OSError:
+                    key = 'failed'
+                with lock:
+                    uploads[key] += 1
+
+        def client():
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+            i = 0
+            while time.monotonic() < deadline:
+                path = FAST_PATHS[i % len(FAST_PATHS)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    opener.open(base_url + path, timeout=60).read()
+                except urllib.error.URLError:
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=uploader) for _ in range(args.slow_uploads)]
+        threads += [threading.Thread(target=client) for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        process.terminate()
+        process.wait()
+
+    if not latencies:
+        return {'requests': 0, 'uploads': uploads}
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / args.seconds,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'uploads': uploads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--workers', type=int, default=2, help='Workers de gunicorn en ambos modos')
+    parser.add_argument('--slow-uploads', type=int, default=8, help='Subidas lentas simultáneas')
+    parser.add_argument('--upload-seconds', type=float, default=10, help='Duración de cada subida')
+    parser.add_argument('--upload-kb', type=int, default=512, help='Tamaño de la imagen subida')
+    parser.add_argument('--clients', type=int, default=4, help='Clientes rápidos simultáneos')
+    parser.add_argument('--seconds', type=float, default=20, help='Duración de cada modo')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+
+    print(
+        f'{args.workers} workers, {args.slow_uploads} subidas de {args.upload_seconds:.0f}s, '
+        f'{args.clients} clientes rápidos, {args.seconds:.0f}s por modo'
+    )
+    print(f"{'modo':<6} {'peticiones':>10} {'pet/s':>8} {'p50':>10} {'p95':>10} {'máx':>10} {'subidas':>8}")
+    for mode in args.modes:
+        result = run_mode(mode, args)
+        uploads = result['uploads']['done']
+        if not result['requests']:
+            print(f"{mode:<6} {0:>10} {'-':>8} {'-':>10} {'-':>10} {'-':>10} {uploads:>8}")
+            continue
+        print(
+            f"{mode:<6} {result['requests']:>10} {result['rps']:>8.1f} "
+            f"{result['p50_ms']:>7.0f} ms {result['p95_ms']:>7.0f} ms {result['max_ms']:>7.0f} ms {uploads:>8}"
+        )
+
+
+if __name__ == '__main__':
+    main()
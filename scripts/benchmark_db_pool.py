@@ -0,0 +1,157 @@
+"""
+Benchmark de conexiones a la base de datos: peticiones/segundo con y sin pool.
+
+Recorre el dashboard y las vistas de listado con el cliente de pruebas de
+Django desde varios hilos, una vez por cada modo de conexión:
+- nueva:       DB_POOL_ENABLED=False, DB_CONN_MAX_AGE=0 (una conexión por petición)
+- persistente: DB_POOL_ENABLED=False, DB_CONN_MAX_AGE=60
+- pool:        DB_POOL_ENABLED=True
+
+Cada modo corre en un proceso aparte porque los settings leen el entorno
+al importarse. El cliente de pruebas desconecta close_old_connections de
+las señales de petición, así que se llama después de cada petición (como
+lo haría el servidor): sin eso cada hilo reutilizaría una sola conexión en
+los tres modos. Usa la base configurada en .env (solo lectura).
+
+Uso:
+    python scripts/benchmark_db_pool.py --email admin@avicola.cl --threads 8 --seconds 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    'nueva': {'DB_POOL_ENABLED': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistente': {'DB_POOL_ENABLED': 'False', 'DB_CONN_MAX_AGE': '60'},
+    'pool': {'DB_POOL_ENABLED': 'True'},
+}
+
+URL_NAMES = [
+    'dashboard',
+    'farm_status_list',
+    'egg_production_list',
+    'mortality_list',
+    'feed_item_list',
+    'feed_inventory_list',
+    'feed_inventory_movements',
+    'finance_transaction_list',
+]
+
+
+def run_worker(email, threads, seconds):
+    """Ejecuta la carga en este proceso e imprime el resultado como JSON."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'avicola.settings')
+
+    import django
+    django.setup()
+
+    from django.db import close_old_connections, connections
+    from django.test import Client
+    from django.urls import reverse
+    from core.models import User
+
+    user = User.objects.get(email=email)
+    urls = [reverse(name) for name in URL_NAMES]
+    connections.close_all()
+
+    latencies = {url: [] for url in urls}
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        client = Client()
+        client.force_login(user)
+        local = {url: [] for url in urls}
+        while time.perf_counter() < deadline:
+            for url in urls:
+                start = time.perf_counter()
+                response = client.get(url)
+                # request_finished: cierra (nueva), conserva (persistente) o devuelve al pool
+                close_old_connections()
+                local[url].append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors.append((url, response.status_code))
+        with lock:
+            for url, values in local.items():
+                latencies[url].extend(values)
+        connections.close_all()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    print(json.dumps({
+        'requests': total,
+        'rps': total / elapsed,
+        'errors': len(errors),
+        'per_url': {
+            url: {
+                'count': len(values),
+                'p50_ms': statistics.median(values) * 1000 if values else None,
+                'p95_ms': statistics.quantiles(values, n=20)[-1] * 1000 if len(values) > 1 else None,
+            }
+            for url, values in latencies.items()
+        },
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--email', required=True, help='Usuario existente con acceso a todas las vistas')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--modes', default=','.join(MODES), help='Modos a comparar, separados por coma')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.email, args.threads, args.seconds)
+        return
+
+    print("=" * 60)
+    print("BENCHMARK DE CONEXIONES A LA BASE DE DATOS")
+    print("=" * 60)
+    print(f"Hilos: {args.threads} | Duración por modo: {args.seconds}s\n")
+
+    results = {}
+    for mode in args.modes.split(','):
+        env = {**os.environ, **MODES[mode], 'METRICS_ENABLED': 'False', 'LOG_HEALTH_SAMPLE_RATE': '0'}
+        print(f"[{mode}] ejecutando...")
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', '--email', args.email,
+             '--threads', str(args.threads), '--seconds', str(args.seconds)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"\n{'Modo':<14}{'Peticiones':>12}{'Req/s':>10}{'Errores':>10}")
+    for mode, data in results.items():
+        print(f"{mode:<14}{data['requests']:>12}{data['rps']:>10.1f}{data['errors']:>10}")
+
+    print(f"\n{'Vista':<36}" + ''.join(f"{mode + ' p50':>18}" for mode in results))
+    first = next(iter(results.values()))
+    for url in first['per_url']:
+        row = f"{url:<36}"
+        for data in results.values():
+            p50 = data['per_url'][url]['p50_ms']
+            row += f"{p50:>15.1f} ms" if p50 is not None else f"{'-':>18}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
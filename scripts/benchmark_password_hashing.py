@@ -0,0 +1,110 @@
+"""
+Benchmark de verificación de contraseñas: costo por esquema y logins/segundo
+a través del pool acotado (core.auth_utils).
+
+Mide, con los parámetros de settings (ARGON2_*, PASSWORD_VERIFY_*):
+- costo de una verificación: argon2 (parámetros actuales), bcrypt (cost 12)
+- logins/segundo y rechazos (PasswordVerifyBusy) con `--threads` hilos
+  verificando a la vez a través del pool
+
+No usa la base de datos. Sirve para elegir ARGON2_* según la CPU del
+servidor (una verificación debería tomar entre 50 y 250 ms) y
+PASSWORD_VERIFY_WORKERS según los núcleos disponibles.
+
+Uso:
+    python scripts/benchmark_password_hashing.py --repeat 20 --threads 16 --seconds 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PASSWORD = 'benchmark-Contraseña-123'
+
+
+def measure(func, repeat):
+    """Mejor y mediana de `repeat` ejecuciones, en segundos."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def run_pool(verify, password_hash, threads, seconds, busy_exception):
+    """Verificaciones correctas y rechazadas con `threads` hilos durante `seconds`."""
+    counts = {'ok': 0, 'busy': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        while time.perf_counter() < deadline:
+            try:
+                verify(PASSWORD, password_hash)
+                key = 'ok'
+            except busy_exception:
+                key = 'busy'
+                time.sleep(0.01)
+            with lock:
+                counts[key] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='Verificaciones por esquema')
+    parser.add_argument('--threads', type=int, default=16, help='Logins simultáneos contra el pool')
+    parser.add_argument('--seconds', type=float, default=10, help='Duración de la prueba del pool')
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'avicola.settings')
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+
+    from core.auth_utils import (
+        PasswordVerifyBusy, hash_password, ph, verify_password, verify_password_bounded,
+    )
+
+    print(
+        f'argon2: time_cost={ph.time_cost} memory_cost={ph.memory_cost} KiB '
+        f'parallelism={ph.parallelism}'
+    )
+    print(
+        f'pool: workers={settings.PASSWORD_VERIFY_WORKERS} '
+        f'cola={settings.PASSWORD_VERIFY_MAX_QUEUE} timeout={settings.PASSWORD_VERIFY_TIMEOUT}s'
+    )
+
+    hashes = {
+        'argon2': hash_password(PASSWORD),
+        'bcrypt': hash_password(PASSWORD, use_argon2=False),
+    }
+
+    print(f"\n{'esquema':<10} {'mejor':>10} {'mediana':>10} {'verif/s/núcleo':>15}")
+    for scheme, password_hash in hashes.items():
+        best, median = measure(lambda: verify_password(PASSWORD, password_hash), args.repeat)
+        print(f'{scheme:<10} {best * 1000:>7.1f} ms {median * 1000:>7.1f} ms {1 / median:>15.1f}')
+
+    print(f'\npool con {args.threads} hilos durante {args.seconds:.0f}s (argon2)')
+    counts = run_pool(verify_password_bounded, hashes['argon2'], args.threads, args.seconds, PasswordVerifyBusy)
+    print(f"  aceptados:  {counts['ok']:>6} ({counts['ok'] / args.seconds:.1f}/s)")
+    print(f"  rechazados: {counts['busy']:>6} ({counts['busy'] / args.seconds:.1f}/s)")
+
+
+if __name__ == '__main__':
+    main()